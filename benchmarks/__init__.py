@@ -0,0 +1 @@
+"""Performance benchmarks for TrendLab. Run with `python -m benchmarks --help`."""
@@ -0,0 +1,318 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks --scale small --output bench.json
+    python -m benchmarks --scale small --compare baseline.json --threshold 0.25
+
+Each case times only the operation itself (inputs are generated beforehand) and records
+the median and minimum of `--repeat` runs. With `--compare`, the run exits with status 1
+when any case's median regresses past the threshold against the baseline file.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from benchmarks.startup import startup_cases
+from benchmarks.synthetic import (
+    StubProvider,
+    coingecko_payload,
+    generate_batch,
+    generate_frame,
+    generate_panel,
+    synthetic_assets,
+)
+from trendlab.analytics.backtest import Backtester
+from trendlab.analytics.cross_asset import CrossAssetEngineer
+from trendlab.analytics.engine import ModelEngine
+from trendlab.analytics.features import FeatureEngineer
+from trendlab.application.pipeline import PipelineService
+from trendlab.infrastructure.coingecko import CoinGeckoProvider
+from trendlab.infrastructure.storage import ParquetStorage
+
+# Rows per series and assets per panel for each scale; the upper ends are 10M rows and 1,000 assets
+SCALES = {
+    "small": {"rows": [1_000, 10_000], "assets": [1, 10]},
+    "medium": {"rows": [100_000, 1_000_000], "assets": [100]},
+    "large": {"rows": [10_000_000], "assets": [1_000]},
+}
+PANEL_ROWS = 2_000  # per asset in multi-asset cases (~5 years of daily candles)
+PIPELINE_DAYS = 730
+# Memory budget of the chunked feature case, and the size of the raw pieces fed to it (a month of hourly data)
+CHUNKED_BUDGET = 16 * 2**20
+PIECE_ROWS = 744
+# Horizons of the multi-horizon training case
+HORIZONS = [1, 3, 7, 30]
+# Cases slower than this are not flagged for relative changes, which are mostly noise
+MIN_DELTA_S = 0.005
+
+
+@dataclass
+class Result:
+    name: str
+    rows: int
+    assets: int
+    repeat: int
+    median_s: float
+    min_s: float
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows * self.assets / self.median_s if self.median_s else float("inf")
+
+
+# A case prepares its inputs and returns the callable to time
+Case = tuple[str, int, int, Callable[[], Callable[[], object]]]
+
+
+def cases(rows_list: list[int], assets_list: list[int], jobs: int, workdir: Path) -> Iterator[Case]:
+    engineer = FeatureEngineer()
+
+    def scratch() -> Path:
+        return Path(tempfile.mkdtemp(dir=workdir))
+
+    for rows in rows_list:
+        def parse(rows: int = rows) -> Callable[[], object]:
+            provider, payload = CoinGeckoProvider(), coingecko_payload(rows)
+            return lambda: provider._parse_response(payload)
+
+        def features(rows: int = rows) -> Callable[[], object]:
+            frame = generate_frame(rows)
+            return lambda: engineer.compute_features(frame)
+
+        def features_chunked(rows: int = rows) -> Callable[[], object]:
+            frame = generate_frame(rows)
+            chunk_rows = engineer.chunk_rows(CHUNKED_BUDGET)
+            pieces = [frame.iloc[i:i + PIECE_ROWS] for i in range(0, rows, PIECE_ROWS)]
+            return lambda: sum(len(c) for c in engineer.iter_features(pieces, chunk_rows))
+
+        yield "parse_response", rows, 1, parse
+        yield "compute_features", rows, 1, features
+        yield "compute_features[chunked]", rows, 1, features_chunked
+
+        for model_type in ("logistic", "hist_boosting"):
+            def train(rows: int = rows, model_type: str = model_type) -> Callable[[], object]:
+                X, y = _dataset(engineer, rows)
+                return lambda: ModelEngine(model_type, n_jobs=jobs).train(X, y)
+
+            yield f"train[{model_type}]", rows, 1, train
+
+        def train_horizons(rows: int = rows) -> Callable[[], object]:
+            X, targets = engineer.create_horizon_dataset(engineer.compute_features(generate_frame(rows)), HORIZONS)
+            targets = targets.set_axis(HORIZONS, axis=1)
+            return lambda: ModelEngine("logistic", n_jobs=jobs).train_horizons(X, targets)
+
+        yield f"train[logistic,horizons={len(HORIZONS)}]", rows, 1, train_horizons
+
+        def predict_batch(rows: int = rows) -> Callable[[], object]:
+            model, X = _fitted_model(engineer, rows)
+            return lambda: model.predict_proba(X)
+
+        def predict_row(rows: int = rows) -> Callable[[], object]:
+            model, X = _fitted_model(engineer, rows)
+            row = X.iloc[[-1]]
+            return lambda: model.predict_proba(row)
+
+        def compiled_batch(rows: int = rows) -> Callable[[], object]:
+            model, X = _fitted_model(engineer, rows)
+            compiled, values = model.compile(), X.to_numpy()
+            return lambda: compiled.score(values)
+
+        def compiled_row(rows: int = rows) -> Callable[[], object]:
+            model, X = _fitted_model(engineer, rows)
+            compiled, row = model.compile(), X.to_numpy()[-1]
+            return lambda: compiled.score_row(row)
+
+        yield "predict_proba[batch]", rows, 1, predict_batch
+        yield "predict_proba[row]", rows, 1, predict_row
+        yield "predict_proba[compiled,batch]", rows, 1, compiled_batch
+        yield "predict_proba[compiled,row]", rows, 1, compiled_row
+
+        def roundtrip(rows: int = rows) -> Callable[[], object]:
+            storage = ParquetStorage(scratch())
+            frame = engineer.compute_features(generate_frame(rows))
+
+            def run() -> object:
+                storage.save_features("bench", frame)
+                return storage.load_features("bench")
+            return run
+
+        def tail_read(rows: int = rows) -> Callable[[], object]:
+            storage = ParquetStorage(scratch())
+            storage.save_features("bench", engineer.compute_features(generate_frame(rows)))
+            return lambda: storage.load_features("bench", columns=["price", "rsi_14"], tail=1)
+
+        def append(rows: int = rows) -> Callable[[], object]:
+            storage = ParquetStorage(scratch(), compact_threshold=10**9)
+            batch = generate_batch(rows + 1)
+            storage.save_raw("bench", generate_batch(rows))
+            return lambda: storage.append_raw("bench", batch.to_points()[-1:])
+
+        yield "storage_roundtrip", rows, 1, roundtrip
+        yield "storage_tail_read", rows, 1, tail_read
+        yield "storage_append_row", rows, 1, append
+
+    for assets in assets_list:
+        def panel(assets: int = assets) -> Callable[[], object]:
+            frames = generate_panel(assets, PANEL_ROWS)
+            return lambda: engineer.compute_panel_features(frames)
+
+        def pipeline(assets: int = assets) -> Callable[[], object]:
+            universe = synthetic_assets(assets)
+
+            def run() -> object:
+                # A fresh root per run, so every repeat trains instead of reusing registered models
+                service = PipelineService(scratch())
+                service.provider = StubProvider()
+                service.cv_jobs = jobs
+                # The synthetic universe has no BTC: benchmark against its first asset instead
+                service.cross_asset = CrossAssetEngineer(benchmark=universe[0].symbol)
+                return service.run_full_pipeline(universe, PIPELINE_DAYS)
+            return run
+
+        def cross_asset(assets: int = assets) -> Callable[[], object]:
+            frames = engineer.compute_panel_features(generate_panel(assets, PANEL_ROWS))
+            frames["btc"] = frames.pop(next(iter(frames)))
+            return lambda: CrossAssetEngineer().compute(frames)
+
+        def simulate(assets: int = assets) -> Callable[[], object]:
+            prices = pd.DataFrame({a: f["price"] for a, f in generate_panel(assets, PANEL_ROWS).items()})
+            probs = pd.DataFrame(
+                np.random.default_rng(0).uniform(0.3, 0.7, prices.shape), index=prices.index, columns=prices.columns
+            )
+            return lambda: Backtester().simulate(probs, prices)
+
+        def walk_forward(assets: int = assets) -> Callable[[], object]:
+            frames = engineer.compute_panel_features(generate_panel(assets, PANEL_ROWS))
+            return lambda: Backtester().run(frames)
+
+        yield "panel_features", PANEL_ROWS, assets, panel
+        yield "cross_asset_features", PANEL_ROWS, assets, cross_asset
+        yield "backtest_simulate", PANEL_ROWS, assets, simulate
+        yield "backtest_walk_forward", PANEL_ROWS, assets, walk_forward
+        yield "run_full_pipeline", PIPELINE_DAYS + 1, assets, pipeline
+
+    # Independent of scale; rows=0 as they process no data
+    for name, setup in startup_cases(workdir):
+        yield name, 0, 1, setup
+
+
+def _dataset(engineer: FeatureEngineer, rows: int) -> tuple[pd.DataFrame, pd.Series]:
+    dataset = engineer.create_dataset(engineer.compute_features(generate_frame(rows)))
+    return dataset.drop(columns=["target_next_day_up"]), dataset["target_next_day_up"]
+
+
+def _fitted_model(engineer: FeatureEngineer, rows: int) -> tuple[ModelEngine, pd.DataFrame]:
+    X, y = _dataset(engineer, rows)
+    model = ModelEngine("logistic", n_jobs=1)
+    model.pipeline.fit(X, y)
+    model.feature_cols = list(X.columns)
+    return model, X
+
+
+def run_case(name: str, rows: int, assets: int, setup: Callable[[], Callable[[], object]], repeat: int) -> Result:
+    fn = setup()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return Result(name, rows, assets, repeat, statistics.median(timings), min(timings))
+
+
+def result_key(r: dict) -> str:
+    return f"{r['name']}/rows={r['rows']}/assets={r['assets']}"
+
+
+def compare(current: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Returns a line per regressed case: median slower than baseline by more than `threshold`."""
+    base = {result_key(r): r for r in baseline}
+    regressions = []
+    for r in current:
+        b = base.get(result_key(r))
+        if b is None:
+            continue
+        ratio = r["median_s"] / b["median_s"] if b["median_s"] else float("inf")
+        if ratio > 1 + threshold and r["median_s"] - b["median_s"] > MIN_DELTA_S:
+            regressions.append(
+                f"{result_key(r)}: {b['median_s'] * 1e3:.2f} ms -> {r['median_s'] * 1e3:.2f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="TrendLab performance benchmarks")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--rows", type=int, nargs="+", help="Override the series lengths of the scale")
+    parser.add_argument("--assets", type=int, nargs="+", help="Override the panel sizes of the scale")
+    parser.add_argument("--only", help="Run only cases whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=1, help="CV fold parallelism for training cases")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown, e.g. 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("trendlab").setLevel(logging.WARNING)
+
+    rows_list = args.rows or SCALES[args.scale]["rows"]
+    assets_list = args.assets or SCALES[args.scale]["assets"]
+    results = []
+    with tempfile.TemporaryDirectory(prefix="trendlab-bench-") as workdir:
+        for name, rows, assets, setup in cases(rows_list, assets_list, args.jobs, Path(workdir)):
+            if args.only and args.only not in name:
+                continue
+            result = run_case(name, rows, assets, setup, args.repeat)
+            results.append(result)
+            throughput = f"{result.rows_per_s:>14,.0f} rows/s" if rows else ""
+            print(
+                f"{name:<30} rows={rows:>10,} assets={assets:>5}  "
+                f"median {result.median_s * 1e3:>10.2f} ms  min {result.min_s * 1e3:>10.2f} ms  {throughput}",
+                flush=True
+            )
+
+    rows_out = [asdict(r) | {"rows_per_s": r.rows_per_s} for r in results]
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "scale": args.scale,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+        },
+        "results": rows_out,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare(rows_out, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Cold-start cases: every run is a fresh interpreter, so import costs are included."""
+import os
+import subprocess
+import sys
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import typer
+
+import trendlab
+from trendlab.cli.main import app
+
+REPO_ROOT = Path(trendlab.__file__).resolve().parents[1]
+
+API_REQUEST = (
+    "from fastapi.testclient import TestClient; from trendlab.api.main import app; "
+    "TestClient(app).get({path!r})"
+)
+
+
+def startup_cases(workdir: Path) -> Iterator[tuple[str, Callable[[], Callable[[], object]]]]:
+    """`--help` of the CLI and of each command, and API cold start up to its first response."""
+    commands = sorted(typer.main.get_command(app).commands)  # type: ignore[attr-defined]
+    for args in ([], *([command] for command in commands)):
+        label = " ".join(["cli", *args]) if args else "cli"
+        yield f"startup[{label}]", _process([sys.executable, "-m", "trendlab.cli.main", *args, "--help"], workdir)
+
+    # /health needs no data; the first read endpoint call also loads the data stack
+    for label, path in (("api health", "/health"), ("api first read", "/insights/btc")):
+        yield f"startup[{label}]", _process([sys.executable, "-c", API_REQUEST.format(path=path)], workdir)
+
+
+def _process(command: list[str], workdir: Path) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.getenv("PYTHONPATH")]))}
+        return lambda: subprocess.run(command, cwd=workdir, env=env, check=True, capture_output=True)
+    return setup
@@ -0,0 +1,65 @@
+"""Seeded synthetic market data, from a single small series up to large multi-asset panels."""
+import numpy as np
+import pandas as pd
+
+from trendlab.domain.models import Asset, MarketDataBatch
+
+START_MS = 1_420_070_400_000  # 2015-01-01
+DAY_MS = 86_400_000
+# Longer series switch to hourly, then minute candles, so timestamps stay within pandas' range (year 2262)
+MAX_SPAN_MS = 100 * 365 * DAY_MS
+STEPS_MS = (DAY_MS, 3_600_000, 60_000)
+
+
+def generate_batch(n_rows: int, seed: int = 0, step_ms: int | None = None) -> MarketDataBatch:
+    """Geometric random walk prices with volatility clustering and noisy volumes."""
+    if step_ms is None:
+        step_ms = next((s for s in STEPS_MS if n_rows * s <= MAX_SPAN_MS), STEPS_MS[-1])
+    rng = np.random.default_rng(seed)
+    vol = 0.02 * np.exp(np.cumsum(rng.normal(0, 0.02, n_rows)).clip(-2, 2))
+    log_ret = rng.standard_normal(n_rows) * vol
+    price = 100 * np.exp(np.cumsum(log_ret))
+    volume = rng.lognormal(mean=20, sigma=0.5, size=n_rows) * (1 + 20 * np.abs(log_ret))
+    return MarketDataBatch(
+        timestamps=START_MS + np.arange(n_rows, dtype=np.int64) * step_ms,
+        price=price,
+        market_cap=price * 1.9e7,
+        total_volume=volume,
+    )
+
+
+def generate_frame(n_rows: int, seed: int = 0, step_ms: int | None = None) -> pd.DataFrame:
+    return generate_batch(n_rows, seed, step_ms).to_frame()
+
+
+def generate_panel(n_assets: int, n_rows: int, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """Independent series per asset; lengths vary so panels are ragged like real listings."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(max(1, n_rows // 2), n_rows + 1, size=n_assets)
+    lengths[0] = n_rows
+    return {f"a{i:04d}": generate_frame(int(n), seed + i) for i, n in enumerate(lengths)}
+
+
+def coingecko_payload(n_rows: int, seed: int = 0) -> dict[str, list[list[float]]]:
+    """The JSON shape of /coins/{id}/market_chart, as decoded by requests."""
+    batch = generate_batch(n_rows, seed)
+    ts = batch.timestamps.tolist()
+    return {
+        "prices": [list(p) for p in zip(ts, batch.price.tolist(), strict=True)],
+        "market_caps": [list(p) for p in zip(ts, batch.market_cap.tolist(), strict=True)],
+        "total_volumes": [list(p) for p in zip(ts, batch.total_volume.tolist(), strict=True)],
+    }
+
+
+def synthetic_assets(n_assets: int) -> list[Asset]:
+    return [Asset(f"a{i:04d}", f"Asset {i}", f"asset-{i}") for i in range(n_assets)]
+
+
+class StubProvider:
+    """DataProvider serving synthetic history, so pipeline benchmarks never touch the network."""
+
+    def __init__(self, seed: int = 0):
+        self.seed = seed
+
+    def fetch_history(self, asset: Asset, days: int) -> MarketDataBatch:
+        return generate_batch(days + 1, seed=self.seed + sum(map(ord, asset.symbol)))
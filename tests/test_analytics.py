@@ -2,7 +2,14 @@ import numpy as np
 import pandas as pd
 import pytest
 
+from trendlab.analytics.backtest import BacktestConfig, Backtester, Sizing
+from trendlab.analytics.compiled import CompiledModel
+from trendlab.analytics.cross_asset import CrossAssetEngineer, join_cross_asset
+from trendlab.analytics.engine import ModelEngine
 from trendlab.analytics.features import FeatureEngineer
+from trendlab.analytics.indicators import INDICATORS, Indicator, IndicatorRegistry
+from trendlab.analytics.streaming import StreamingFeatureEngine, stream_features, stream_predictions
+from trendlab.domain.models import MarketDataPoint
 
 
 @pytest.fixture
@@ -46,3 +53,403 @@ def test_create_dataset_drops_nans(sample_data):
     clean_df = engineer.create_dataset(df)
     
     assert not clean_df.isnull().values.any()
+
+
+@pytest.fixture
+def long_history():
+    rng = np.random.default_rng(7)
+    n = 900
+    dates = pd.date_range(start="2021-01-01", periods=n, tz="UTC", name="timestamp")
+    return pd.DataFrame({
+        "price": 30000 * np.exp(np.cumsum(rng.normal(0, 0.03, n))),
+        "market_cap": rng.uniform(1e11, 2e11, n),
+        "total_volume": rng.uniform(1e9, 5e9, n)
+    }, index=dates)
+
+
+def assert_matches_full_recompute(engineer, update, raw):
+    expected = engineer.compute_features(raw).loc[update.index]
+    pd.testing.assert_frame_equal(update, expected, check_exact=False, rtol=1e-9)
+
+
+def test_update_features_appends_new_rows(long_history):
+    engineer = FeatureEngineer()
+    state = engineer.feature_state(long_history.iloc[:800])
+
+    update = engineer.update_features(state, long_history)
+
+    # Starts at the previous last row, whose target only becomes known now
+    assert update.index[0] == long_history.index[799]
+    assert update.index[-1] == long_history.index[-1]
+    assert_matches_full_recompute(engineer, update, long_history)
+
+
+def test_update_features_recomputes_revised_rows(long_history):
+    engineer = FeatureEngineer()
+    state = engineer.feature_state(long_history.iloc[:800])
+    revised = long_history.copy()
+    revised.iloc[795:, revised.columns.get_loc("price")] *= 1.01
+
+    update = engineer.update_features(state, revised)
+
+    assert update.index[0] == revised.index[794]
+    assert_matches_full_recompute(engineer, update, revised)
+
+
+def test_update_features_short_history(long_history):
+    engineer = FeatureEngineer()
+    short = long_history.iloc[:120]
+    state = engineer.feature_state(short.iloc[:100])
+
+    update = engineer.update_features(state, short)
+
+    assert_matches_full_recompute(engineer, update, short)
+
+
+def test_update_features_no_changes_and_stale_state(long_history):
+    engineer = FeatureEngineer()
+    state = engineer.feature_state(long_history)
+
+    assert engineer.update_features(state, long_history).empty
+    # Raw history no longer overlaps the saved tail: caller must recompute in full
+    shifted = long_history.copy()
+    shifted["price"] += 1.0
+    assert engineer.update_features(state, shifted) is None
+
+
+def test_feature_subset_matches_full_computation(long_history):
+    full = FeatureEngineer().compute_features(long_history)
+    engineer = FeatureEngineer(columns=["vol_30d", "rsi_14"])
+
+    subset = engineer.compute_features(long_history)
+
+    # Intermediates (log_ret, delta) are neither returned nor required by the caller
+    assert list(subset.columns) == [*long_history.columns, "vol_30d", "rsi_14"]
+    pd.testing.assert_frame_equal(subset, full[subset.columns])
+    assert engineer.warmup_rows == 30  # 29 rows of std window on top of log_ret's previous price
+    panel = engineer.compute_panel_features({"btc": long_history}, columns=["sma_50"])
+    pd.testing.assert_frame_equal(panel["btc"], full[[*long_history.columns, "sma_50"]])
+
+
+def test_indicator_registry_resolves_dependencies_once():
+    calls = []
+
+    def traced(name, fn):
+        def run(*args):
+            calls.append(name)
+            return fn(*args)
+        return run
+
+    registry = IndicatorRegistry([
+        Indicator("ret", ("price",), ("ret",), 2, traced("ret", lambda p: p.pct_change()), temporary=True),
+        Indicator("mom", ("ret",), ("mom_3", "mom_5"), 5,
+                  traced("mom", lambda r: (r.rolling(3).sum(), r.rolling(5).sum()))),
+        Indicator("vol", ("ret",), ("vol",), 10, traced("vol", lambda r: r.rolling(10).std())),
+    ])
+    price = pd.Series(np.linspace(1.0, 2.0, 40))
+
+    out = registry.compute({"price": price}, ["vol", "mom_3"])
+
+    assert list(out) == ["mom_3", "vol"]
+    assert calls == ["ret", "mom", "vol"]
+    assert registry.warmup(["mom_3"]) == 5 and registry.warmup() == 10
+    assert registry.raw_inputs(["vol"]) == ["price"]
+    assert INDICATORS.warmup() == FeatureEngineer().warmup_rows == 364
+    with pytest.raises(ValueError):
+        registry.compute({"price": price}, ["missing"])
+
+
+def test_chunked_features_match_in_memory_computation(long_history):
+    engineer = FeatureEngineer()
+    expected = engineer.compute_features(long_history)
+    # Pieces of uneven size, as month partitions would arrive
+    bounds = [0, 31, 59, 400, 401, 650, len(long_history)]
+    pieces = (long_history.iloc[a:b] for a, b in zip(bounds, bounds[1:], strict=False))
+
+    chunks = list(engineer.iter_features(pieces, chunk_rows=120))
+
+    assert all(len(c) <= 120 for c in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_exact=False, rtol=1e-9)
+    assert engineer.chunk_rows(4 * 2**20) > engineer.chunk_rows(2**20)
+    with pytest.raises(ValueError):
+        engineer.chunk_rows(64 * 1024)
+
+
+def to_points(df):
+    return [MarketDataPoint(ts, row.price, row.market_cap, row.total_volume) for ts, row in df.iterrows()]
+
+
+def test_streaming_engine_matches_batch_features(long_history):
+    expected = FeatureEngineer().compute_features(long_history)[StreamingFeatureEngine.FEATURE_COLUMNS]
+
+    streamed = pd.DataFrame(
+        [features for _, features in stream_features(to_points(long_history))],
+        index=long_history.index
+    )
+
+    pd.testing.assert_frame_equal(streamed, expected, check_exact=False, rtol=1e-9)
+
+
+def test_streaming_engine_resumes_from_warm_up(long_history):
+    engine = StreamingFeatureEngine()
+    engine.warm_up(long_history.iloc[:-1])
+    latest = engine.update(to_points(long_history.iloc[-1:])[0])
+
+    expected = FeatureEngineer().compute_features(long_history).iloc[-1]
+    for col, value in latest.items():
+        assert value == pytest.approx(expected[col], rel=1e-9)
+
+
+def test_stream_predictions_scores_every_warm_tick(long_history):
+    engineer = FeatureEngineer()
+    dataset = engineer.create_dataset(engineer.compute_features(long_history))
+    model = ModelEngine()
+    model.train(dataset.drop(columns=["target_next_day_up"]), dataset["target_next_day_up"])
+
+    probs = list(stream_predictions(to_points(long_history), model))
+    features = engineer.compute_features(long_history)[model.feature_cols]
+    assert probs[-1][1] == pytest.approx(model.predict_proba(features.iloc[[-1]]).iloc[0, 1], rel=1e-9)
+
+    # The 365 tick drawdown window has min_periods=1, so SMA-200 is the last feature to warm up
+    assert len(probs) == len(long_history) - 199
+    assert all(0.0 <= p <= 1.0 for _, p in probs)
+
+    # Columns the engine cannot produce are rejected before any tick is consumed
+    X = dataset.drop(columns=["target_next_day_up"]).assign(sentiment=0.0)
+    model.train(X, dataset["target_next_day_up"])
+    with pytest.raises(ValueError, match="sentiment"):
+        stream_predictions(iter(()), model)
+
+
+def test_streaming_tolerates_missing_market_caps(long_history):
+    engineer = FeatureEngineer()
+    dataset = engineer.create_dataset(engineer.compute_features(long_history))
+    model = ModelEngine()
+    model.train(dataset.drop(columns=["target_next_day_up"]), dataset["target_next_day_up"])
+
+    gappy = long_history.copy()
+    gappy.iloc[::3, gappy.columns.get_loc("market_cap")] = np.nan
+    engine = StreamingFeatureEngine()
+    probs = list(stream_predictions(to_points(gappy), model, engine))
+    assert len(probs) == len(gappy) - 199
+    assert engine.latest["market_cap"] == gappy["market_cap"].dropna().iloc[-1]
+
+    # Never sending a market cap still warms the indicators; only models reading it wait
+    absent = long_history.assign(market_cap=np.nan)
+    engine = StreamingFeatureEngine()
+    assert list(stream_predictions(to_points(absent), model, engine)) == []
+    assert engine.is_warm()
+
+
+def test_panel_features_match_per_asset_features(long_history):
+    engineer = FeatureEngineer()
+    frames = {
+        "btc": long_history,
+        # Shorter history on shifted timestamps: assets need not share an index
+        "eth": long_history.iloc[300:].set_axis(long_history.index[300:] + pd.Timedelta(hours=5)) * 0.05,
+        "sol": long_history.iloc[-150:],
+    }
+
+    panel = engineer.compute_panel_features(frames)
+
+    assert list(panel) == ["btc", "eth", "sol"]
+    for asset, raw in frames.items():
+        pd.testing.assert_frame_equal(panel[asset], engineer.compute_features(raw), check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("model_type", ["logistic", "hist_boosting"])
+def test_parallel_cv_folds_match_serial(long_history, model_type):
+    dataset = FeatureEngineer().create_dataset(FeatureEngineer().compute_features(long_history))
+    X, y = dataset.drop(columns=["target_next_day_up"]), dataset["target_next_day_up"]
+
+    serial = ModelEngine(model_type, n_jobs=1)
+    parallel = ModelEngine(model_type, n_jobs=2)
+    serial_metrics = serial.train(X, y)
+    parallel_metrics = parallel.train(X, y)
+
+    for key in ("accuracy", "precision", "auc", "log_loss"):
+        assert parallel_metrics[key] == pytest.approx(serial_metrics[key])
+    assert all(parallel_metrics[f"fold_{i}_fit_s"] > 0 for i in range(5))
+    assert "fold_4_score_s" in parallel_metrics
+    np.testing.assert_allclose(parallel.predict_proba(X.tail(5)), serial.predict_proba(X.tail(5)))
+
+
+def test_horizon_targets_extend_next_day_target(long_history):
+    engineer = FeatureEngineer()
+    features = engineer.compute_features(long_history)
+    targets = engineer.horizon_targets(features["price"], [7, 1])
+
+    assert list(targets.columns) == ["target_next_day_up", "target_up_7d"]
+    pd.testing.assert_series_equal(targets["target_next_day_up"], features["target_next_day_up"])
+    ahead = features["price"].shift(-7)
+    expected = (ahead > features["price"]).astype(float).where(ahead.notna())
+    pd.testing.assert_series_equal(targets["target_up_7d"], expected, check_names=False)
+    with pytest.raises(ValueError):
+        engineer.horizon_targets(features["price"], [0])
+
+
+def test_multi_horizon_training_matches_single_horizon(long_history):
+    engineer = FeatureEngineer()
+    features = engineer.compute_features(long_history)
+    X, targets = engineer.create_horizon_dataset(features, [1, 7])
+    dataset = engineer.create_dataset(features)
+
+    models = ModelEngine("logistic", n_jobs=1).train_horizons(X, targets.set_axis([1, 7], axis=1))
+    single = ModelEngine("logistic", n_jobs=1)
+    single_metrics = single.train(dataset.drop(columns=["target_next_day_up"]), dataset["target_next_day_up"])
+
+    # A row without a next-day outcome has no 7-day one either, so both keep the same rows
+    pd.testing.assert_frame_equal(X, dataset.drop(columns=["target_next_day_up"]))
+    model, metrics = models[1]
+    for key in ("accuracy", "precision", "auc", "log_loss"):
+        assert metrics[key] == pytest.approx(single_metrics[key])
+    np.testing.assert_allclose(model.predict_proba(X.tail(5)), single.predict_proba(X.tail(5)))
+
+    week, week_metrics = models[7]
+    assert week.horizon == 7 and 0 <= week_metrics["accuracy"] <= 1
+    assert week.to_artifact("btc", "f", week_metrics, len(X)).horizon == 7
+
+
+@pytest.mark.parametrize("days", [366, 730])
+def test_long_horizons_on_short_trending_histories(days):
+    rng = np.random.default_rng(11)
+    rows = days + INDICATORS.warmup()
+    price = 100 * np.exp(np.cumsum(rng.normal(0.004, 0.01, rows)))
+    history = pd.DataFrame(
+        {"price": price, "total_volume": rng.uniform(1e3, 5e3, rows), "market_cap": price * 1e3},
+        index=pd.date_range("2021-01-01", periods=rows)
+    )
+    engineer = FeatureEngineer()
+    X, targets = engineer.create_horizon_dataset(engineer.compute_features(history), [1, 7, 30])
+    targets = targets.set_axis([1, 7, 30], axis=1)
+
+    models = ModelEngine("logistic", n_jobs=1).train_horizons(X, targets)
+
+    # Purged folds with a single class are skipped instead of failing every horizon
+    assert {1, 7} <= set(models)
+    for _, metrics in models.values():
+        assert all(np.isfinite(metrics[k]) for k in ("accuracy", "precision", "auc", "log_loss"))
+    # A 30-day horizon that only ever went up has nothing to learn
+    assert (30 in models) == (targets[30].nunique() == 2)
+
+
+@pytest.mark.parametrize("model_type", ["logistic", "boosting", "hist_boosting"])
+def test_compiled_model_matches_sklearn(long_history, model_type):
+    dataset = FeatureEngineer().create_dataset(FeatureEngineer().compute_features(long_history))
+    X, y = dataset.drop(columns=["target_next_day_up"]), dataset["target_next_day_up"]
+    model = ModelEngine(model_type, n_jobs=1)
+    model.train(X, y)
+    compiled = model.compile()
+
+    expected = model.predict_proba(X)[1.0].to_numpy()
+    np.testing.assert_allclose(compiled.score(X.to_numpy()), expected, rtol=1e-12, atol=1e-12)
+    for i in (0, len(X) // 2, -1):
+        assert compiled.score_row(compiled.vector(X.iloc[i])) == pytest.approx(expected[i], rel=1e-12, abs=1e-12)
+    assert compiled.feature_cols == model.feature_cols
+    with pytest.raises(TypeError):
+        CompiledModel(model_type, 1, [], np.zeros(0), np.ones(0))  # type: ignore[abstract]
+
+    if model_type == "hist_boosting":
+        # Missing values follow the branch learned in training
+        holes = X.to_numpy().copy()
+        holes[::7, 2] = np.nan
+        sklearn_probs = model.pipeline.predict_proba(pd.DataFrame(holes, columns=X.columns))[:, 1]
+        np.testing.assert_allclose(compiled.score(holes), sklearn_probs, rtol=1e-12, atol=1e-12)
+
+
+def test_walk_forward_probabilities_are_out_of_sample(long_history):
+    dataset = FeatureEngineer().create_dataset(FeatureEngineer().compute_features(long_history))
+    backtester = Backtester(BacktestConfig(min_train=200, retrain_every=50, train_window=300))
+    probs = backtester.walk_forward(dataset)
+
+    assert probs.iloc[:200].isna().all()
+    assert probs.iloc[200:].notna().all()
+    # Scrambling every outcome from row 300 on leaves all earlier predictions unchanged
+    future = dataset.copy()
+    future.iloc[300:, future.columns.get_loc("target_next_day_up")] = 1.0
+    np.testing.assert_allclose(backtester.walk_forward(future).iloc[:300], probs.iloc[:300])
+
+
+def test_backtest_simulation_matches_row_by_row_reference():
+    rng = np.random.default_rng(1)
+    index = pd.date_range("2022-01-01", periods=60, freq="h")
+    walk = np.exp(np.cumsum(rng.normal(0, 0.01, (60, 2)), axis=0))
+    prices = pd.DataFrame(100 * walk, index=index, columns=["a", "b"])
+    probs = pd.DataFrame(rng.uniform(0.3, 0.7, (60, 2)), index=index, columns=["a", "b"])
+    probs.iloc[:10, 1] = np.nan  # "b" starts trading later
+    config = BacktestConfig(fee_bps=10, slippage_bps=5, sizing=Sizing.SIGNAL, max_position=0.5)
+
+    report = Backtester(config).simulate(probs, prices)
+
+    for asset in ("a", "b"):
+        held, expected = 0.0, []
+        for t in range(60):
+            p = probs[asset].iloc[t]
+            signal = 0.5 if p > 0.55 else -0.5 if p < 0.45 else 0.0
+            target = 0.0 if np.isnan(p) or t == 59 else signal
+            ret = prices[asset].iloc[t + 1] / prices[asset].iloc[t] - 1 if t < 59 else 0.0
+            expected.append(target * ret - abs(target - held) * 15e-4)
+            held = target
+        np.testing.assert_allclose(report.returns[asset], expected, atol=1e-12)
+
+    live = probs.notna() & (prices.shift(-1).notna())
+    expected_portfolio = (report.returns[["a", "b"]] * live).sum(axis=1) / live.sum(axis=1).clip(lower=1)
+    np.testing.assert_allclose(report.returns["portfolio"], expected_portfolio)
+    equity = (1 + report.returns["a"]).cumprod()
+    assert report.metrics["a"]["total_return"] == pytest.approx(equity.iloc[-1] - 1)
+    assert report.metrics["a"]["max_drawdown"] == pytest.approx((equity / equity.cummax() - 1).min())
+    assert report.metrics["b"]["periods"] == 49
+    assert report.metrics["portfolio"]["periods"] == 59
+
+
+def test_cross_asset_features_match_pandas_rolling(long_history):
+    engineer = FeatureEngineer()
+    btc = engineer.compute_features(long_history)
+    rng = np.random.default_rng(11)
+    # Listed later, with a gap and an intraday latest point like CoinGecko's
+    alt_raw = long_history.iloc[200:].drop(long_history.index[400:405]).copy()
+    alt_raw["price"] = alt_raw["price"] * np.exp(rng.normal(0, 0.02, len(alt_raw)))
+    alt_raw.index = alt_raw.index[:-1].append(pd.DatetimeIndex([alt_raw.index[-1] + pd.Timedelta(hours=13)]))
+    alt = engineer.compute_features(alt_raw)
+
+    cross = CrossAssetEngineer(window=30).compute({"btc": btc, "alt": alt})
+
+    result = cross["alt"]
+    assert list(result.columns) == ["corr_btc_30d", "beta_btc_30d", "dispersion", "breadth"]
+    assert result.index.equals(alt.index)
+    # Reference: pandas on returns aligned by day
+    returns = pd.DataFrame({"btc": btc["log_ret"], "alt": alt["log_ret"].set_axis(alt.index.floor("D"))})
+    corr = returns["alt"].rolling(30).corr(returns["btc"])
+    beta = returns["alt"].rolling(30).cov(returns["btc"]) / returns["btc"].rolling(30).var()
+    day = alt.index.floor("D")
+    np.testing.assert_allclose(result["corr_btc_30d"], corr.loc[day], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(result["beta_btc_30d"], beta.loc[day], rtol=1e-9, atol=1e-12)
+    dispersion = returns.std(axis=1, ddof=0).where(returns.count(axis=1) > 1)
+    np.testing.assert_allclose(result["dispersion"], dispersion.loc[day])
+    assert result.iloc[-1].notna().all()
+    np.testing.assert_allclose(cross["btc"]["corr_btc_30d"].dropna(), 1.0)
+    assert result["breadth"].between(0, 1).all()
+
+    stale = join_cross_asset(alt, result.iloc[:-1])
+    assert "corr_btc_30d" not in stale.columns
+    assert join_cross_asset(alt, result)["beta_btc_30d"].equals(result["beta_btc_30d"])
+
+
+def test_cross_asset_intraday_tick_leaves_the_days_row_unchanged(long_history):
+    engineer = FeatureEngineer()
+    rng = np.random.default_rng(5)
+    alt_raw = long_history.copy()
+    alt_raw["price"] = alt_raw["price"] * np.exp(rng.normal(0, 0.02, len(alt_raw)))
+    alt = engineer.compute_features(alt_raw)
+    daily = engineer.compute_features(long_history)
+    # Today's 00:00 row plus a latest point later the same day
+    tick = long_history.iloc[[-1]] * 1.05
+    tick.index = tick.index + pd.Timedelta(hours=13)
+    ticked = engineer.compute_features(pd.concat([long_history, tick]))
+
+    expected = CrossAssetEngineer(window=30).compute({"btc": daily, "alt": alt})
+    cross = CrossAssetEngineer(window=30).compute({"btc": ticked, "alt": alt})
+
+    pd.testing.assert_frame_equal(cross["btc"].iloc[:-1], expected["btc"], check_freq=False)
+    pd.testing.assert_frame_equal(cross["alt"], expected["alt"])
+    assert cross["btc"].index.equals(ticked.index)
@@ -0,0 +1,115 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import requests
+
+from trendlab.domain.models import Asset
+from trendlab.infrastructure.coingecko import CoinGeckoProvider
+from trendlab.infrastructure.http_cache import ReplayMissError, ResponseCache
+
+BTC = Asset("btc", "Bitcoin", "bitcoin")
+PAYLOAD = {
+    "prices": [[1704067200000, 42000.0], [1704153600000, 43000.0]],
+    "market_caps": [[1704067200000, 8.2e11], [1704153600000, 8.4e11]],
+    "total_volumes": [[1704067200000, 2.1e10], [1704153600000, 2.3e10]],
+}
+
+
+@pytest.fixture
+def stand_in_server():
+    """Local CoinGecko stand-in that counts requests and supports ETag revalidation."""
+    hits: list[str] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps(PAYLOAD).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", hits
+    server.shutdown()
+
+
+def make_provider(base_url, cache_dir, mode, ttl=3600):
+    return CoinGeckoProvider(
+        base_url=base_url, cache_dir=cache_dir, cache_mode=mode, cache_ttl_seconds=ttl, requests_per_minute=6000
+    )
+
+
+def test_cache_serves_repeat_requests_without_network(stand_in_server, tmp_path):
+    base_url, hits = stand_in_server
+    provider = make_provider(base_url, tmp_path, "cache")
+
+    first = provider.fetch_history(BTC, 2)
+    second = provider.fetch_history(BTC, 2)
+
+    assert len(hits) == 1
+    assert list(first.price) == list(second.price) == [42000.0, 43000.0]
+
+
+def test_stale_entry_is_revalidated(stand_in_server, tmp_path):
+    base_url, hits = stand_in_server
+    provider = make_provider(base_url, tmp_path, "cache", ttl=0)
+
+    provider.fetch_history(BTC, 2)
+    points = provider.fetch_history(BTC, 2)
+
+    assert len(hits) == 2  # second request was a conditional GET answered with 304
+    assert len(points) == 2
+
+
+def test_record_then_replay_offline(stand_in_server, tmp_path):
+    base_url, hits = stand_in_server
+    make_provider(base_url, tmp_path, "record").fetch_history(BTC, 2)
+
+    replay = make_provider(base_url, tmp_path, "replay")
+    hits.clear()
+
+    assert len(replay.fetch_history(BTC, 2)) == 2
+    assert hits == []
+    with pytest.raises(ReplayMissError):
+        replay.fetch_history(BTC, 30)
+
+
+def test_lru_eviction_respects_size_budget(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=0)
+    cache.cache_dir.joinpath("a.json").write_text("{}")
+    cache.cache_dir.joinpath("a.body").write_bytes(b"x" * 10)
+
+    cache.evict()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_puts_scan_the_cache_only_when_over_budget(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=4000, evict_to=0.5)
+    scans = []
+    original_scan = cache._scan
+    cache._scan = lambda: scans.append(1) or original_scan()
+
+    for i in range(40):
+        response = requests.Response()
+        response.status_code, response.url, response._content = 200, f"https://example.com/{i}", b"x" * 200
+        cache.put(f"k{i:02d}", response)
+        on_disk = sum(p.stat().st_size for p in tmp_path.iterdir())
+        assert on_disk <= 4000 and on_disk == cache._total
+
+    assert len(scans) < 10  # the seeding scan plus one per eviction, not one per put
+    assert cache.get("k39") is not None and cache.get("k00") is None
@@ -0,0 +1,246 @@
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from trendlab.application.pipeline import PipelineService
+from trendlab.domain.models import Asset, MarketDataBatch, MarketDataPoint
+from trendlab.infrastructure.coingecko import CoinGeckoProvider
+from trendlab.infrastructure.rate_limit import TokenBucket, parse_retry_after
+from trendlab.infrastructure.storage import ParquetStorage
+
+BTC = Asset("btc", "Bitcoin", "bitcoin")
+
+
+class FakeProvider:
+    """Serves a deterministic daily series ending today and records requested windows."""
+
+    def __init__(self):
+        self.requested_days: list[int] = []
+        self.today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def fetch_history(self, asset: Asset, days: int) -> MarketDataBatch:
+        self.requested_days.append(days)
+        return MarketDataBatch.from_points([
+            MarketDataPoint(self.today - timedelta(days=i), 100.0 + i, 1e6, 1e3)
+            for i in range(days, -1, -1)
+        ])
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = PipelineService(tmp_path)
+    svc.provider = FakeProvider()
+    return svc
+
+
+def test_incremental_first_run_fetches_full_window(service):
+    service.fetch_data([BTC], days=30, incremental=True)
+
+    assert service.provider.requested_days == [30]
+    assert len(service.storage.load_raw("btc")) == 31
+
+
+def test_incremental_run_fetches_only_missing_days(service):
+    service.fetch_data([BTC], days=30, incremental=True)
+    # Simulate a three day outage by truncating the stored history
+    raw = service.storage.load_raw("btc")
+    service.storage.save_raw("btc", [
+        MarketDataPoint(ts.to_pydatetime(), row.price, row.market_cap, row.total_volume)
+        for ts, row in raw.iloc[:-3].iterrows()
+    ])
+
+    service.fetch_data([BTC], days=30, incremental=True)
+
+    assert service.provider.requested_days[-1] < 30
+    merged = service.storage.load_raw("btc")
+    assert merged.index.is_unique
+    assert merged.index.is_monotonic_increasing
+    assert len(merged) == 31
+
+
+def test_append_raw_replaces_overlap(service):
+    now = datetime(2024, 1, 3, 15, tzinfo=timezone.utc)
+    service.storage.save_raw("btc", [
+        MarketDataPoint(datetime(2024, 1, 2, tzinfo=timezone.utc), 1.0, 1.0, 1.0),
+        MarketDataPoint(now, 2.0, 1.0, 1.0),  # intraday point, superseded below
+    ])
+    service.storage.append_raw("btc", [
+        MarketDataPoint(datetime(2024, 1, 3, tzinfo=timezone.utc), 3.0, 1.0, 1.0),
+        MarketDataPoint(datetime(2024, 1, 4, tzinfo=timezone.utc), 4.0, 1.0, 1.0),
+    ])
+
+    merged = service.storage.load_raw("btc")
+    assert list(merged["price"]) == [1.0, 3.0, 4.0]
+
+
+def test_fetch_isolates_per_asset_failures(service):
+    class FlakyProvider(FakeProvider):
+        def fetch_history(self, asset, days):
+            if asset.symbol == "eth":
+                raise ConnectionError("boom")
+            return super().fetch_history(asset, days)
+
+    service.provider = FlakyProvider()
+    eth = Asset("eth", "Ethereum", "ethereum")
+
+    results = service.fetch_data([eth, BTC], days=10)
+
+    assert [r.asset for r in results] == ["eth", "btc"]
+    assert not results[0].success and "boom" in results[0].error
+    assert results[1].success and results[1].rows == 11
+
+
+def test_token_bucket_paces_requests():
+    bucket = TokenBucket(rate=50.0, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+
+    # First token is free, the remaining five are refilled at 50/s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_rate_limited_request_is_retried_with_cap(monkeypatch):
+    provider = CoinGeckoProvider(max_retries=2, rate_limiter=TokenBucket(rate=1000.0))
+    monkeypatch.setattr("trendlab.infrastructure.coingecko.backoff_delay", lambda attempt, retry_after=None: 0.0)
+
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(url)
+        response = requests.Response()
+        response.status_code = 429
+        response.headers["Retry-After"] = "0"
+        return response
+
+    monkeypatch.setattr(provider.session, "get", fake_get)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        provider.fetch_history(BTC, days=1)
+    assert len(calls) == 3
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+
+
+def test_batch_aligns_series_strictly_by_timestamp():
+    batch = MarketDataBatch.from_series(
+        prices=[[3000, 3.0], [1000, 1.0], [2000, 2.0]],
+        market_caps=[[1000, 10.0], [3000, 30.0]],
+        total_volumes=[[2000, 200.0], [1000, 100.0], [3000, 300.0], [4000, 400.0]],
+    )
+
+    assert list(batch.timestamps) == [1000, 2000, 3000]
+    assert list(batch.price) == [1.0, 2.0, 3.0]
+    np.testing.assert_array_equal(batch.market_cap, [10.0, np.nan, 30.0])
+    assert list(batch.total_volume) == [100.0, 200.0, 300.0]
+
+
+def test_parse_response_round_trips_through_storage(tmp_path):
+    provider = CoinGeckoProvider()
+    batch = provider._parse_response({
+        "prices": [[1704067200000, 42000.0], [1704153600000, 43000.0]],
+        "market_caps": [[1704067200000, 8.2e11], [1704153600000, 8.4e11]],
+        "total_volumes": [[1704067200000, 2.1e10], [1704153600000, 2.3e10]],
+    })
+    storage = PipelineService(tmp_path).storage
+    storage.save_raw("btc", batch)
+
+    df = storage.load_raw("btc")
+    assert str(df.index[0]) == "2024-01-01 00:00:00+00:00"
+    assert list(df["price"]) == [42000.0, 43000.0]
+
+
+def daily_batch(start: datetime, n: int) -> MarketDataBatch:
+    timestamps = int(start.timestamp() * 1000) + np.arange(n, dtype=np.int64) * 86_400_000
+    return MarketDataBatch(timestamps, np.arange(n, dtype=float), np.ones(n), np.full(n, 2.0))
+
+
+def test_storage_partitions_by_month_and_pushes_down_reads(tmp_path):
+    storage = ParquetStorage(tmp_path)
+    storage.save_raw("btc", daily_batch(datetime(2023, 11, 20, tzinfo=timezone.utc), 100))
+    full = storage.load_raw("btc")
+
+    files = sorted(p.relative_to(storage.raw_dir / "asset=btc").as_posix() for p in storage.raw_dir.rglob("*.parquet"))
+    assert files[0].startswith("year=2023/month=11/seg-") and len(files) == 4
+
+    start, end = datetime(2023, 12, 30, tzinfo=timezone.utc), datetime(2024, 1, 2, tzinfo=timezone.utc)
+    window = storage.load_raw("btc", columns=["price"], start=start, end=end)
+    pd.testing.assert_frame_equal(window, full.loc[start:end, ["price"]])
+    pd.testing.assert_frame_equal(storage.load_raw("btc", tail=45), full.iloc[-45:])
+    assert storage.raw_time_range("btc") == (full.index[0].to_pydatetime(), full.index[-1].to_pydatetime())
+
+
+def segment_files(storage: ParquetStorage) -> set:
+    return {(p, p.stat().st_mtime_ns) for p in storage.raw_dir.rglob("*.parquet")}
+
+
+def test_storage_upsert_appends_segments_without_rewriting(tmp_path):
+    storage = ParquetStorage(tmp_path)
+    storage.save_raw("btc", daily_batch(datetime(2024, 1, 1, tzinfo=timezone.utc), 90))
+    before = segment_files(storage)
+
+    # Replaces everything from Feb 10 on, including the stored March rows beyond the new data
+    storage.append_raw("btc", daily_batch(datetime(2024, 2, 10, tzinfo=timezone.utc), 5))
+
+    merged = storage.load_raw("btc")
+    assert len(merged) == 31 + 9 + 5 and merged.index.is_unique and merged.index.is_monotonic_increasing
+    assert storage.load_raw("btc", start=datetime(2024, 3, 1, tzinfo=timezone.utc)).empty
+    assert before < segment_files(storage)  # existing files untouched, one new segment
+
+
+def test_storage_compaction_preserves_reads(tmp_path):
+    storage = ParquetStorage(tmp_path, compact_threshold=4)
+    storage.save_raw("btc", daily_batch(datetime(2024, 1, 1, tzinfo=timezone.utc), 60))
+    storage.append_raw("btc", daily_batch(datetime(2024, 1, 20, tzinfo=timezone.utc), 3))
+    storage.append_raw("btc", daily_batch(datetime(2024, 2, 25, tzinfo=timezone.utc), 10))
+    expected = storage.load_raw("btc")
+    assert len(segment_files(storage)) == 5
+
+    assert storage.compact("btc") == 5
+    assert len(segment_files(storage)) == 3  # one file per month
+    pd.testing.assert_frame_equal(storage.load_raw("btc"), expected)
+
+    # Appends beyond the threshold compact automatically
+    for day in range(1, 6):
+        storage.append_raw("btc", daily_batch(datetime(2024, 3, day, tzinfo=timezone.utc), 1))
+    assert len(segment_files(storage)) == 4  # compacted after the fourth append, then one more
+    assert storage.load_raw("btc", tail=1).index[0] == pd.Timestamp("2024-03-05", tz="UTC")
+
+
+def test_storage_ignores_unpublished_writes(tmp_path):
+    storage = ParquetStorage(tmp_path)
+    storage.save_raw("btc", daily_batch(datetime(2024, 1, 1, tzinfo=timezone.utc), 10))
+    expected = storage.load_raw("btc")
+
+    # A write killed mid-publish: staged files and a partial multi-month group are invisible
+    dataset = storage.raw_dir / "asset=btc"
+    (dataset / "_staging-dead").mkdir()
+    (dataset / "_staging-dead" / "part-0.parquet").write_bytes(b"garbage")
+    cutoff = pd.Timestamp("2024-01-01", tz="UTC").value
+    partial = dataset / "year=2024" / "month=1" / f"seg-{time.time_ns():020d}-0-abcdef-{cutoff}-0of2.parquet"
+    expected.iloc[:2].rename_axis("timestamp").reset_index().to_parquet(partial)
+
+    pd.testing.assert_frame_equal(storage.load_raw("btc"), expected)
+
+
+def test_storage_reads_and_migrates_legacy_single_file(tmp_path):
+    storage = ParquetStorage(tmp_path)
+    storage.save_raw("btc", daily_batch(datetime(2024, 1, 1, tzinfo=timezone.utc), 10))
+    legacy = storage.load_raw("btc")
+    shutil.rmtree(storage.raw_dir / "asset=btc")
+    legacy.to_parquet(storage.raw_dir / "btc.parquet")
+
+    pd.testing.assert_frame_equal(storage.load_raw("btc", tail=3), legacy.iloc[-3:])
+
+    storage.append_raw("btc", daily_batch(datetime(2024, 1, 10, tzinfo=timezone.utc), 3))
+    assert not (storage.raw_dir / "btc.parquet").exists()
+    assert len(storage.load_raw("btc")) == 12
@@ -0,0 +1,519 @@
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from trendlab.analytics.engine import ModelEngine
+from trendlab.analytics.streaming import stream_predictions
+from trendlab.application.executor import TaskExecutor
+from trendlab.application.jobs import JobManager, JobStatus, QueueFullError
+from trendlab.application.pipeline import PipelineService
+from trendlab.application.run_context import RunContext
+from trendlab.application.serving import ServingCache
+from trendlab.domain.models import Asset, AssetResult, MarketDataBatch, ModelArtifact, RunSummary
+from trendlab.infrastructure.model_registry import ModelRegistry
+from trendlab.utils.metrics import (
+    CACHE_REQUESTS,
+    REGISTRY,
+    STAGE_FAILURES,
+    STAGE_ROWS,
+    STAGE_SECONDS,
+    STORAGE_BYTES,
+    TRAIN_SECONDS,
+    MetricsRegistry,
+)
+
+BTC = Asset("btc", "Bitcoin", "bitcoin")
+
+
+def synthetic_batch(n: int, seed: int = 3) -> MarketDataBatch:
+    rng = np.random.default_rng(seed)
+    start_ms = 1609459200000  # 2021-01-01
+    return MarketDataBatch(
+        timestamps=start_ms + np.arange(n, dtype=np.int64) * 86_400_000,
+        price=30000 * np.exp(np.cumsum(rng.normal(0, 0.03, n))),
+        market_cap=rng.uniform(1e11, 2e11, n),
+        total_volume=rng.uniform(1e9, 5e9, n),
+    )
+
+
+def head(batch: MarketDataBatch, n: int) -> MarketDataBatch:
+    return MarketDataBatch(batch.timestamps[:n], batch.price[:n], batch.market_cap[:n], batch.total_volume[:n])
+
+
+@pytest.fixture
+def service(tmp_path):
+    return PipelineService(tmp_path)
+
+
+def test_incremental_feature_build_matches_full_build(service, caplog):
+    batch = synthetic_batch(700)
+    service.storage.save_raw("btc", head(batch, 650))
+    service.build_features([BTC])
+
+    service.storage.save_raw("btc", batch)
+    with caplog.at_level("INFO"):
+        service.build_features([BTC], incremental=True)
+    incremental = service.storage.load_features("btc")
+    assert "Updated 51 feature rows for Bitcoin" in caplog.text
+
+    service.build_features([BTC])
+    full = service.storage.load_features("btc")
+
+    pd.testing.assert_frame_equal(incremental, full, check_exact=False, rtol=1e-9)
+
+
+def test_chunked_feature_build_matches_in_memory_build(service):
+    batch = synthetic_batch(1500)
+    service.storage.save_raw("btc", head(batch, 1400))
+    service.storage.append_raw("btc", batch)  # a second write, so months span several segments
+    service.build_features([BTC])
+    expected = service.storage.load_features("btc")
+    expected_state = service.storage.load_feature_state("btc")
+
+    service.feature_memory_mb = 0.25
+    assert service.engineer.chunk_rows(2**18) < 1500
+    results = service.build_features([BTC])
+
+    assert results[0].success and results[0].rows == 1500
+    pd.testing.assert_frame_equal(service.storage.load_features("btc"), expected, check_exact=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(service.storage.load_feature_state("btc"), expected_state)
+
+
+def square_or_fail(x: int) -> int:
+    if x == 3:
+        raise ValueError("bad item")
+    return x * x
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_executor_keeps_order_and_isolates_failures(backend):
+    executor = TaskExecutor(backend, max_workers=3, max_in_flight=2)
+
+    outcomes = executor.map(square_or_fail, list(range(6)))
+
+    assert [o.value for o in outcomes] == [0, 1, 4, None, 16, 25]
+    assert not outcomes[3].ok and "bad item" in outcomes[3].error
+    assert all(o.ok for i, o in enumerate(outcomes) if i != 3)
+
+
+def test_executor_caps_tasks_in_flight():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def task(_):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+
+    TaskExecutor("thread", max_workers=8, max_in_flight=2).map(task, list(range(10)))
+
+    assert max(peak) <= 2
+
+
+def test_parallel_stages_match_serial(tmp_path):
+    assets = [Asset(s, s.upper(), s) for s in ("aaa", "bbb", "ccc")]
+    serial = PipelineService(tmp_path)
+    for i, asset in enumerate(assets):
+        serial.storage.save_raw(asset.symbol, synthetic_batch(400, seed=i))
+
+    serial.build_features(assets)
+    expected = serial.run_inference(assets)
+
+    parallel = PipelineService(tmp_path, workers=3, backend="process")
+    results = parallel.build_features(assets)
+    predictions = parallel.run_inference(assets)
+
+    assert all(r.success and r.rows == 400 for r in results)
+    assert [p.asset for p in predictions] == ["aaa", "bbb", "ccc"]
+    assert [p.probability_up for p in predictions] == pytest.approx([p.probability_up for p in expected])
+
+
+def test_inference_reuses_stored_model_until_data_changes(service, monkeypatch):
+    batch = synthetic_batch(500)
+    service.storage.save_raw("btc", head(batch, 450))
+    service.build_features([BTC])
+    first = service.run_inference([BTC])
+
+    trained = []
+    original_train = ModelEngine.train_horizons
+    monkeypatch.setattr(
+        ModelEngine, "train_horizons", lambda self, X, y: trained.append(len(X)) or original_train(self, X, y)
+    )
+
+    cached = service.run_inference([BTC])
+    assert trained == []
+    assert cached[0].probability_up == pytest.approx(first[0].probability_up)
+    assert cached[0].supporting_metrics == first[0].supporting_metrics
+
+    service.run_inference([BTC], model_type="boosting")
+    service.storage.save_raw("btc", batch)
+    service.build_features([BTC])
+    service.run_inference([BTC])
+    assert len(trained) == 2
+
+
+def test_model_registry_evicts_by_count_and_age(tmp_path):
+    registry = ModelRegistry(tmp_path, keep_last=2, max_age_days=10)
+    now = datetime.now(timezone.utc)
+
+    def artifact(fingerprint: str, age_days: float) -> ModelArtifact:
+        return ModelArtifact(
+            asset="btc", model_type="logistic", fingerprint=fingerprint, estimator=None,
+            feature_cols=["price"], metrics={}, created_at=now - timedelta(days=age_days)
+        )
+
+    registry.save(artifact("old", 20))
+    registry.save(artifact("a", 3))
+    assert registry.load("btc", "logistic", "old") is None  # expired
+
+    registry.save(artifact("b", 2))
+    registry.save(artifact("c", 1))
+    assert registry.load("btc", "logistic", "a") is None  # over keep_last
+    assert registry.load("btc", "logistic", "b") is not None
+    assert registry.load_latest("btc", "logistic").fingerprint == "c"
+
+
+def test_serving_cache_answers_from_memory_until_new_run_is_published(service, monkeypatch):
+    service.storage.save_raw("btc", synthetic_batch(450))
+    service.build_features([BTC])
+    expected = service.run_inference([BTC])[0]
+
+    cache = ServingCache(service.root_dir, service.storage, service.models, check_interval=0)
+    assert cache.prediction("btc").probability_up == pytest.approx(expected.probability_up)
+    assert cache.insight("btc").trend in ("UP", "DOWN")
+    assert cache.prediction("btc", "boosting") is None
+    assert cache.prediction("eth") is None
+
+    loads = []
+    original_load = service.storage.load_features
+    monkeypatch.setattr(service.storage, "load_features", lambda s, **kw: loads.append(s) or original_load(s, **kw))
+    cache.prediction("btc")
+    cache.insight("btc")
+    assert loads == []
+
+    service.build_features([BTC])  # publishes a new generation
+    cache.prediction("btc")
+    assert loads == ["btc"]
+
+
+def test_predict_endpoint_serves_cached_model(service, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from trendlab.api import main as api
+
+    service.storage.save_raw("btc", synthetic_batch(450))
+    service.build_features([BTC])
+    expected = service.run_inference([BTC])[0]
+    monkeypatch.setattr(api, "serving", ServingCache(service.root_dir, service.storage, service.models))
+    client = TestClient(api.app)
+
+    response = client.get("/predict/BTC")
+    assert response.status_code == 200
+    assert response.json()["probability_up"] == pytest.approx(expected.probability_up)
+    assert client.get("/insights/btc").status_code == 200
+    assert client.get("/predict/eth").status_code == 404
+    assert client.get("/predict/doge").status_code == 404
+
+
+def test_multi_horizon_inference_trains_missing_horizons_only(service, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from trendlab.api import main as api
+
+    service.storage.save_raw("btc", synthetic_batch(800))
+    service.build_features([BTC])
+    daily = service.run_inference([BTC])[0]
+
+    trained = []
+    original_train = ModelEngine.train_horizons
+    monkeypatch.setattr(
+        ModelEngine, "train_horizons", lambda self, X, y: trained.append(list(y.columns)) or original_train(self, X, y)
+    )
+    predictions = service.run_inference([BTC], horizons=[7, 1, 14])
+    assert trained == [[7, 14]]  # the next-day model is reused
+    assert [p.horizon_days for p in predictions] == [1, 7, 14]
+    assert predictions[0].probability_up == pytest.approx(daily.probability_up)
+    assert service.models.horizons("btc", "logistic") == [1, 7, 14]
+
+    monkeypatch.setattr(api, "serving", ServingCache(service.root_dir, service.storage, service.models))
+    client = TestClient(api.app)
+    response = client.get("/predict/btc", params={"horizon": 7})
+    assert response.json()["probability_up"] == pytest.approx(predictions[1].probability_up)
+    assert [p["horizon_days"] for p in client.get("/predictions/btc").json()] == [1, 7, 14]
+    assert client.get("/predict/btc", params={"horizon": 30}).status_code == 404
+
+
+def test_failing_horizon_keeps_the_other_horizons(service, monkeypatch):
+    service.storage.save_raw("btc", synthetic_batch(800))
+    service.build_features([BTC])
+
+    original_train = ModelEngine.train_horizons
+
+    def train_horizons(self, X, y):
+        if 7 in y.columns:
+            raise ValueError("weekly model failed")
+        return original_train(self, X, y)
+
+    monkeypatch.setattr(ModelEngine, "train_horizons", train_horizons)
+    REGISTRY.reset()
+    predictions = service.run_inference([BTC], horizons=[1, 7, 14])
+
+    assert [p.horizon_days for p in predictions] == [1, 14]
+    assert STAGE_FAILURES.value(stage="inference", asset="btc") == 1
+    assert service.models.horizons("btc", "logistic") == [1, 14]
+
+
+def test_job_manager_coalesces_identical_jobs_and_bounds_queue():
+    release = threading.Event()
+    runs = []
+
+    def slow_run():
+        runs.append(1)
+        release.wait(5)
+        return RunSummary(timings={"fetch": 0.1})
+
+    manager = JobManager(max_workers=1, max_pending=2)
+    first, created = manager.submit("a", slow_run)
+    duplicate, duplicate_created = manager.submit("a", slow_run)
+    second, _ = manager.submit("b", slow_run)
+    assert created and not duplicate_created and duplicate.id == first.id
+    with pytest.raises(QueueFullError):
+        manager.submit("c", slow_run)
+
+    release.set()
+    manager.shutdown()
+    assert len(runs) == 2
+    assert manager.get(first.id).status == JobStatus.SUCCEEDED
+    assert manager.get(second.id).summary.timings == {"fetch": 0.1}
+    assert manager.get(second.id).queue_s > 0
+
+    # Finished jobs free their key, so the same request runs again
+    rerun = JobManager(max_workers=1)
+    failed, _ = rerun.submit("a", lambda: 1 / 0)
+    rerun.shutdown()
+    assert rerun.get(failed.id).status == JobStatus.FAILED and "ZeroDivisionError" in rerun.get(failed.id).error
+
+
+def test_run_endpoint_queues_deduplicates_and_reports_jobs(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from trendlab.api import main as api
+
+    release = threading.Event()
+
+    def fake_run(req):
+        release.wait(5)
+        return RunSummary(results=[AssetResult(a, "fetch", True, rows=10) for a in req.assets])
+
+    monkeypatch.setattr(api, "run_pipeline_task", fake_run)
+    monkeypatch.setattr(api, "jobs", JobManager(max_workers=1, max_pending=1))
+    client = TestClient(api.app)
+
+    first = client.post("/run", json={"assets": ["btc"]})
+    again = client.post("/run", json={"assets": ["BTC"]})
+    other = client.post("/run", json={"assets": ["eth"]})
+    assert first.status_code == 202 and again.json()["job_id"] == first.json()["job_id"]
+    assert again.json()["deduplicated"]
+    assert other.status_code == 429
+    assert client.post("/run", json={"assets": ["doge"]}).status_code == 400
+
+    release.set()
+    api.jobs.shutdown()
+    status = client.get(f"/jobs/{first.json()['job_id']}").json()
+    assert status["status"] == "succeeded"
+    assert status["summary"]["results"][0]["rows"] == 10
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_arrow_feature_cache_serves_zero_copy_frames(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRENDLAB_FEATURE_CACHE", "on")
+    service = PipelineService(tmp_path)
+    service.storage.save_raw("btc", synthetic_batch(450))
+    service.build_features([BTC])
+    expected = service.storage._load_features("btc")
+
+    cached = service.storage.load_features("btc")
+    pd.testing.assert_frame_equal(cached, expected)
+    # Columns are read-only views of the memory-mapped file, not decoded copies
+    assert not cached["price"].to_numpy().flags.writeable
+    pd.testing.assert_frame_equal(
+        service.storage.load_features("btc", columns=["rsi_14"], tail=3), expected[["rsi_14"]].iloc[-3:]
+    )
+
+    cache_dir = tmp_path / "data" / "cache" / "features"
+    before = {p.name for p in cache_dir.glob("*.arrow")}
+    service.build_features([BTC])  # publishes a new generation
+    service.storage.load_features("btc")
+    after = {p.name for p in cache_dir.glob("*.arrow")}
+    assert len(after) == 1 and after != before
+
+
+class StubProvider:
+    def fetch_history(self, asset, days):
+        return synthetic_batch(450, seed=len(asset.symbol))
+
+
+def test_full_run_hands_frames_over_in_memory_and_persists_them(tmp_path, monkeypatch):
+    service = PipelineService(tmp_path)
+    service.provider = StubProvider()
+    reads = []
+    for method in ("load_raw", "load_features"):
+        original = getattr(service.storage, method)
+        monkeypatch.setattr(
+            service.storage, method, lambda *a, _m=method, _f=original, **kw: reads.append(_m) or _f(*a, **kw)
+        )
+
+    summary = service.run_full_pipeline([BTC], days=450)
+
+    assert reads == []
+    assert set(summary.timings) == {"fetch", "features", "inference", "insights", "persist"}
+    assert service._context is None
+    # Everything was persisted, and a standalone stage reading from storage agrees
+    assert len(service.storage.load_raw("btc")) == 450
+    assert service.run_inference([BTC])[0].probability_up == pytest.approx(summary.predictions[0].probability_up)
+    assert service.generate_insights([BTC])[0].summary == summary.insights[0].summary
+
+
+def test_cross_asset_features_feed_inference(service, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from trendlab.api import main as api
+
+    eth = Asset("eth", "Ethereum", "ethereum")
+    service.storage.save_raw("btc", synthetic_batch(500))
+    service.storage.save_raw("eth", synthetic_batch(500, seed=4))
+    service.build_features([BTC, eth])
+
+    results = service.build_cross_asset_features([eth])  # the benchmark is read from storage
+
+    assert results[0].success and results[0].rows == 500
+    assert service.run_inference([eth])[0] is not None
+    artifact = service.models.load_latest("eth", "logistic")
+    assert "beta_btc_30d" in artifact.feature_cols
+
+    # Cross-asset columns cannot be computed tick by tick: streaming refuses the model up front
+    with pytest.raises(ValueError, match="corr_btc_30d"):
+        stream_predictions(iter(()), ModelEngine.from_artifact(artifact))
+
+    # Features moved on without a new cross-asset pass: the stale columns are left out
+    service.storage.save_raw("eth", synthetic_batch(510, seed=4))
+    service.build_features([eth])
+    # The API has no prediction to serve until a model without them is trained
+    monkeypatch.setattr(api, "serving", ServingCache(service.root_dir, service.storage, service.models))
+    client = TestClient(api.app)
+    assert client.get("/predict/eth").status_code == 404
+    assert client.get("/predictions/eth").status_code == 404
+
+    service.run_inference([eth])
+    assert "beta_btc_30d" not in service.models.load_latest("eth", "logistic").feature_cols
+    api.serving.invalidate()
+    assert client.get("/predict/eth").status_code == 200
+
+
+def test_cross_asset_features_without_benchmark_keep_dispersion_and_breadth(service, caplog):
+    assets = [Asset("eth", "Ethereum", "ethereum"), Asset("sol", "Solana", "solana")]
+    for i, asset in enumerate(assets):
+        service.storage.save_raw(asset.symbol, synthetic_batch(400, seed=i))
+    service.build_features(assets)
+
+    with caplog.at_level("WARNING"):
+        results = service.build_cross_asset_features(assets)
+
+    assert all(r.success and r.rows == 400 for r in results)
+    assert [r.message for r in caplog.records] == ["No features for benchmark btc, skipping correlation and beta"]
+    cross = service.storage.load_cross_asset("eth")
+    assert list(cross.columns) == ["dispersion", "breadth"]
+    assert cross["dispersion"].notna().any() and cross["breadth"].notna().any()
+
+
+def test_run_context_bounds_memory_and_reports_failed_writes():
+    context = RunContext(max_bytes_per_asset=10_000)
+    small = pd.DataFrame({"price": np.arange(10.0)})
+    context.put("raw", "btc", small)
+    context.put("features", "btc", small)
+    assert context.get("raw", "btc") is None  # replaced by the next stage's frame
+    assert context.get("features", "btc") is small
+
+    context.put("features", "eth", pd.DataFrame({"price": np.arange(10_000.0)}))
+    assert context.get("features", "eth") is None
+
+    def failing_write():
+        raise OSError("disk full")
+
+    context.persist("btc", failing_write)
+    context.wait("btc")
+    with pytest.raises(RuntimeError, match="disk full"):
+        context.flush()
+    context.close()
+
+
+def test_metrics_registry_renders_prometheus_text_and_merges_worker_state():
+    registry = MetricsRegistry()
+    latency = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+    calls = registry.counter("op_total", "Ops", ("op",))
+    latency.observe(0.05, op="read")
+    latency.observe(0.5, op="read")
+    calls.inc(op='say "hi"')
+
+    worker = MetricsRegistry()
+    worker.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0)).observe(5.0, op="read")
+    registry.merge(worker.state())
+
+    text = registry.render()
+    assert '# TYPE op_seconds histogram' in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="read"} 3' in text
+    assert 'op_total{op="say \\"hi\\""} 1' in text
+    with pytest.raises(ValueError):
+        calls.inc(stage="read")
+
+
+def test_metrics_include_process_workers_and_are_served(tmp_path):
+    from fastapi.testclient import TestClient
+
+    from trendlab.api import main as api
+
+    REGISTRY.reset()
+    assets = [BTC, Asset("eth", "Ethereum", "ethereum")]
+    service = PipelineService(tmp_path, workers=2, backend="process")
+    for i, asset in enumerate(assets):
+        service.storage.save_raw(asset.symbol, synthetic_batch(400, seed=i))
+    service.build_features(assets)
+    service.run_inference(assets)
+
+    assert STAGE_SECONDS.count(stage="features", asset="btc") == 1
+    assert STAGE_ROWS.value(stage="features", asset="btc") == 400
+    # Recorded inside the worker processes and merged back into this one
+    assert TRAIN_SECONDS.count(model_type="logistic") == 2
+    assert CACHE_REQUESTS.value(cache="models", result="miss") == 2
+    assert STORAGE_BYTES.value(op="write", kind="features", asset="btc") > 0
+
+    response = TestClient(api.app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'trendlab_stage_duration_seconds_count{stage="features",asset="btc"} 1' in response.text
+
+
+@pytest.mark.parametrize("module", ["trendlab.cli.main", "trendlab.api.main"])
+def test_entry_points_defer_the_data_stack(module, tmp_path):
+    code = (
+        f"import sys, {module}; "
+        "print(sorted(m for m in ('pandas', 'pyarrow', 'sklearn', 'joblib', 'requests') if m in sys.modules))"
+    )
+    env = {"PYTHONPATH": str(Path(__file__).resolve().parents[1]), "PATH": ""}
+    out = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,189 @@
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+from trendlab.analytics.engine import ModelEngine
+from trendlab.analytics.features import TARGET
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO = "portfolio"
+
+
+class Sizing(str, Enum):
+    SIGNAL = "signal"              # +1 above the long threshold, -1 below the short threshold, flat between
+    LONG_ONLY = "long_only"        # +1 above the long threshold, flat otherwise
+    PROPORTIONAL = "proportional"  # 2p - 1: conviction-scaled, long and short
+
+
+@dataclass
+class BacktestConfig:
+    """
+    Walk-forward and trading parameters. Windows are in rows (days for daily data,
+    hours for hourly data).
+    """
+    min_train: int = 250           # rows before the first out-of-sample prediction
+    retrain_every: int = 90        # rows between refits; each refit scores the next block in one batch
+    train_window: int | None = None  # rolling training window; None = expanding
+    fee_bps: float = 10.0          # per unit of turnover
+    slippage_bps: float = 5.0      # per unit of turnover
+    sizing: Sizing = Sizing.SIGNAL
+    max_position: float = 1.0      # position at full conviction (1 = fully invested)
+    # Same cut-offs as the BULLISH / BEARISH signals of live predictions
+    long_threshold: float = 0.55
+    short_threshold: float = 0.45
+
+
+@dataclass
+class BacktestReport:
+    """Per-period net returns and summary metrics per asset, plus an equal-weight portfolio."""
+    metrics: dict[str, dict[str, float]] = field(default_factory=dict)  # asset or "portfolio" -> metrics
+    returns: pd.DataFrame = field(default_factory=pd.DataFrame)         # one column per asset and "portfolio"
+    positions: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+class Backtester:
+    """
+    Walk-forward evaluation of the model's signals.
+
+    - `walk_forward` refits on a schedule and scores each following block with one
+      `predict_proba` call, so every probability is out of sample.
+    - `simulate` turns probabilities into positions and net returns for all assets at once,
+      as (time x asset) NumPy arrays: no per-row Python loop.
+    """
+
+    def __init__(self, config: BacktestConfig | None = None, model_type: str = "logistic", random_state: int = 42):
+        self.config = config or BacktestConfig()
+        self.model_type = model_type
+        self.random_state = random_state
+
+    def walk_forward(self, dataset: pd.DataFrame) -> pd.Series:
+        """
+        Out-of-sample P(up) per row of `dataset` (features plus target, as from `create_dataset`).
+        Rows before `min_train`, and blocks whose training window holds a single class, are NaN.
+        """
+        from sklearn.base import clone
+
+        cfg = self.config
+        X = dataset.drop(columns=[TARGET]).to_numpy(dtype=float)
+        y = dataset[TARGET].to_numpy()
+        probs = np.full(len(dataset), np.nan)
+        template = ModelEngine(self.model_type, random_state=self.random_state).pipeline
+
+        # Row t's target is the move from t to t+1, known at t+1: a model fitted on rows < start
+        # has only seen outcomes up to `start`, where it starts predicting
+        for start in range(cfg.min_train, len(dataset), cfg.retrain_every):
+            lo = 0 if cfg.train_window is None else max(0, start - cfg.train_window)
+            y_train = y[lo:start]
+            if len(np.unique(y_train)) < 2:
+                continue
+            model = clone(template).fit(X[lo:start], y_train)
+            end = min(start + cfg.retrain_every, len(dataset))
+            up = list(model.classes_).index(1.0)
+            probs[start:end] = model.predict_proba(X[start:end])[:, up]
+
+        return pd.Series(probs, index=dataset.index, name="probability_up")
+
+    def positions(self, probs: np.ndarray) -> np.ndarray:
+        cfg = self.config
+        if cfg.sizing == Sizing.PROPORTIONAL:
+            raw = np.clip(2 * probs - 1, -1.0, 1.0)
+        else:
+            raw = np.where(probs > cfg.long_threshold, 1.0, 0.0)
+            if cfg.sizing == Sizing.SIGNAL:
+                raw = np.where(probs < cfg.short_threshold, -1.0, raw)
+        return np.where(np.isnan(probs), 0.0, raw * cfg.max_position)
+
+    def simulate(self, probabilities: pd.DataFrame, prices: pd.DataFrame) -> BacktestReport:
+        """
+        Trades every column of `probabilities` against the matching column of `prices`
+        (the full price history; rows without a probability are simply not traded).
+
+        The position taken at the close of row t earns the return from t to t+1. Fees and
+        slippage are charged on turnover |position_t - position_t-1|. The portfolio splits
+        capital equally across the assets that have a signal at t.
+        """
+        # Forward returns come from the full history, so gaps in the probabilities never stretch a period
+        forward_returns = prices.shift(-1) / prices - 1
+        probabilities, forward_returns = probabilities.align(forward_returns, join="left")
+        probs = probabilities.to_numpy(dtype=float)
+        forward = forward_returns.to_numpy(dtype=float)
+        live = ~np.isnan(probs) & ~np.isnan(forward)
+
+        position = np.where(live, self.positions(probs), 0.0)
+        previous = np.vstack([np.zeros((1, position.shape[1])), position[:-1]])
+        turnover = np.abs(position - previous)
+        cost_rate = (self.config.fee_bps + self.config.slippage_bps) / 1e4
+        net = position * np.where(live, forward, 0.0) - turnover * cost_rate
+
+        active = live.sum(axis=1)
+        portfolio = (net * live).sum(axis=1) / np.maximum(active, 1)
+        portfolio_position = np.abs(position).sum(axis=1) / np.maximum(active, 1)
+        portfolio_turnover = turnover.sum(axis=1) / np.maximum(active, 1)
+
+        periods_per_year = _periods_per_year(probabilities.index)
+        columns = [str(c) for c in probabilities.columns]
+        metrics = _metrics(net, position, turnover, live, periods_per_year)
+        portfolio_metrics = _metrics(
+            portfolio[:, None], portfolio_position[:, None], portfolio_turnover[:, None],
+            (active > 0)[:, None], periods_per_year
+        )
+
+        index = probabilities.index
+        return BacktestReport(
+            metrics={**dict(zip(columns, metrics, strict=True)), PORTFOLIO: portfolio_metrics[0]},
+            returns=pd.DataFrame(np.column_stack([net, portfolio]), index=index, columns=[*columns, PORTFOLIO]),
+            positions=pd.DataFrame(position, index=index, columns=columns),
+        )
+
+    def run(self, features: dict[str, pd.DataFrame]) -> BacktestReport:
+        """Walk-forward probabilities for each asset's feature frame, then one simulation over all of them."""
+        probabilities = pd.DataFrame({asset: self.walk_forward(df.dropna()) for asset, df in features.items()})
+        prices = pd.DataFrame({asset: df["price"] for asset, df in features.items()})
+        return self.simulate(probabilities, prices)
+
+
+def _periods_per_year(index: pd.Index) -> float:
+    """Crypto trades around the clock, so a year is 365 days of the index's typical spacing."""
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return 365.0
+    step = pd.Series(index).diff().median()
+    return pd.Timedelta(days=365) / step if step > pd.Timedelta(0) else 365.0
+
+
+def _metrics(
+    net: np.ndarray, position: np.ndarray, turnover: np.ndarray, live: np.ndarray, periods_per_year: float
+) -> list[dict[str, float]]:
+    """Column-wise metrics over each column's live rows."""
+    periods = live.sum(axis=0)
+    n = np.maximum(periods, 1)
+    mean = (net * live).sum(axis=0) / n
+    var = (((net - mean) ** 2) * live).sum(axis=0) / np.maximum(periods - 1, 1)
+    std = np.sqrt(var)
+
+    equity = np.cumprod(1 + net, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+    total = equity[-1] - 1 if len(equity) else np.zeros(net.shape[1])
+    years = periods / periods_per_year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+        annual = np.where(years > 0, np.power(np.maximum(1 + total, 0), 1 / np.where(years > 0, years, 1)) - 1, 0.0)
+    invested = (np.abs(position) > 0) & live
+    wins = invested & (net > 0)
+
+    return [
+        {
+            "total_return": float(total[j]),
+            "annual_return": float(annual[j]),
+            "sharpe": float(sharpe[j]),
+            "max_drawdown": float(drawdown[:, j].min()) if len(drawdown) else 0.0,
+            "turnover": float(turnover[:, j].sum() / years[j]) if years[j] > 0 else 0.0,  # per year
+            "exposure": float(invested[:, j].sum() / n[j]),
+            "hit_rate": float(wins[:, j].sum() / max(invested[:, j].sum(), 1)),
+            "periods": float(periods[j]),
+        }
+        for j in range(net.shape[1])
+    ]
@@ -0,0 +1,152 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Stored feature columns the cross-asset stage reads
+INPUT_COLUMNS = ["price", "log_ret", "sma_50"]
+
+
+class CrossAssetEngineer:
+    """
+    Features that relate each asset to the rest of the universe:
+
+    - rolling correlation and beta of log returns against a benchmark (BTC by default),
+    - dispersion: cross-sectional standard deviation of the assets' log returns,
+    - breadth: share of assets trading above their 50-period SMA.
+
+    All assets are laid out as one (time x asset) matrix and every rolling moment comes from
+    the difference of two cumulative sums, so the cost is O(T x N) for N assets, without
+    per-pair pandas `rolling().corr()` calls.
+    """
+
+    def __init__(self, benchmark: str = "btc", window: int = 30):
+        self.benchmark = benchmark
+        self.window = window
+
+    @property
+    def columns(self) -> list[str]:
+        suffix = f"{self.benchmark}_{self.window}d"
+        return [f"corr_{suffix}", f"beta_{suffix}", "dispersion", "breadth"]
+
+    def compute(self, frames: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+        """
+        Cross-asset features per asset, on that asset's own timestamps.
+
+        Args:
+            frames: Stored features per asset (at least INPUT_COLUMNS). Without the benchmark,
+                only dispersion and breadth are computed.
+
+        Rows are matched across assets on a grid of the benchmark's typical spacing (the longest
+        asset's without it), so an intraday latest point still lines up with the other assets'.
+        Rows of one asset that fall in the same grid step (e.g. today's 00:00 row and an
+        intraday latest point) take consecutive slots, so each keeps its own values.
+        """
+        frames = {
+            asset: df if df.index.is_monotonic_increasing else df.sort_index()
+            for asset, df in frames.items() if not df.empty
+        }
+        if not frames:
+            return {}
+        assets = list(frames)
+        has_benchmark = self.benchmark in frames
+        reference = self.benchmark if has_benchmark else max(assets, key=lambda a: len(frames[a]))
+        step = _spacing(frames[reference].index)
+        keys = {asset: _slots(df.index.floor(step).asi8) for asset, df in frames.items()}
+        grid = np.unique(np.concatenate(list(keys.values())))
+        rows = {asset: np.searchsorted(grid, keys[asset]) for asset in assets}
+
+        returns, above, ranked = (np.full((len(grid), len(assets)), np.nan) for _ in range(3))
+        for j, asset in enumerate(assets):
+            df = frames[asset]
+            returns[rows[asset], j] = df["log_ret"].to_numpy(dtype=float)
+            sma = df["sma_50"].to_numpy(dtype=float)
+            above[rows[asset], j] = df["price"].to_numpy(dtype=float) > sma
+            ranked[rows[asset], j] = ~np.isnan(sma)
+
+        if has_benchmark:
+            corr, beta = self._against_benchmark(returns, returns[:, assets.index(self.benchmark)])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            counts = (~np.isnan(returns)).sum(axis=1)
+            spread = np.nanstd(np.where(counts[:, None] >= 2, returns, 0.0), axis=1)
+            dispersion = np.where(counts >= 2, spread, np.nan)
+            ranked_count = np.nansum(ranked, axis=1)
+            breadth = np.where(ranked_count > 0, np.nansum(above * ranked, axis=1) / ranked_count, np.nan)
+
+        corr_col, beta_col, dispersion_col, breadth_col = self.columns
+        results = {}
+        for j, asset in enumerate(assets):
+            at = rows[asset]
+            columns = {dispersion_col: dispersion[at], breadth_col: breadth[at]}
+            if has_benchmark:
+                columns = {corr_col: corr[at, j], beta_col: beta[at, j]} | columns
+            results[asset] = pd.DataFrame(columns, index=frames[asset].index)
+        return results
+
+    def _against_benchmark(self, returns: np.ndarray, benchmark: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Rolling correlation and beta of every column against `benchmark`, over rows where both
+        are defined. Like pandas `rolling(window).corr()`, a value needs a full window of pairs.
+        """
+        pairs = ~np.isnan(returns) & ~np.isnan(benchmark)[:, None]
+        x = np.where(pairs, returns, 0.0)
+        y = np.where(pairs, benchmark[:, None], 0.0)
+
+        n = _rolling_sum(pairs.astype(float), self.window)
+        sx, sy = _rolling_sum(x, self.window), _rolling_sum(y, self.window)
+        sxx, syy = _rolling_sum(x * x, self.window), _rolling_sum(y * y, self.window)
+        sxy = _rolling_sum(x * y, self.window)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = (sxy - sx * sy / n) / (n - 1)
+            var_x = np.maximum((sxx - sx * sx / n) / (n - 1), 0.0)
+            var_y = np.maximum((syy - sy * sy / n) / (n - 1), 0.0)
+            full = n == self.window
+            corr = np.where(full & (var_x > 0) & (var_y > 0), cov / np.sqrt(var_x * var_y), np.nan)
+            beta = np.where(full & (var_y > 0), cov / var_y, np.nan)
+        return np.clip(corr, -1.0, 1.0), beta
+
+
+def join_cross_asset(features: pd.DataFrame, cross: pd.DataFrame | None) -> pd.DataFrame:
+    """
+    Adds stored cross-asset columns to an asset's features. They are left out when they do
+    not reach the latest feature row (e.g. the stage last ran before newer data), since a
+    model would then be trained on columns it cannot predict from.
+    """
+    if cross is None or cross.empty or features.empty or cross.index[-1] != features.index[-1]:
+        return features
+    return features.join(cross[[c for c in cross.columns if c not in features.columns]], how="left")
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing `window`-row sums per column from one cumulative sum; NaN until the window is full."""
+    total = np.cumsum(values, axis=0)
+    out = np.full(values.shape, np.nan)
+    out[window - 1:] = total[window - 1:]
+    out[window:] -= total[:-window]
+    return out
+
+
+def _slots(floored: np.ndarray) -> np.ndarray:
+    """
+    Grid keys for one asset's sorted, floored timestamps: the k-th row within a grid step is
+    keyed step + k ns. Rows of a step have distinct timestamps, so k stays below the step
+    (at least a second) and slots never reach the next step.
+    """
+    position = np.arange(len(floored))
+    starts = np.r_[True, floored[1:] != floored[:-1]]
+    first = np.maximum.accumulate(np.where(starts, position, 0))
+    return floored + (position - first)
+
+
+def _spacing(index: pd.DatetimeIndex) -> pd.Timedelta:
+    """Typical row spacing, rounded down to a whole unit so it can be used as a flooring grid."""
+    if len(index) < 2:
+        return pd.Timedelta(days=1)
+    step = pd.Series(index).diff().median()
+    for unit in (pd.Timedelta(days=1), pd.Timedelta(hours=1), pd.Timedelta(minutes=1)):
+        if step >= unit:
+            return unit
+    return pd.Timedelta(seconds=1)
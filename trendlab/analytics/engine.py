@@ -1,31 +1,162 @@
+import hashlib
 import logging
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, log_loss, precision_score, roc_auc_score
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
 
+from trendlab.analytics.compiled import CompiledModel, compile_pipeline
+from trendlab.domain.models import ModelArtifact
 from trendlab.domain.ports import MLModel
+from trendlab.utils.metrics import TRAIN_ROWS, TRAIN_SECONDS
+
+# scikit-learn and joblib are imported where models are built, trained or scored:
+# together they cost seconds of startup that commands without a model should not pay
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
 
 logger = logging.getLogger(__name__)
 
+
+def _fit_and_score_fold(
+    pipeline: "Pipeline",
+    X_train: pd.DataFrame,
+    X_test: pd.DataFrame,
+    train_targets: dict[int, np.ndarray],
+    test_targets: dict[int, np.ndarray]
+) -> dict[int, dict[str, float]]:
+    """
+    Scores one fold for every horizon: the scaler is fitted once on the fold, then a fresh
+    classifier per horizon. Module level so joblib can ship it to worker processes.
+    """
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    scaler = clone(pipeline.named_steps["scaler"]).fit(X_train)
+    train_scaled, test_scaled = scaler.transform(X_train), scaler.transform(X_test)
+    scale_s = time.perf_counter() - start
+
+    folds = {}
+    for horizon, y_train in train_targets.items():
+        # The last horizon - 1 training targets end inside the test window: purged
+        fit_rows = ~np.isnan(y_train)
+        fit_rows[max(0, len(y_train) - (horizon - 1)):] = False
+        y_test = test_targets[horizon]
+        score_rows = ~np.isnan(y_test)
+        # Long horizons on short histories can purge a fold down to one class, or leave it
+        # no known outcome to score: the fold is left out of that horizon's metrics
+        if len(np.unique(y_train[fit_rows])) < 2 or not score_rows.any():
+            folds[horizon] = {"fit_s": 0.0, "score_s": 0.0}
+            continue
+        start = time.perf_counter()
+        classifier = clone(pipeline.named_steps["classifier"]).fit(train_scaled[fit_rows], y_train[fit_rows])
+        fit_s = scale_s + time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = classifier.predict(test_scaled[score_rows])
+        y_prob = classifier.predict_proba(test_scaled[score_rows])[:, 1]
+        scores = _scores(y_test[score_rows], y_pred, y_prob)
+        scores["fit_s"] = fit_s
+        scores["score_s"] = time.perf_counter() - start
+        folds[horizon] = scores
+    return folds
+
+
+def _scores(y_test: np.ndarray, y_pred: np.ndarray, y_prob: np.ndarray) -> dict[str, float]:
+    from sklearn.metrics import accuracy_score, log_loss, precision_score, roc_auc_score
+
+    scores = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "log_loss": log_loss(y_test, y_prob, labels=[0.0, 1.0]),
+    }
+    # ROC AUC requires both classes in test set
+    if len(np.unique(y_test)) > 1:
+        scores["auc"] = roc_auc_score(y_test, y_prob)
+    return scores
+
+
 class ModelEngine(MLModel):
     
-    def __init__(self, model_type: str = "logistic", random_state: int = 42):
+    def __init__(self, model_type: str = "logistic", random_state: int = 42, n_jobs: int = -1, horizon: int = 1):
+        """
+        Args:
+            n_jobs: Parallel CV folds (joblib semantics, -1 = all cores). Use 1 when the
+                caller already runs several engines in parallel.
+            horizon: Rows ahead the model predicts the direction of.
+        """
         self.model_type = model_type
         self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.horizon = horizon
         self.pipeline = self._build_pipeline()
         self.feature_cols: list[str] = []
 
-    def _build_pipeline(self) -> Pipeline:
+    @classmethod
+    def from_artifact(cls, artifact: ModelArtifact) -> "ModelEngine":
+        """Rebuilds a fitted engine from a stored artifact, skipping training."""
+        engine = cls(model_type=artifact.model_type, horizon=artifact.horizon)
+        engine.pipeline = artifact.estimator
+        engine.feature_cols = list(artifact.feature_cols)
+        return engine
+
+    def to_artifact(self, asset: str, fingerprint: str, metrics: dict[str, float], rows: int) -> ModelArtifact:
+        return ModelArtifact(
+            asset=asset,
+            model_type=self.model_type,
+            fingerprint=fingerprint,
+            estimator=self.pipeline,
+            feature_cols=self.feature_cols,
+            metrics=metrics,
+            created_at=datetime.now(timezone.utc),
+            trained_rows=rows,
+            horizon=self.horizon
+        )
+
+    def compile(self) -> CompiledModel:
+        """
+        Exports the fitted pipeline as plain NumPy arrays (scaler statistics plus logistic
+        coefficients or flattened trees) for microsecond single-row scoring.
+        """
+        return compile_pipeline(self.pipeline, self.feature_cols, self.model_type, self.horizon)
+
+    def fingerprint(self, X: pd.DataFrame, y: pd.Series) -> str:
+        """
+        Identifies a training run: same data, columns and model configuration give the same hash.
+        The sklearn version is included so artifacts pickled by another version are not reused.
+        """
+        import sklearn
+
+        h = hashlib.sha256()
+        h.update(f"{self.model_type}|{self.random_state}|{sklearn.__version__}|{','.join(X.columns)}".encode())
+        h.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+        h.update(pd.util.hash_pandas_object(y, index=False).to_numpy().tobytes())
+        return h.hexdigest()[:24]
+
+    def _build_pipeline(self) -> "Pipeline":
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        clf: object
         if self.model_type == "logistic":
+            from sklearn.linear_model import LogisticRegression
             clf = LogisticRegression(class_weight='balanced', random_state=self.random_state)
         elif self.model_type == "boosting":
+            from sklearn.ensemble import GradientBoostingClassifier
             clf = GradientBoostingClassifier(n_estimators=100, max_depth=3, random_state=self.random_state)
+        elif self.model_type == "hist_boosting":
+            from sklearn.ensemble import HistGradientBoostingClassifier
+            # Binned histogram splits scale to long (e.g. hourly) histories far better than exact boosting
+            clf = HistGradientBoostingClassifier(
+                max_iter=300,
+                learning_rate=0.05,
+                early_stopping=True,
+                validation_fraction=0.1,
+                n_iter_no_change=20,
+                random_state=self.random_state
+            )
         else:
             raise ValueError(f"Unknown model type: {self.model_type}")
 
@@ -37,44 +168,83 @@ class ModelEngine(MLModel):
     def train(self, X: pd.DataFrame, y: pd.Series) -> dict[str, float]:
         """
         Trains the model using TimeSeriesSplit cross-validation to ensure rigor.
-        Returns aggregated metrics.
+        Folds are fitted in parallel on clones of the pipeline.
+        Returns aggregated metrics plus per-fold fit/score timings (`fold_<i>_fit_s`, `fold_<i>_score_s`).
+        """
+        results = self.train_horizons(X, pd.DataFrame({self.horizon: y}))
+        if self.horizon not in results:
+            raise ValueError(f"Cannot train on a single class: {np.unique(y.dropna()).tolist()}")
+        engine, metrics = results[self.horizon]
+        self.pipeline, self.feature_cols = engine.pipeline, engine.feature_cols
+        return metrics
+
+    def train_horizons(
+        self, X: pd.DataFrame, targets: pd.DataFrame
+    ) -> dict[int, tuple["ModelEngine", dict[str, float]]]:
         """
-        self.feature_cols = list(X.columns)
+        Trains one model per horizon on a shared feature matrix.
+
+        `targets` has one column per horizon (keyed by the horizon in rows), NaN where the
+        outcome is unknown. Fold indices and the scaler fits (per fold and final) are shared,
+        so each extra horizon only adds its classifier fits. Returns a fitted engine and its
+        CV metrics per horizon, like `train`. Folds whose purged training rows hold a single
+        class are left out of a horizon's metrics; a horizon whose known targets all share one
+        class is left out of the result.
+        """
+        from joblib import Parallel, delayed
+        from sklearn.base import clone
+        from sklearn.model_selection import TimeSeriesSplit
+        from sklearn.pipeline import Pipeline
+
+        horizons = [int(h) for h in targets.columns]
+        y = {h: targets[h].to_numpy(dtype=float) for h in horizons}
         tscv = TimeSeriesSplit(n_splits=5)
-        
-        metrics: dict[str, list[float]] = {
-            "accuracy": [],
-            "precision": [],
-            "auc": [],
-            "log_loss": []
-        }
-        
-        logger.info(f"Starting training with {self.model_type}...")
-        
-        for _, (train_index, test_index) in enumerate(tscv.split(X)):
-            X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-            y_train, y_test = y.iloc[train_index], y.iloc[test_index]
-            
-            self.pipeline.fit(X_train, y_train)
-            
-            y_pred = self.pipeline.predict(X_test)
-            y_prob = self.pipeline.predict_proba(X_test)[:, 1]
-            
-            metrics["accuracy"].append(accuracy_score(y_test, y_pred))
-            metrics["precision"].append(precision_score(y_test, y_pred, zero_division=0))
-            
-            # ROC AUC requires both classes in test set
-            if len(np.unique(y_test)) > 1:
-                metrics["auc"].append(roc_auc_score(y_test, y_prob))
-            
-            metrics["log_loss"].append(log_loss(y_test, y_prob))
-
-        # Final fit on all data for future inference
-        self.pipeline.fit(X, y)
-        
-        avg_metrics = {k: float(np.mean(v)) if v else 0.0 for k, v in metrics.items()}
-        logger.info(f"Training complete. Metrics: {avg_metrics}")
-        return avg_metrics
+
+        logger.info(f"Starting training with {self.model_type} for horizons {horizons}...")
+
+        with TRAIN_SECONDS.time(model_type=self.model_type):
+            folds = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score_fold)(
+                    self.pipeline,
+                    X.iloc[train_index], X.iloc[test_index],
+                    {h: y[h][train_index] for h in horizons},
+                    {h: y[h][test_index] for h in horizons},
+                )
+                for train_index, test_index in tscv.split(X)
+            )
+
+            # Final fit on all data for future inference: one scaler, one classifier per horizon
+            scaler = clone(self.pipeline.named_steps["scaler"]).fit(X)
+            scaled = scaler.transform(X)
+            models = {}
+            for h in horizons:
+                known = ~np.isnan(y[h])
+                if len(np.unique(y[h][known])) < 2:
+                    logger.warning(f"Horizon {h}: known targets hold a single class, no model trained")
+                    continue
+                classifier = clone(self.pipeline.named_steps["classifier"]).fit(scaled[known], y[h][known])
+                engine = ModelEngine(self.model_type, self.random_state, self.n_jobs, horizon=h)
+                engine.pipeline = Pipeline([("scaler", scaler), ("classifier", classifier)])
+                engine.feature_cols = list(X.columns)
+                models[h] = engine
+        TRAIN_ROWS.inc(len(X), model_type=self.model_type)
+
+        results = {}
+        for h in models:
+            per_fold = [fold[h] for fold in folds]
+            metrics = {
+                k: float(np.mean([f[k] for f in per_fold if k in f] or [0.0]))
+                for k in ("accuracy", "precision", "auc", "log_loss")
+            }
+            skipped = sum("accuracy" not in f for f in per_fold)
+            if skipped:
+                logger.warning(f"Horizon {h}: {skipped} of {len(per_fold)} CV folds skipped (one class or no known targets)")
+            logger.info(f"Training complete for horizon {h}. Metrics: {metrics}")
+            for i, fold in enumerate(per_fold):
+                metrics[f"fold_{i}_fit_s"] = fold["fit_s"]
+                metrics[f"fold_{i}_score_s"] = fold["score_s"]
+            results[h] = (models[h], metrics)
+        return results
 
     def predict(self, X: pd.DataFrame) -> pd.Series:
         return pd.Series(self.pipeline.predict(X), index=X.index)
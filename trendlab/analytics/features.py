@@ -1,69 +1,229 @@
 import logging
-from typing import cast
+from collections.abc import Iterable, Iterator
 
 import numpy as np
 import pandas as pd
 
+from trendlab.analytics.indicators import INDICATORS, IndicatorRegistry
+
 logger = logging.getLogger(__name__)
 
+TARGET = "target_next_day_up"
+
+
+def target_column(horizon: int) -> str:
+    """Target name for a horizon in rows; horizon 1 keeps the stored next-day column."""
+    return TARGET if horizon == 1 else f"target_up_{horizon}d"
+
 class FeatureEngineer:
     """
     Computes technical indicators and features.
     Ensures strict adherence to preventing look-ahead bias.
     """
 
-    def compute_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    # Extra trailing rows kept in the state so revised recent points can be recomputed
+    STATE_SLACK_ROWS = 30
+    # float64 copies alive per computed column while a chunk is processed: the chunk's
+    # frame, the intermediate Series and the pandas temporaries inside rolling windows
+    CHUNK_COPIES = 4
+
+    def __init__(self, registry: IndicatorRegistry | None = None, columns: Iterable[str] | None = None):
+        """
+        Args:
+            registry: Indicator definitions; the built-in set by default.
+            columns: Feature columns to compute when a call does not ask for specific ones (all by default).
+        """
+        self.registry = registry or INDICATORS
+        self.columns = list(columns) if columns is not None else None
+        self.warmup_rows = self.registry.warmup(self.columns)
+
+    def compute_features(self, df: pd.DataFrame, columns: Iterable[str] | None = None) -> pd.DataFrame:
         """
         Enriches the dataframe with technical indicators.
         Input dataframe must be indexed by timestamp.
+        Only `columns` and the intermediates they depend on are computed.
         """
         data = df.copy().sort_index()
-        
-        # 1. Returns
-        data['log_ret'] = np.log(data['price'] / data['price'].shift(1))
-        
-        # 2. Volatility (Rolling)
-        data['vol_7d'] = data['log_ret'].rolling(window=7).std()
-        data['vol_30d'] = data['log_ret'].rolling(window=30).std()
-        
-        # 3. Momentum (RSI)
-        data['rsi_14'] = self._calculate_rsi(data['price'], 14)
-        
-        # 4. Trend (SMA Crossovers)
-        data['sma_50'] = data['price'].rolling(window=50).mean()
-        data['sma_200'] = data['price'].rolling(window=200).mean()
-        
-        # Type hint help for mypy with pandas series comparison
-        sma_50 = cast(pd.Series, data['sma_50'])
-        sma_200 = cast(pd.Series, data['sma_200'])
-        data['trend_signal'] = (sma_50 > sma_200).astype(int)
-        
-        # 5. Drawdown
-        rolling_max = data['price'].rolling(window=365, min_periods=1).max()
-        data['drawdown'] = (data['price'] / rolling_max) - 1
-        
-        # 6. Volume Change
-        data['vol_change_5d'] = data['total_volume'].pct_change(periods=5)
-        
-        # 7. Target (Next day direction) - SHIFTED BACKWARDS
-        # Target: 1 if Price(t+1) > Price(t), else 0
-        # We shift(-1) so that row T contains the outcome at T+1
-        # Use float to allow NaN for the last row
-        price_next = cast(pd.Series, data['price'].shift(-1))
-        price_now = cast(pd.Series, data['price'])
-        
-        data['target_next_day_up'] = (price_next > price_now).astype(float)
-        data.loc[price_next.isna(), 'target_next_day_up'] = np.nan
-        
+        selected = self._columns(columns)
+        raw = {name: data[name] for name in self.registry.raw_inputs(selected)}
+        for name, values in self.registry.compute(raw, selected).items():
+            data[name] = values
         return data
 
-    def _calculate_rsi(self, series: pd.Series, period: int = 14) -> pd.Series:
-        delta = series.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()  # type: ignore
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()  # type: ignore
-        
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+    def compute_panel_features(
+        self, frames: dict[str, pd.DataFrame], columns: Iterable[str] | None = None
+    ) -> dict[str, pd.DataFrame]:
+        """
+        Computes features for many assets at once.
+
+        Prices and volumes are stacked into 2-D (rows x assets) blocks so every
+        indicator runs as one vectorized pandas call over all assets. Windows are
+        row based, so assets are right-aligned on their latest row and padded with
+        leading NaN; each column then sees exactly the rows `compute_features` would,
+        even when assets have different history lengths or timestamps.
+        """
+        if not frames:
+            return {}
+        sorted_frames = {asset: df.sort_index() for asset, df in frames.items()}
+        assets = list(sorted_frames)
+        depth = max(len(df) for df in sorted_frames.values())
+
+        selected = self._columns(columns)
+        raw = {}
+        for name in self.registry.raw_inputs(selected):
+            block = np.full((depth, len(assets)), np.nan)
+            for j, asset in enumerate(assets):
+                df = sorted_frames[asset]
+                block[depth - len(df):, j] = df[name].to_numpy(dtype=float)
+            raw[name] = pd.DataFrame(block, columns=assets)
+
+        wide = self.registry.compute(raw, selected)
+        blocks = {name: values.to_numpy() for name, values in wide.items()}
+
+        results = {}
+        for j, asset in enumerate(assets):
+            raw = sorted_frames[asset]
+            offset = depth - len(raw)
+            indicators = pd.DataFrame({name: block[offset:, j] for name, block in blocks.items()}, index=raw.index)
+            results[asset] = pd.concat([raw, indicators], axis=1)
+        return results
+
+    def chunk_rows(self, memory_budget: int, raw_columns: int = 3, columns: Iterable[str] | None = None) -> int:
+        """
+        Rows per chunk so that `iter_features` keeps about `memory_budget` bytes of
+        float64 data alive, halo included.
+        """
+        selected = self._columns(columns)
+        computed = sum(len(ind.outputs) for ind in self.registry.plan(selected))
+        row_bytes = 8 * (1 + raw_columns * 2 + computed * self.CHUNK_COPIES)  # index, raw buffer + copy, features
+        halo = self.registry.warmup(selected) + self.registry.lookahead(selected)
+        rows = memory_budget // row_bytes - halo
+        if rows < 1:
+            raise ValueError(
+                f"A memory budget of {memory_budget} bytes cannot hold the {halo} row halo ({row_bytes} bytes per row)"
+            )
+        return int(rows)
+
+    def iter_features(
+        self, chunks: Iterable[pd.DataFrame], chunk_rows: int, columns: Iterable[str] | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Out-of-core `compute_features`: consumes raw history in time order, in pieces of any
+        size, and yields feature rows `chunk_rows` at a time.
+
+        Each chunk is computed together with a halo of the `warmup` rows before it (and the
+        `lookahead` rows after it, for the target), so every row sees the same window as in
+        a full computation. Only the halo and the pending rows are held in memory.
+        """
+        selected = self._columns(columns)
+        warmup = self.registry.warmup(selected)
+        lookahead = self.registry.lookahead(selected)
+        pieces: list[pd.DataFrame] = []  # halo first, then rows not yielded yet
+        buffered = 0
+        done = 0  # leading buffered rows that were already yielded (the halo)
+
+        for chunk in chunks:
+            pieces.append(chunk if chunk.index.is_monotonic_increasing else chunk.sort_index())
+            buffered += len(chunk)
+            if buffered - done < chunk_rows + lookahead:
+                continue
+            # Concatenated once per yielded chunk, not once per incoming piece
+            buffer = pd.concat(pieces)
+            while len(buffer) - done >= chunk_rows + lookahead:
+                end = done + chunk_rows
+                yield self.compute_features(buffer.iloc[:end + lookahead], selected).iloc[done:end]
+                keep_from = max(0, end - warmup)
+                buffer, done = buffer.iloc[keep_from:], end - keep_from
+            pieces, buffered = [buffer], len(buffer)
+
+        if buffered > done:
+            yield self.compute_features(pd.concat(pieces), selected).iloc[done:]
+
+    def feature_state(self, raw: pd.DataFrame) -> pd.DataFrame:
+        """
+        Minimal tail of raw history needed to extend features with `update_features`.
+        Stored next to the features file after every build.
+        """
+        return raw.sort_index().iloc[-(self.warmup_rows + self.STATE_SLACK_ROWS):]
+
+    def update_features(
+        self, state: pd.DataFrame, raw: pd.DataFrame, history_start: pd.Timestamp | None = None
+    ) -> pd.DataFrame | None:
+        """
+        Computes features only for rows that are new or changed since `state` was taken.
+
+        Args:
+            state: Raw tail saved by `feature_state` on the previous build.
+            raw: Current raw history, at least from the first state timestamp onward.
+            history_start: First stored timestamp when `raw` is only a window of the history.
+
+        Returns:
+            Feature rows to upsert (replacing stored rows from its first timestamp on),
+            identical to the same rows of a full `compute_features`. Empty if nothing
+            changed, None if the state cannot be used and a full recompute is needed.
+        """
+        if state.empty:
+            return None
+        raw = raw.sort_index()
+        window = raw.loc[state.index[0]:]
+        n = min(len(state), len(window))
+        if n == 0 or list(window.columns) != list(state.columns):
+            return None
+
+        # Length of the common prefix of the stored state and the current raw data
+        same_index = window.index[:n] == state.index[:n]
+        a = window.iloc[:n].to_numpy(dtype=float)
+        b = state.iloc[:n].to_numpy(dtype=float)
+        same_values = ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+        matched = same_index & same_values
+        common = n if matched.all() else int(np.argmin(matched))
+
+        if common == 0:
+            return None
+        if common == len(window):
+            return self.compute_features(window.iloc[:0])
+
+        # The last unchanged row is recomputed too: its target depends on the next price
+        has_full_history = state.index[0] == (raw.index[0] if history_start is None else history_start)
+        if common - 1 < self.warmup_rows and not has_full_history:
+            return None
+
+        context = window.iloc[max(0, common - 1 - self.warmup_rows):]
+        features = self.compute_features(context)
+        return features.iloc[min(common - 1, self.warmup_rows):]
+
+    def _columns(self, columns: Iterable[str] | None) -> list[str] | None:
+        return list(columns) if columns is not None else self.columns
+
+    def horizon_targets(self, price: pd.Series, horizons: Iterable[int]) -> pd.DataFrame:
+        """
+        1 if the price `h` rows ahead is higher, else 0, for every horizon in one vectorized
+        pass; NaN where that price is not known yet. Horizon 1 equals `target_next_day_up`.
+        """
+        steps = np.array(sorted(set(horizons)), dtype=np.int64)
+        if (steps < 1).any():
+            raise ValueError(f"Horizons must be positive, got {steps.tolist()}")
+        values = price.to_numpy(dtype=float)
+        ahead = np.arange(len(values))[:, None] + steps[None, :]
+        known = ahead < len(values)
+        future = values[np.minimum(ahead, len(values) - 1)] if len(values) else np.empty(ahead.shape)
+        with np.errstate(invalid="ignore"):
+            up = np.where(known & ~np.isnan(future), (future > values[:, None]).astype(float), np.nan)
+        return pd.DataFrame(up, index=price.index, columns=[target_column(h) for h in steps])
+
+    def create_horizon_dataset(
+        self, df: pd.DataFrame, horizons: Iterable[int]
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        One feature matrix shared by all horizons, and their targets.
+        Rows have complete features and at least one known target; a horizon's target is
+        NaN on the last rows, whose outcome is not known yet. For horizon 1 alone this is
+        exactly `create_dataset`.
+        """
+        targets = self.horizon_targets(df["price"], horizons)
+        X = df.drop(columns=[c for c in df.columns if c == TARGET or c.startswith("target_up_")])
+        keep = X.notna().all(axis=1) & targets.notna().any(axis=1)
+        return X[keep], targets[keep]
 
     def create_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
         """
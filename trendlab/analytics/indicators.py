@@ -0,0 +1,249 @@
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import numpy as np
+import pandas as pd
+
+FrameOrSeries = TypeVar("FrameOrSeries", pd.Series, pd.DataFrame)
+
+# Columns of the raw market data that indicators may read
+RAW_COLUMNS = ("price", "market_cap", "total_volume")
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """
+    One step of the feature graph.
+
+    `fn` receives the `inputs` (raw columns or outputs of other indicators) positionally,
+    as Series for one asset or DataFrames with one column per asset, and returns one
+    value per entry of `outputs` (a tuple when there are several).
+    `window` is the number of rows one output row looks at, the current row included
+    (a 14-row rolling mean has 14, `diff()` has 2); `lookahead` the rows after it (targets).
+    Temporary outputs are intermediates: computed once for all dependents, never returned.
+    """
+    name: str
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    window: int
+    fn: Callable[..., Any]
+    temporary: bool = False
+    lookahead: int = 0
+
+
+class IndicatorRegistry:
+    """
+    Indicators by output column, resolved into a dependency DAG per request.
+
+    `compute` runs only the steps needed for the requested columns, in dependency
+    order; each intermediate is computed once and released after its last consumer.
+    """
+
+    def __init__(self, indicators: Iterable[Indicator] = ()):
+        self._indicators: dict[str, Indicator] = {}
+        self._producers: dict[str, Indicator] = {}
+        for indicator in indicators:
+            self.register(indicator)
+
+    def register(self, indicator: Indicator) -> Indicator:
+        if indicator.name in self._indicators:
+            raise ValueError(f"Indicator {indicator.name} is already registered")
+        for output in indicator.outputs:
+            if output in self._producers or output in RAW_COLUMNS:
+                raise ValueError(f"Column {output} of {indicator.name} is already defined")
+        if indicator.window < 1 or indicator.lookahead < 0:
+            raise ValueError(f"Window of {indicator.name} must be at least 1 row, its lookahead at least 0")
+        self._indicators[indicator.name] = indicator
+        for output in indicator.outputs:
+            self._producers[output] = indicator
+        return indicator
+
+    def indicator(
+        self,
+        *inputs: str,
+        window: int = 1,
+        outputs: tuple[str, ...] | None = None,
+        temporary: bool = False,
+        lookahead: int = 0
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator registering a function; its name is the output column unless `outputs` is given."""
+        def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self.register(
+                Indicator(fn.__name__, inputs, outputs or (fn.__name__,), window, fn, temporary, lookahead)
+            )
+            return fn
+        return decorate
+
+    @property
+    def columns(self) -> list[str]:
+        """Every feature column (temporaries excluded), in registration order."""
+        return [c for ind in self._indicators.values() if not ind.temporary for c in ind.outputs]
+
+    def plan(self, columns: Iterable[str] | None = None) -> list[Indicator]:
+        """Steps needed for `columns` (all by default), each after the steps it reads from."""
+        order: list[Indicator] = []
+        done: set[str] = set()
+        visiting: set[str] = set()
+
+        def visit(indicator: Indicator) -> None:
+            if indicator.name in done:
+                return
+            if indicator.name in visiting:
+                raise ValueError(f"Indicator {indicator.name} depends on itself")
+            visiting.add(indicator.name)
+            for name in indicator.inputs:
+                if name in self._producers:
+                    visit(self._producers[name])
+                elif name not in RAW_COLUMNS:
+                    raise ValueError(f"Indicator {indicator.name} reads unknown column {name}")
+            visiting.discard(indicator.name)
+            done.add(indicator.name)
+            order.append(indicator)
+
+        for column in self._select(columns):
+            visit(self._producers[column])
+        return order
+
+    def raw_inputs(self, columns: Iterable[str] | None = None) -> list[str]:
+        """Raw market data columns the requested features read."""
+        needed = {name for ind in self.plan(columns) for name in ind.inputs}
+        return [c for c in RAW_COLUMNS if c in needed]
+
+    def warmup(self, columns: Iterable[str] | None = None) -> int:
+        """
+        Rows of history before a row that its requested features depend on:
+        the longest chain of windows through the DAG. Computing from that many
+        earlier rows gives the same values as computing from the full history.
+        """
+        return self._span(columns, lambda ind: ind.window - 1)
+
+    def lookahead(self, columns: Iterable[str] | None = None) -> int:
+        """Rows after a row that its requested features depend on (1 for the next-day target)."""
+        return self._span(columns, lambda ind: ind.lookahead)
+
+    def _span(self, columns: Iterable[str] | None, rows: Callable[[Indicator], int]) -> int:
+        """Longest sum of `rows` along any dependency chain ending in a requested column."""
+        span: dict[str, int] = dict.fromkeys(RAW_COLUMNS, 0)
+        for ind in self.plan(columns):
+            total = rows(ind) + max((span[name] for name in ind.inputs), default=0)
+            for output in ind.outputs:
+                span[output] = total
+        return max((span[c] for c in self._select(columns)), default=0)
+
+    def compute(
+        self, data: Mapping[str, FrameOrSeries], columns: Iterable[str] | None = None
+    ) -> dict[str, FrameOrSeries]:
+        """
+        Requested columns (all by default, in registration order) computed from the raw
+        columns in `data`, which are all Series or all DataFrames of the same shape.
+        """
+        selected = self._select(columns)
+        plan = self.plan(selected)
+        # Pending reads per intermediate, so it can be dropped as soon as the last one is done
+        pending: dict[str, int] = {}
+        for ind in plan:
+            for name in ind.inputs:
+                pending[name] = pending.get(name, 0) + 1
+
+        keep = set(selected)
+        values: dict[str, FrameOrSeries] = {}
+        for ind in plan:
+            args = [values[name] if name in self._producers else data[name] for name in ind.inputs]
+            result = ind.fn(*args)
+            outputs = result if len(ind.outputs) > 1 else (result,)
+            for output, value in zip(ind.outputs, outputs, strict=True):
+                if output in keep or pending.get(output):
+                    values[output] = value
+            for name in ind.inputs:
+                pending[name] -= 1
+                if not pending[name] and name in values and name not in keep:
+                    del values[name]
+
+        return {column: values[column] for column in selected}
+
+    def _select(self, columns: Iterable[str] | None) -> list[str]:
+        if columns is None:
+            return self.columns
+        requested = set(columns)
+        unknown = requested - set(self._producers)
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {sorted(unknown)}")
+        # Registration order, so a subset has the same layout as the full frame
+        return [c for ind in self._indicators.values() for c in ind.outputs if c in requested]
+
+
+INDICATORS = IndicatorRegistry()
+
+
+# 1. Returns
+@INDICATORS.indicator("price", window=2)
+def log_ret(price: FrameOrSeries) -> FrameOrSeries:
+    return np.log(price / price.shift(1))
+
+
+@INDICATORS.indicator("price", window=2, temporary=True)
+def delta(price: FrameOrSeries) -> FrameOrSeries:
+    return price.diff()
+
+
+# 2. Volatility (Rolling)
+@INDICATORS.indicator("log_ret", window=7)
+def vol_7d(log_ret: FrameOrSeries) -> FrameOrSeries:
+    return log_ret.rolling(window=7).std()
+
+
+@INDICATORS.indicator("log_ret", window=30)
+def vol_30d(log_ret: FrameOrSeries) -> FrameOrSeries:
+    return log_ret.rolling(window=30).std()
+
+
+# 3. Momentum (RSI)
+@INDICATORS.indicator("price", "delta", window=14)
+def rsi_14(price: FrameOrSeries, delta: FrameOrSeries) -> FrameOrSeries:
+    # The undefined first delta counts as no move; rows without a price stay missing
+    # (this keeps the NaN padding of panel blocks out of the averages)
+    has_price = price.notna()
+    gain = (delta.where(delta > 0, 0)).where(has_price).rolling(window=14).mean()  # type: ignore
+    loss = (-delta.where(delta < 0, 0)).where(has_price).rolling(window=14).mean()  # type: ignore
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+# 4. Trend (SMA Crossovers)
+@INDICATORS.indicator("price", window=50)
+def sma_50(price: FrameOrSeries) -> FrameOrSeries:
+    return price.rolling(window=50).mean()
+
+
+@INDICATORS.indicator("price", window=200)
+def sma_200(price: FrameOrSeries) -> FrameOrSeries:
+    return price.rolling(window=200).mean()
+
+
+@INDICATORS.indicator("sma_50", "sma_200")
+def trend_signal(sma_50: FrameOrSeries, sma_200: FrameOrSeries) -> FrameOrSeries:
+    return (sma_50 > sma_200).astype(int)
+
+
+# 5. Drawdown
+@INDICATORS.indicator("price", window=365)
+def drawdown(price: FrameOrSeries) -> FrameOrSeries:
+    rolling_max = price.rolling(window=365, min_periods=1).max()
+    return (price / rolling_max) - 1
+
+
+# 6. Volume Change
+@INDICATORS.indicator("total_volume", window=6)
+def vol_change_5d(volume: FrameOrSeries) -> FrameOrSeries:
+    # No forward fill: a missing volume yields a missing change, never a stale one
+    return volume.pct_change(periods=5, fill_method=None)
+
+
+# 7. Target (Next day direction) - SHIFTED BACKWARDS
+# Target: 1 if Price(t+1) > Price(t), else 0. It looks one row ahead, not back,
+# so it adds no warm-up; use float to allow NaN for the last row
+@INDICATORS.indicator("price", lookahead=1)
+def target_next_day_up(price: FrameOrSeries) -> FrameOrSeries:
+    price_next = price.shift(-1)
+    return (price_next > price).astype(float).where(price_next.notna())
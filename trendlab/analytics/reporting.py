@@ -87,6 +87,7 @@ class ReportGenerator:
         return {
             "asset": p.asset,
             "model": p.model_name,
+            "horizon_days": p.horizon_days,
             "prob_up": p.probability_up,
             "signal": p.signal,
             "confidence": p.confidence_score
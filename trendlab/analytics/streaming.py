@@ -0,0 +1,234 @@
+import logging
+import math
+from collections import deque
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from trendlab.analytics.compiled import CompiledModel
+from trendlab.analytics.engine import ModelEngine
+from trendlab.domain.models import MarketDataPoint
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+
+class _RollingMoments:
+    """
+    Fixed-size window with O(1) mean and sample std (Welford add/remove).
+    Like pandas `rolling(window)`, results are NaN until the window is full of non-NaN values.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque[float] = deque()
+        self.nans = 0
+        self.n = 0
+        self.mean_ = 0.0
+        self.m2 = 0.0
+
+    def push(self, x: float) -> None:
+        self.values.append(x)
+        self._add(x)
+        if len(self.values) > self.size:
+            self._remove(self.values.popleft())
+
+    def mean(self) -> float:
+        if len(self.values) < self.size or self.nans:
+            return NAN
+        return self.mean_
+
+    def std(self) -> float:
+        if len(self.values) < self.size or self.nans or self.n < 2:
+            return NAN
+        return math.sqrt(max(self.m2, 0.0) / (self.n - 1))
+
+    def _add(self, x: float) -> None:
+        if math.isnan(x):
+            self.nans += 1
+            return
+        self.n += 1
+        delta = x - self.mean_
+        self.mean_ += delta / self.n
+        self.m2 += delta * (x - self.mean_)
+
+    def _remove(self, x: float) -> None:
+        if math.isnan(x):
+            self.nans -= 1
+            return
+        self.n -= 1
+        if self.n == 0:
+            self.mean_ = self.m2 = 0.0
+            return
+        delta = x - self.mean_
+        self.mean_ -= delta / self.n
+        self.m2 -= delta * (x - self.mean_)
+
+
+class _RollingMax:
+    """Rolling max over the last `size` values with min_periods=1, via a monotonic deque."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.count = 0
+        self.window: deque[tuple[int, float]] = deque()
+
+    def push(self, x: float) -> float:
+        i = self.count
+        self.count += 1
+        if not math.isnan(x):
+            while self.window and self.window[-1][1] <= x:
+                self.window.pop()
+            self.window.append((i, x))
+        while self.window and self.window[0][0] <= i - self.size:
+            self.window.popleft()
+        return self.window[0][1] if self.window else NAN
+
+
+class StreamingFeatureEngine:
+    """
+    Push-based counterpart of FeatureEngineer for live ticks.
+    Every update costs O(1) and returns the feature row `compute_features` would
+    produce for the same tick appended to the same history (target excluded).
+    Windows count ticks, exactly like the batch engine counts rows. One exception: a
+    missing market cap (some providers skip it on some ticks) carries the last known one.
+    """
+
+    FEATURE_COLUMNS = [
+        "price", "market_cap", "total_volume",
+        "log_ret", "vol_7d", "vol_30d", "rsi_14", "sma_50", "sma_200",
+        "trend_signal", "drawdown", "vol_change_5d"
+    ]
+
+    def __init__(self) -> None:
+        self._prev_price = NAN
+        self._vol_7d = _RollingMoments(7)
+        self._vol_30d = _RollingMoments(30)
+        self._gain_14 = _RollingMoments(14)
+        self._loss_14 = _RollingMoments(14)
+        self._sma_50 = _RollingMoments(50)
+        self._sma_200 = _RollingMoments(200)
+        self._max_365 = _RollingMax(365)
+        self._volumes: deque[float] = deque(maxlen=6)
+        self._market_cap = NAN
+        self.latest: dict[str, float] = {}
+
+    def update(self, point: MarketDataPoint) -> dict[str, float]:
+        price = float(point.price)
+        volume = float(point.total_volume)
+        if not math.isnan(point.market_cap):
+            self._market_cap = float(point.market_cap)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_ret = float(np.log(np.float64(price) / self._prev_price))
+            delta = price - self._prev_price
+            # Same as the rsi_14 indicator: the undefined first delta counts as no move
+            if math.isnan(price):
+                self._gain_14.push(NAN)
+                self._loss_14.push(NAN)
+            else:
+                self._gain_14.push(delta if delta > 0 else 0.0)
+                self._loss_14.push(-delta if delta < 0 else 0.0)
+            rs = np.float64(self._gain_14.mean()) / np.float64(self._loss_14.mean())
+            rsi = float(100 - (100 / (1 + rs)))
+
+            self._volumes.append(volume)
+            vol_change = NAN
+            if len(self._volumes) == self._volumes.maxlen:
+                vol_change = float(np.float64(volume) / np.float64(self._volumes[0]) - 1)
+
+        self._vol_7d.push(log_ret)
+        self._vol_30d.push(log_ret)
+        self._sma_50.push(price)
+        self._sma_200.push(price)
+        rolling_max = self._max_365.push(price)
+        self._prev_price = price
+
+        sma_50 = self._sma_50.mean()
+        sma_200 = self._sma_200.mean()
+        self.latest = {
+            "price": price,
+            "market_cap": self._market_cap,
+            "total_volume": volume,
+            "log_ret": log_ret,
+            "vol_7d": self._vol_7d.std(),
+            "vol_30d": self._vol_30d.std(),
+            "rsi_14": rsi,
+            "sma_50": sma_50,
+            "sma_200": sma_200,
+            "trend_signal": int(sma_50 > sma_200),
+            "drawdown": price / rolling_max - 1,
+            "vol_change_5d": vol_change,
+        }
+        return self.latest
+
+    def warm_up(self, raw: pd.DataFrame) -> None:
+        """Seeds the windows from stored history, e.g. the tail kept by FeatureEngineer.feature_state."""
+        for ts, row in raw.sort_index().iterrows():
+            self.update(MarketDataPoint(ts, row["price"], row["market_cap"], row["total_volume"]))
+
+    def vector(self, columns: list[str] | None = None) -> np.ndarray:
+        """Latest features as a 1-D array in model column order."""
+        return np.array([self.latest[c] for c in (columns or self.FEATURE_COLUMNS)], dtype=np.float64)
+
+    def frame(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """Latest features as a one-row frame accepted by ModelEngine.predict_proba."""
+        cols = columns or self.FEATURE_COLUMNS
+        return pd.DataFrame([self.vector(cols)], columns=cols)
+
+    def is_warm(self) -> bool:
+        """
+        True once every indicator is defined (all windows are full). The market cap is a
+        carried-forward level, not a window, so a provider that never sends one does not
+        hold the engine back.
+        """
+        return bool(self.latest) and not any(math.isnan(v) for c, v in self.latest.items() if c != "market_cap")
+
+
+def stream_features(
+    points: Iterable[MarketDataPoint],
+    engine: StreamingFeatureEngine | None = None
+) -> Iterator[tuple[datetime, dict[str, float]]]:
+    """Generator adapter: yields (timestamp, features) for every tick pulled from `points`."""
+    engine = engine or StreamingFeatureEngine()
+    for point in points:
+        yield point.timestamp, dict(engine.update(point))
+
+
+def stream_predictions(
+    points: Iterable[MarketDataPoint],
+    model: ModelEngine | CompiledModel,
+    engine: StreamingFeatureEngine | None = None
+) -> Iterator[tuple[datetime, float]]:
+    """
+    Yields (timestamp, probability_up) per tick once the indicator windows are warm.
+    The model is scored through its compiled NumPy form, so a tick costs microseconds.
+    Raises ValueError right away if the model reads columns the engine does not compute.
+    """
+    engine = engine or StreamingFeatureEngine()
+    compiled = model.compile() if isinstance(model, ModelEngine) else model
+    missing = [c for c in compiled.feature_cols if c not in engine.FEATURE_COLUMNS]
+    if missing:
+        # e.g. cross-asset columns, which need every asset's history and exist only in batch runs
+        raise ValueError(
+            f"Model reads columns the streaming engine does not compute: {missing}; "
+            "stream a model trained on single-asset features"
+        )
+    return _score_ticks(points, compiled, engine)
+
+
+def _score_ticks(
+    points: Iterable[MarketDataPoint], compiled: CompiledModel, engine: StreamingFeatureEngine
+) -> Iterator[tuple[datetime, float]]:
+    for point in points:
+        engine.update(point)
+        if not engine.is_warm():
+            continue
+        x = engine.vector(compiled.feature_cols)
+        # Only a model reading the market cap can still see NaN: before the first known one
+        if np.isnan(x).any():
+            continue
+        yield point.timestamp, compiled.score_row(x)
@@ -1,13 +1,24 @@
+import json
 import logging
 import os
+import threading
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Literal
 
-from fastapi import BackgroundTasks, FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
-from trendlab.application.pipeline import PipelineService
-from trendlab.domain.models import Asset
+from trendlab.application.jobs import Job, JobManager, QueueFullError
+from trendlab.domain.models import Asset, MarketInsight, Prediction, RunSummary
 from trendlab.utils.logging import setup_logging
+from trendlab.utils.metrics import REGISTRY
+
+# The data stack (pandas, pyarrow, scikit-learn) loads on the first request that needs it,
+# so a new pod answers /health and /live right away
+if TYPE_CHECKING:
+    from trendlab.application.serving import ServingCache
 
 # Setup logging
 setup_logging()
@@ -35,6 +46,36 @@ REPORT_DIR = Path(os.getenv("REPORT_DIR", DEFAULT_REPORT_DIR))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 REPORT_DIR.mkdir(parents=True, exist_ok=True)
 
+# PipelineService uses root / "data" / "raw" etc., so point it at /app when deployed
+SERVICE_ROOT = Path("/app") if Path("/app").exists() else Path.cwd()
+
+# Read endpoints answer from memory; entries are refreshed when a pipeline run publishes.
+# Created by get_serving() on first use.
+serving: "ServingCache | None" = None
+_serving_lock = threading.Lock()
+
+def get_serving() -> "ServingCache":
+    global serving
+    with _serving_lock:
+        if serving is None:
+            from trendlab.application.serving import ServingCache, feature_cache_from_env
+            from trendlab.infrastructure.model_registry import ModelRegistry
+            from trendlab.infrastructure.storage import ParquetStorage
+
+            serving = ServingCache(
+                SERVICE_ROOT,
+                ParquetStorage(SERVICE_ROOT, feature_cache=feature_cache_from_env(SERVICE_ROOT)),
+                ModelRegistry(SERVICE_ROOT / "data" / "models"),
+                capacity=int(os.getenv("TRENDLAB_SERVING_CACHE_SIZE", "32"))
+            )
+        return serving
+
+# Pipeline runs share the same parquet files, so by default they run one at a time
+jobs = JobManager(
+    max_workers=int(os.getenv("TRENDLAB_JOB_WORKERS", "1")),
+    max_pending=int(os.getenv("TRENDLAB_JOB_QUEUE_SIZE", "8"))
+)
+
 # Common assets map (shared with CLI, ideally moved to config)
 ASSET_MAP = {
     "btc": Asset("btc", "Bitcoin", "bitcoin"),
@@ -48,53 +89,103 @@ class RunRequest(BaseModel):
     assets: list[str] = ["btc", "eth"]
     days: int = 365
     horizon: int = 1
+    # Several horizons (in rows, days for daily data) train in one pass; overrides `horizon`
+    horizons: list[int] | None = None
+    incremental: bool = False
+    panel: bool = False
+    # Parallel per-asset tasks for feature building and inference
+    workers: int = 1
+    backend: Literal["serial", "thread", "process"] = "process"
 
-def run_pipeline_task(req: RunRequest):
-    """Background task to run the pipeline."""
-    try:
-        logger.info(f"Starting background pipeline run for {req.assets}")
-        # Initialize service with persistence paths
-        # Note: PipelineService currently takes root_dir and appends /data and /reports
-        # We need to hack it slightly or refactor PipelineService to accept specific dirs.
-        # For minimal changes, we pass the parent of DATA_DIR if the structure matches,
-        # or we update PipelineService. 
-        # Let's assume PipelineService uses root / "data" / "raw" etc.
-        # We will point it to /app.
-        
-        service_root = Path("/app") if Path("/app").exists() else Path.cwd()
-        service = PipelineService(service_root)
-        
-        target_assets = []
-        for a in req.assets:
-            if a.lower() in ASSET_MAP:
-                target_assets.append(ASSET_MAP[a.lower()])
-            else:
-                logger.warning(f"Skipping unknown asset: {a}")
-        
-        if not target_assets:
-            logger.error("No valid assets to process.")
-            return
-
-        service.run_full_pipeline(target_assets, req.days)
-        logger.info("Background pipeline run completed successfully.")
-        
-    except Exception as e:
-        logger.error(f"Pipeline run failed: {e}", exc_info=True)
+def run_pipeline_task(req: RunRequest) -> RunSummary:
+    """Job body: runs the pipeline. Failures propagate so the job is marked failed."""
+    from trendlab.application.pipeline import PipelineService
+
+    logger.info(f"Starting pipeline job for {req.assets}")
+    service = PipelineService(SERVICE_ROOT, workers=req.workers, backend=req.backend)
+    target_assets = [ASSET_MAP[a.lower()] for a in req.assets if a.lower() in ASSET_MAP]
+
+    summary = service.run_full_pipeline(
+        target_assets, req.days, incremental=req.incremental, panel=req.panel, horizons=req.horizons or [req.horizon]
+    )
+    if serving is not None:
+        serving.invalidate()
+    logger.info("Pipeline job completed successfully.")
+    return summary
+
+def job_key(req: RunRequest) -> str:
+    """Requests that would do the same work map to the same key."""
+    config = req.model_dump()
+    config["assets"] = sorted({a.lower() for a in req.assets if a.lower() in ASSET_MAP})
+    return json.dumps(config, sort_keys=True)
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "version": "0.1.0"}
 
-@app.post("/run")
-def trigger_run(req: RunRequest, background_tasks: BackgroundTasks):
-    """Triggers an asynchronous pipeline run."""
-    background_tasks.add_task(run_pipeline_task, req)
+@app.post("/run", status_code=202)
+def trigger_run(req: RunRequest):
+    """Queues a pipeline run, or returns the identical run already in flight."""
+    for a in req.assets:
+        if a.lower() not in ASSET_MAP:
+            logger.warning(f"Skipping unknown asset: {a}")
+    if not any(a.lower() in ASSET_MAP for a in req.assets):
+        raise HTTPException(status_code=400, detail="No valid assets to process.")
+    try:
+        job, created = jobs.submit(job_key(req), partial(run_pipeline_task, req))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"}) from e
     return {
-        "message": "Pipeline run triggered",
-        "config": req.dict(),
-        "status": "processing"
+        "job_id": job.id,
+        "status": job.status,
+        "deduplicated": not created,
+        "config": req.model_dump()
     }
 
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str) -> Job:
+    """Status, timings and per-asset results of a pipeline job."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+def _resolve_asset(asset: str) -> Asset:
+    if asset.lower() not in ASSET_MAP:
+        raise HTTPException(status_code=404, detail=f"Unknown asset: {asset}")
+    return ASSET_MAP[asset.lower()]
+
+@app.get("/predict/{asset}")
+def predict(asset: str, model: str = "logistic", horizon: int = 1) -> Prediction:
+    """Latest prediction from the stored model, served from memory."""
+    prediction = get_serving().prediction(_resolve_asset(asset).symbol, model, horizon)
+    if prediction is None:
+        raise HTTPException(
+            status_code=404, detail=f"No {model} model for horizon {horizon} or features available for {asset}"
+        )
+    return prediction
+
+@app.get("/predictions/{asset}")
+def predictions(asset: str, model: str = "logistic") -> list[Prediction]:
+    """Latest prediction for every horizon with a stored model, shortest first."""
+    found = get_serving().predictions(_resolve_asset(asset).symbol, model)
+    if not found:
+        raise HTTPException(status_code=404, detail=f"No {model} models or features available for {asset}")
+    return found
+
+@app.get("/insights/{asset}")
+def insights(asset: str) -> MarketInsight:
+    """Market read of the latest stored features, served from memory."""
+    insight = get_serving().insight(_resolve_asset(asset).symbol)
+    if insight is None:
+        raise HTTPException(status_code=404, detail=f"No features available for {asset}")
+    return insight
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Stage, storage, HTTP and cache metrics of this process, in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Liveness probe helper
 @app.get("/live")
 def liveness():
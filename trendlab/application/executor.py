@@ -0,0 +1,106 @@
+import logging
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ExecutorBackend(str, Enum):
+    SERIAL = "serial"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass
+class TaskOutcome(Generic[R]):
+    """Result of one task. Exactly one of `value` / `error` is meaningful."""
+    index: int
+    value: R | None = None
+    error: str | None = None
+    duration_s: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _timed_call(fn: Callable[[Any], Any], item: Any) -> tuple[Any, float]:
+    # Module level so it can be pickled for the process backend
+    start = time.perf_counter()
+    value = fn(item)
+    return value, time.perf_counter() - start
+
+
+class TaskExecutor:
+    """
+    Runs one independent task per item on a serial, thread or process backend.
+
+    - Results come back in input order regardless of completion order.
+    - A failing task is reported in its outcome and never cancels the others.
+    - At most `max_in_flight` tasks are submitted at once, which bounds the memory
+      held by pending arguments and results (not just the number of running workers).
+
+    The process backend requires `fn` and the items to be picklable.
+    """
+
+    def __init__(
+        self,
+        backend: ExecutorBackend | str = ExecutorBackend.SERIAL,
+        max_workers: int = 1,
+        max_in_flight: int | None = None
+    ):
+        self.backend = ExecutorBackend(backend)
+        self.max_workers = max(1, max_workers)
+        if self.max_workers == 1:
+            self.backend = ExecutorBackend.SERIAL
+        self.max_in_flight = max(1, max_in_flight or self.max_workers)
+
+    @property
+    def is_parallel(self) -> bool:
+        return self.backend != ExecutorBackend.SERIAL
+
+    def map(self, fn: Callable[[T], R], items: Sequence[T]) -> list[TaskOutcome[R]]:
+        if self.backend == ExecutorBackend.SERIAL or len(items) <= 1:
+            return [self._run_inline(fn, i, item) for i, item in enumerate(items)]
+
+        outcomes: list[TaskOutcome[R]] = [TaskOutcome(index=i) for i in range(len(items))]
+        workers = min(self.max_workers, len(items))
+        with self._create_pool(workers) as pool:
+            pending: dict[Future, int] = {}
+            next_index = 0
+            while next_index < len(items) or pending:
+                while next_index < len(items) and len(pending) < self.max_in_flight:
+                    pending[pool.submit(_timed_call, fn, items[next_index])] = next_index
+                    next_index += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        value, duration = future.result()
+                        outcomes[index].value = value
+                        outcomes[index].duration_s = duration
+                    except Exception as e:
+                        logger.error(f"Task {index} failed on {self.backend.value} backend: {e}")
+                        outcomes[index].error = f"{type(e).__name__}: {e}"
+        return outcomes
+
+    def _run_inline(self, fn: Callable[[T], R], index: int, item: T) -> TaskOutcome[R]:
+        start = time.perf_counter()
+        try:
+            return TaskOutcome(index=index, value=fn(item), duration_s=time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Task {index} failed: {e}")
+            return TaskOutcome(index=index, error=f"{type(e).__name__}: {e}", duration_s=time.perf_counter() - start)
+
+    def _create_pool(self, workers: int) -> Executor:
+        if self.backend == ExecutorBackend.PROCESS:
+            return ProcessPoolExecutor(max_workers=workers)
+        return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trendlab")
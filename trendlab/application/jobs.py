@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+
+from trendlab.domain.models import RunSummary
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when no more jobs can be accepted; callers should retry later."""
+
+
+@dataclass
+class Job:
+    id: str
+    key: str  # identical requests share a key and are coalesced while in flight
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    queue_s: float = 0.0
+    run_s: float = 0.0
+    summary: RunSummary | None = None
+    error: str | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobManager:
+    """
+    Runs pipeline jobs on a bounded worker pool.
+
+    - At most `max_pending` jobs are queued or running; `submit` raises QueueFullError beyond that.
+    - Submitting a key that is already queued or running returns the existing job.
+    - The most recent `keep_finished` finished jobs remain available for status queries.
+    """
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 8, keep_finished: int = 100):
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trendlab-job")
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._in_flight: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable[[], RunSummary]) -> tuple[Job, bool]:
+        """Returns the job for `key` and whether it was newly created."""
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                return existing, False
+            if len(self._in_flight) >= self.max_pending:
+                raise QueueFullError(f"{len(self._in_flight)} jobs already pending")
+
+            job = Job(id=uuid.uuid4().hex, key=key, submitted_at=datetime.now(timezone.utc))
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self._prune()
+        self._pool.submit(self._run, job, fn, time.perf_counter())
+        logger.info(f"Queued job {job.id}")
+        return job, True
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[[], RunSummary], queued_at: float) -> None:
+        start = time.perf_counter()
+        with self._lock:
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now(timezone.utc)
+            job.queue_s = start - queued_at
+        try:
+            summary = fn()
+            status, error = JobStatus.SUCCEEDED, None
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}", exc_info=True)
+            summary, status, error = None, JobStatus.FAILED, f"{type(e).__name__}: {e}"
+
+        with self._lock:
+            job.summary = summary
+            job.error = error
+            job.run_s = time.perf_counter() - start
+            job.finished_at = datetime.now(timezone.utc)
+            job.status = status
+            self._in_flight.pop(job.key, None)
+        logger.info(f"Job {job.id} {status.value} in {job.run_s:.1f}s")
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
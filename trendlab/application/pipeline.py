@@ -1,147 +1,606 @@
 import logging
-from datetime import datetime
+import math
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from functools import partial
 from pathlib import Path
-from typing import cast
+from typing import TypeVar
 
+import pandas as pd
+
+from trendlab.analytics.backtest import BacktestConfig, Backtester, BacktestReport
+from trendlab.analytics.cross_asset import INPUT_COLUMNS as CROSS_ASSET_INPUTS
+from trendlab.analytics.cross_asset import CrossAssetEngineer, join_cross_asset
 from trendlab.analytics.engine import ModelEngine
-from trendlab.analytics.features import FeatureEngineer
+from trendlab.analytics.features import TARGET, FeatureEngineer, target_column
 from trendlab.analytics.reporting import ReportGenerator
-from trendlab.domain.models import Asset, MarketInsight, Prediction
-from trendlab.domain.ports import DataProvider, StorageAdapter
+from trendlab.application.executor import ExecutorBackend, TaskExecutor, TaskOutcome
+from trendlab.application.run_context import RunContext
+from trendlab.application.serving import (
+    INSIGHT_COLUMNS,
+    bump_generation,
+    feature_cache_from_env,
+    make_insight,
+    make_prediction,
+)
+from trendlab.domain.models import Asset, AssetResult, MarketDataBatch, MarketInsight, Prediction, RunSummary
+from trendlab.domain.ports import DataProvider, ModelStore, StorageAdapter
 from trendlab.infrastructure.coingecko import CoinGeckoProvider
+from trendlab.infrastructure.model_registry import ModelRegistry
 from trendlab.infrastructure.storage import ParquetStorage
+from trendlab.utils.metrics import (
+    CACHE_REQUESTS,
+    REGISTRY,
+    RUN_STAGE_SECONDS,
+    STAGE_FAILURES,
+    STAGE_ROWS,
+    STAGE_SECONDS,
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Tolerance when deciding whether stored history already reaches back to the requested window start
+WINDOW_START_TOLERANCE = timedelta(days=1)
+# Fetches are I/O bound and paced by the provider's rate limiter, so threads are enough
+DEFAULT_FETCH_WORKERS = 8
+
 class PipelineService:
-    def __init__(self, root_dir: Path):
-        self.provider: DataProvider = CoinGeckoProvider()
-        self.storage: StorageAdapter = ParquetStorage(root_dir)
+    def __init__(
+        self,
+        root_dir: Path,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        workers: int = 1,
+        backend: ExecutorBackend | str = ExecutorBackend.PROCESS
+    ):
+        """
+        Args:
+            fetch_workers: Concurrent fetches (threads, paced by the provider rate limiter).
+            workers: Parallel per-asset tasks for the CPU-bound stages (features, inference).
+            backend: Executor for those stages: serial, thread or process.
+        """
+        self.root_dir = root_dir
+        self.fetch_workers = fetch_workers
+        self.executor = TaskExecutor(backend, max_workers=workers)
+        # CV folds run in parallel only when assets do not already use the cores
+        self.cv_jobs = 1 if self.executor.is_parallel else -1
+        # HTTP cache / record-replay is opt-in via env so CI can run fully offline
+        self.provider: DataProvider = CoinGeckoProvider(
+            pool_size=fetch_workers,
+            cache_dir=Path(os.getenv("TRENDLAB_HTTP_CACHE_DIR", str(root_dir / "data" / "http_cache"))),
+            cache_mode=os.getenv("TRENDLAB_HTTP_CACHE", "off"),
+            cache_ttl_seconds=float(os.getenv("TRENDLAB_HTTP_CACHE_TTL", "3600"))
+        )
+        self.storage: StorageAdapter = ParquetStorage(root_dir, feature_cache=feature_cache_from_env(root_dir))
+        self.models: ModelStore = ModelRegistry(
+            root_dir / "data" / "models",
+            keep_last=int(os.getenv("TRENDLAB_MODEL_KEEP", "5")),
+            max_age_days=float(os.getenv("TRENDLAB_MODEL_MAX_AGE_DAYS", "30"))
+        )
         self.engineer = FeatureEngineer()
+        self.cross_asset = CrossAssetEngineer()
+        # Budget for full feature rebuilds from storage: when set (MB), the raw history is
+        # streamed through the engineer in chunks instead of being loaded at once
+        self.feature_memory_mb = float(os.getenv("TRENDLAB_FEATURE_MEMORY_MB", "0"))
         self.reporter = ReportGenerator(root_dir / "reports")
+        # Set for the duration of run_full_pipeline; standalone stage calls go through storage
+        self._context: RunContext | None = None
 
-    def fetch_data(self, assets: list[Asset], days: int):
-        for asset in assets:
+    def fetch_data(self, assets: list[Asset], days: int, incremental: bool = False) -> list[AssetResult]:
+        """
+        Fetches all assets concurrently.
+        A failing asset is reported in its result and does not abort the others.
+        Results are returned in the order of `assets`.
+        """
+        fetcher = TaskExecutor(ExecutorBackend.THREAD, max_workers=self.fetch_workers)
+        outcomes = fetcher.map(lambda a: self._fetch_asset(a, days, incremental), assets)
+        results = self._collect_results(assets, "fetch", outcomes)
+        self._record_results(results)
+
+        failed = [r.asset for r in results if not r.success]
+        if failed:
+            logger.warning(f"Fetch failed for {len(failed)}/{len(results)} assets: {', '.join(failed)}")
+        return results
+
+    def _fetch_asset(self, asset: Asset, days: int, incremental: bool) -> AssetResult:
+        start = time.perf_counter()
+        try:
+            if incremental:
+                rows = self._fetch_incremental(asset, days)
+            else:
+                data = self.provider.fetch_history(asset, days)
+                self._store_raw(asset, data)
+                rows = len(data)
+            return AssetResult(asset.symbol, "fetch", True, rows=rows, duration_s=time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Failed to fetch data for {asset.name}: {e}")
+            return AssetResult(asset.symbol, "fetch", False, duration_s=time.perf_counter() - start, error=str(e))
+
+    def _fetch_incremental(self, asset: Asset, days: int) -> int:
+        """
+        Requests only the range missing since the last stored timestamp.
+        Falls back to a full fetch on the first run, or when the stored history
+        does not reach back to the start of the requested window.
+        """
+        now = datetime.now(timezone.utc)
+        stored_range = self.storage.raw_time_range(asset.symbol)
+
+        if stored_range is None or stored_range[0] > now - timedelta(days=days) + WINDOW_START_TOLERANCE:
+            logger.info(f"No usable history for {asset.name}, fetching full {days} day window")
             data = self.provider.fetch_history(asset, days)
-            self.storage.save_raw(asset.symbol, data)
+            self._store_raw(asset, data)
+            return len(data)
 
-    def build_features(self, assets: list[Asset]):
+        # Re-request the day of the last stored point: CoinGecko's latest daily
+        # point is intraday and gets replaced by the closed candle on the next run.
+        # Not capped at `days` so that a long outage never leaves a gap.
+        last_ts = stored_range[1]
+        missing_days = max(1, math.ceil((now - last_ts) / timedelta(days=1)) + 1)
+        logger.info(f"Incremental fetch for {asset.name}: {missing_days} of {days} days")
+
+        data = self.provider.fetch_history(asset, missing_days)
+        self.storage.append_raw(asset.symbol, data)
+        return len(data)
+
+    def build_features(self, assets: list[Asset], incremental: bool = False, panel: bool = False) -> list[AssetResult]:
+        """
+        Args:
+            incremental: Extend stored features with new rows where the saved state allows it.
+            panel: Compute all full rebuilds in one vectorized pass instead of per asset.
+        """
+        if panel and len(assets) > 1:
+            results = self._build_panel_features(assets, incremental)
+        else:
+            outcomes = self._map_assets("_build_asset_features", assets, incremental)
+            results = self._collect_results(assets, "features", outcomes)
+        self._record_results(results)
+
+        if any(r.success for r in results):
+            self._publish()
+        return results
+
+    def _build_asset_features(self, asset: Asset, incremental: bool) -> AssetResult:
+        start = time.perf_counter()
+        try:
+            rows = self._update_features(asset) if incremental else None
+            if rows is None and self._streams_features(asset):
+                rows = self._build_features_chunked(asset)
+            if rows is None:
+                raw_df = self._load_raw(asset)
+                features_df = self.engineer.compute_features(raw_df)
+                self._save_features(asset, raw_df, features_df)
+                rows = len(features_df)
+            return AssetResult(asset.symbol, "features", True, rows=rows, duration_s=time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Failed to build features for {asset.name}: {e}")
+            return AssetResult(asset.symbol, "features", False, duration_s=time.perf_counter() - start, error=str(e))
+
+    def _build_panel_features(self, assets: list[Asset], incremental: bool) -> list[AssetResult]:
+        start = time.perf_counter()
+        results: dict[str, AssetResult] = {}
+        raw_frames = {}
         for asset in assets:
             try:
-                raw_df = self.storage.load_raw(asset.symbol)
-                features_df = self.engineer.compute_features(raw_df)
-                self.storage.save_features(asset.symbol, features_df)
+                rows = self._update_features(asset) if incremental else None
+                if rows is not None:
+                    results[asset.symbol] = AssetResult(asset.symbol, "features", True, rows=rows)
+                else:
+                    raw_frames[asset.symbol] = self._load_raw(asset)
             except Exception as e:
                 logger.error(f"Failed to build features for {asset.name}: {e}")
+                results[asset.symbol] = AssetResult(asset.symbol, "features", False, error=str(e))
+
+        logger.info(f"Computing panel features for {len(raw_frames)} assets")
+        features = self.engineer.compute_panel_features(raw_frames)
+
+        for asset in assets:
+            if asset.symbol not in features:
+                continue
+            try:
+                self._save_features(asset, raw_frames[asset.symbol], features[asset.symbol])
+                results[asset.symbol] = AssetResult(asset.symbol, "features", True, rows=len(features[asset.symbol]))
+            except Exception as e:
+                logger.error(f"Failed to save features for {asset.name}: {e}")
+                results[asset.symbol] = AssetResult(asset.symbol, "features", False, error=str(e))
+
+        # A single vectorized pass has no meaningful per-asset duration
+        elapsed = time.perf_counter() - start
+        for r in results.values():
+            r.duration_s = elapsed
+        return [results[a.symbol] for a in assets]
+
+    def _streams_features(self, asset: Asset) -> bool:
+        """Chunked rebuilds apply when a memory budget is set and the run does not already hold the raw frame."""
+        if not self.feature_memory_mb:
+            return False
+        return self._context is None or self._context.get("raw", asset.symbol) is None
+
+    def _build_features_chunked(self, asset: Asset) -> int:
+        """
+        Full rebuild within `feature_memory_mb`: raw months are read one at a time, features
+        are computed chunk by chunk (with a warm-up halo) and staged as they are produced.
+        """
+        if self._context is not None:
+            self._context.wait(asset.symbol)
+        chunk_rows = self.engineer.chunk_rows(int(self.feature_memory_mb * 2**20))
+        logger.info(f"Computing features for {asset.name} in chunks of {chunk_rows} rows")
+        chunks = self.engineer.iter_features(self.storage.iter_raw(asset.symbol), chunk_rows)
+        rows = self.storage.save_features_chunks(asset.symbol, chunks)
+        tail = self.storage.load_raw(asset.symbol, tail=self.engineer.warmup_rows + self.engineer.STATE_SLACK_ROWS)
+        self.storage.save_feature_state(asset.symbol, self.engineer.feature_state(tail))
+        return rows
+
+    def _save_features(self, asset: Asset, raw_df: pd.DataFrame, features_df: pd.DataFrame):
+        state = self.engineer.feature_state(raw_df)
+        if self._context is None:
+            self.storage.save_features(asset.symbol, features_df)
+            self.storage.save_feature_state(asset.symbol, state)
+            return
+        self._context.put("features", asset.symbol, features_df)
+        self._context.persist(asset.symbol, partial(self.storage.save_features, asset.symbol, features_df))
+        self._context.persist(asset.symbol, partial(self.storage.save_feature_state, asset.symbol, state))
+
+    def _store_raw(self, asset: Asset, data: MarketDataBatch):
+        if self._context is None:
+            self.storage.save_raw(asset.symbol, data)
+            return
+        self._context.put("raw", asset.symbol, data.to_frame())
+        self._context.persist(asset.symbol, partial(self.storage.save_raw, asset.symbol, data))
+
+    def _load_raw(self, asset: Asset) -> pd.DataFrame:
+        if self._context is not None:
+            df = self._context.get("raw", asset.symbol)
+            if df is not None:
+                return df
+            self._context.wait(asset.symbol)
+        return self.storage.load_raw(asset.symbol)
+
+    def _load_features(self, asset: Asset, columns: list[str] | None = None, tail: int | None = None) -> pd.DataFrame:
+        """Features handed over by the current run if available, otherwise read (narrowed) from storage."""
+        if self._context is not None:
+            df = self._context.get("features", asset.symbol)
+            if df is not None:
+                df = df[columns] if columns is not None else df
+                return df.iloc[max(0, len(df) - tail):] if tail is not None else df
+            self._context.wait(asset.symbol)
+        return self.storage.load_features(asset.symbol, columns=columns, tail=tail)
+
+    def _update_features(self, asset: Asset) -> int | None:
+        """
+        Extends stored features with the rows that changed since the last build.
+        Returns the number of rows written, or None when there is no usable state
+        and a full build is required.
+        """
+        if self._context is not None:
+            self._context.wait(asset.symbol)
+        state = self.storage.load_feature_state(asset.symbol)
+        if state is None:
+            return None
+
+        stored_range = self.storage.raw_time_range(asset.symbol)
+        if stored_range is None or state.empty:
+            return None
+        # Only the window covered by the state is needed, not the full history
+        raw_df = self.storage.load_raw(asset.symbol, start=state.index[0])
+        update = self.engineer.update_features(state, raw_df, history_start=pd.Timestamp(stored_range[0]))
+        if update is None:
+            logger.info(f"Feature state for {asset.name} is stale, rebuilding from full history")
+            return None
+
+        self.storage.append_features(asset.symbol, update)
+        self.storage.save_feature_state(asset.symbol, self.engineer.feature_state(raw_df))
+        logger.info(f"Updated {len(update)} feature rows for {asset.name}")
+        return len(update)
+
+    def build_cross_asset_features(self, assets: list[Asset]) -> list[AssetResult]:
+        """
+        Correlation and beta to the benchmark, dispersion and breadth across `assets`, from
+        their stored features, saved per asset for inference. The benchmark's stored features
+        are used even when it is not one of `assets`; without any, only dispersion and
+        breadth are built.
+        """
+        start = time.perf_counter()
+        frames: dict[str, pd.DataFrame] = {}
+        errors: dict[str, str] = {}
+        for asset in assets:
+            try:
+                frames[asset.symbol] = self._load_features(asset, columns=CROSS_ASSET_INPUTS)
+            except Exception as e:
+                errors[asset.symbol] = str(e)
+        benchmark = self.cross_asset.benchmark
+        if benchmark not in frames:
+            try:
+                frames[benchmark] = self.storage.load_features(benchmark, columns=CROSS_ASSET_INPUTS)
+            except FileNotFoundError:
+                # Dispersion and breadth do not depend on the benchmark
+                logger.warning(f"No features for benchmark {benchmark}, skipping correlation and beta")
 
-    def run_inference(self, assets: list[Asset], model_type: str = "logistic") -> list[Prediction]:
-        predictions = []
+        computed = self.cross_asset.compute(frames)
+        results = []
         for asset in assets:
+            df = computed.get(asset.symbol)
+            if df is None:
+                error = errors.get(asset.symbol, "No features")
+                logger.error(f"Failed to build cross-asset features for {asset.name}: {error}")
+                results.append(AssetResult(asset.symbol, "cross_asset", False, error=error))
+                continue
             try:
-                df = self.storage.load_features(asset.symbol)
-                dataset = self.engineer.create_dataset(df)
-                
-                if dataset.empty:
-                    logger.warning(f"Insufficient data for {asset.name}")
-                    continue
-                
-                # Split features and target
-                # 'target_next_day_up' is at index t, representing t+1 outcome
-                X = dataset.drop(columns=['target_next_day_up'])
-                y = dataset['target_next_day_up']
-                
-                # Train
-                model = ModelEngine(model_type=model_type)
-                metrics = model.train(X, y)
-                
-                # Inference on latest data (the last row of df, which might have been dropped in create_dataset if target was nan)  # noqa: E501
-                # We need the most recent row from df (which represents "today") to predict "tomorrow"
-                latest_row = df.iloc[[-1]].drop(columns=['target_next_day_up'], errors='ignore')
-                
-                # Check if latest row has NaNs (e.g. not enough history for rolling window)
-                if latest_row.isna().any().any():
-                     logger.warning(f"Cannot predict for {asset.name}: latest data incomplete.")
-                     continue
-
-                # Force cast to float for mypy satisfaction
-                prob_raw = model.predict_proba(latest_row).iloc[0, 1]
-                prob_up = float(cast(float, prob_raw))
-                
-                # Heuristic signal generation
-                signal = "NEUTRAL"
-                if prob_up > 0.55:
-                    signal = "BULLISH"
-                elif prob_up < 0.45:
-                    signal = "BEARISH"
-                    
-                confidence = (abs(prob_up - 0.5) * 2)  # Scale 0.5-1.0 to 0-1
-                
-                predictions.append(Prediction(
-                    asset=asset.symbol,
-                    date=datetime.now(),
-                    model_name=model_type,
-                    horizon_days=1,
-                    probability_up=prob_up,
-                    signal=signal,
-                    confidence_score=confidence,
-                    supporting_metrics=metrics
-                ))
-                
+                self.storage.save_cross_asset(asset.symbol, df)
+                results.append(AssetResult(asset.symbol, "cross_asset", True, rows=len(df)))
             except Exception as e:
-                logger.error(f"Inference failed for {asset.name}: {e}")
-                
+                logger.error(f"Failed to save cross-asset features for {asset.name}: {e}")
+                results.append(AssetResult(asset.symbol, "cross_asset", False, error=str(e)))
+
+        # One vectorized pass over all assets, like panel features
+        elapsed = time.perf_counter() - start
+        for r in results:
+            r.duration_s = elapsed
+        self._record_results(results)
+        if any(r.success for r in results):
+            self._publish()
+        return results
+
+    def _load_model_features(self, asset: Asset) -> pd.DataFrame:
+        """Stored features plus the cross-asset columns, when those are up to date."""
+        df = self._load_features(asset)
+        try:
+            cross = self.storage.load_cross_asset(asset.symbol)
+        except FileNotFoundError:
+            return df
+        return join_cross_asset(df, cross)
+
+    def run_inference(
+        self,
+        assets: list[Asset],
+        model_type: str = "logistic",
+        retrain: bool = False,
+        horizons: list[int] | None = None
+    ) -> list[Prediction]:
+        """
+        Predicts the direction over each horizon (in rows, days for daily data; next day by
+        default) per asset. A model is only trained when no stored artifact matches the
+        current training data, model type and horizon, or `retrain` is set.
+        """
+        horizons = sorted(set(horizons or [1]))
+        outcomes = self._map_assets("_infer_asset", assets, model_type, retrain, horizons)
+        for asset, outcome in zip(assets, outcomes, strict=True):
+            STAGE_SECONDS.observe(outcome.duration_s, stage="inference", asset=asset.symbol)
+            if not outcome.ok or not outcome.value:
+                STAGE_FAILURES.inc(stage="inference", asset=asset.symbol)
+        predictions = [p for o in outcomes if o.ok and o.value for p in o.value]
+        if predictions:
+            self._publish()
         return predictions
 
+    def _infer_asset(
+        self, asset: Asset, model_type: str, retrain: bool = False, horizons: list[int] | None = None
+    ) -> list[Prediction]:
+        horizons = horizons or [1]
+        try:
+            df = self._load_model_features(asset)
+            # One feature matrix for every horizon; target h at index t is the t+h outcome
+            X, targets = self.engineer.create_horizon_dataset(df, horizons)
+
+            if X.empty:
+                logger.warning(f"Insufficient data for {asset.name}")
+                return []
+
+            # Reuse the stored models that were trained on exactly this data
+            template = ModelEngine(model_type=model_type, n_jobs=self.cv_jobs)
+            models: dict[int, tuple[ModelEngine, dict[str, float]]] = {}
+            missing: dict[int, str] = {}
+            for h in horizons:
+                y = targets[target_column(h)].dropna()
+                fingerprint = template.fingerprint(X.loc[y.index], y)
+                artifact = None if retrain else self.models.load(asset.symbol, model_type, fingerprint, horizon=h)
+                if not retrain:
+                    CACHE_REQUESTS.inc(cache="models", result="miss" if artifact is None else "hit")
+                if artifact is not None:
+                    logger.info(f"Using cached {model_type} {h}d model for {asset.name} ({fingerprint})")
+                    models[h] = (ModelEngine.from_artifact(artifact), artifact.metrics)
+                else:
+                    missing[h] = fingerprint
+
+            if missing:
+                y_missing = targets[[target_column(h) for h in missing]].set_axis(list(missing), axis=1)
+                for h, (model, metrics) in self._train_horizons(asset, template, X, y_missing).items():
+                    rows = int(y_missing[h].notna().sum())
+                    self.models.save(model.to_artifact(asset.symbol, missing[h], metrics, rows))
+                    models[h] = (model, metrics)
+
+            # Inference on latest data (the last row of df, which has no known target yet)
+            # We need the most recent row from df (which represents "today") to predict ahead
+            latest_row = df.iloc[[-1]].drop(columns=[TARGET], errors='ignore')
+
+            # Check if latest row has NaNs (e.g. not enough history for rolling window)
+            if latest_row.isna().any().any():
+                logger.warning(f"Cannot predict for {asset.name}: latest data incomplete.")
+                return []
+
+            predictions = []
+            for h, (model, metrics) in sorted(models.items()):
+                try:
+                    predictions.append(make_prediction(asset.symbol, model, latest_row.iloc[0], metrics))
+                except Exception as e:
+                    STAGE_FAILURES.inc(stage="inference", asset=asset.symbol)
+                    logger.error(f"Inference failed for {asset.name} at horizon {h}: {e}")
+            return predictions
+
+        except Exception as e:
+            logger.error(f"Inference failed for {asset.name}: {e}")
+            return []
+
+    def _train_horizons(
+        self, asset: Asset, template: ModelEngine, X: pd.DataFrame, targets: pd.DataFrame
+    ) -> dict[int, tuple[ModelEngine, dict[str, float]]]:
+        """
+        Trains the horizons in `targets` in one shared pass (fold indices and scaler fits are
+        computed once). If that pass fails, each horizon is retried on its own so one failing
+        horizon does not lose the others. Horizons without a model are logged and counted as
+        inference failures.
+        """
+        try:
+            trained = template.train_horizons(X, targets)
+        except Exception as e:
+            logger.warning(f"Joint training failed for {asset.name}, training horizons one by one: {e}")
+            trained = {}
+            for h in targets.columns:
+                try:
+                    trained.update(template.train_horizons(X, targets[[h]]))
+                except Exception as e:
+                    logger.error(f"Training failed for {asset.name} at horizon {h}: {e}")
+        for h in targets.columns:
+            if h not in trained:
+                STAGE_FAILURES.inc(stage="inference", asset=asset.symbol)
+                logger.error(f"No {template.model_type} model for {asset.name} at horizon {h}")
+        return trained
+
+    def run_backtest(
+        self, assets: list[Asset], model_type: str = "logistic", config: BacktestConfig | None = None
+    ) -> BacktestReport:
+        """
+        Walk-forward backtest of the model's signals on the stored features. Assets are
+        evaluated in parallel on the configured executor, then simulated together.
+        """
+        backtester = Backtester(config, model_type=model_type)
+        outcomes = self._map_assets("_backtest_asset", assets, backtester)
+        probabilities, prices = {}, {}
+        for asset, outcome in zip(assets, outcomes, strict=True):
+            STAGE_SECONDS.observe(outcome.duration_s, stage="backtest", asset=asset.symbol)
+            if not outcome.ok or outcome.value is None:
+                STAGE_FAILURES.inc(stage="backtest", asset=asset.symbol)
+                logger.error(f"Backtest failed for {asset.name}: {outcome.error}")
+                continue
+            probabilities[asset.symbol], prices[asset.symbol] = outcome.value
+        if not probabilities:
+            return BacktestReport()
+        return backtester.simulate(pd.DataFrame(probabilities), pd.DataFrame(prices))
+
+    def _backtest_asset(self, asset: Asset, backtester: Backtester) -> tuple[pd.Series, pd.Series]:
+        df = self._load_model_features(asset)
+        return backtester.walk_forward(self.engineer.create_dataset(df)), df["price"]
+
     def generate_insights(self, assets: list[Asset]) -> list[MarketInsight]:
         insights = []
         for asset in assets:
             try:
-                df = self.storage.load_features(asset.symbol)
-                latest = df.iloc[-1]
-                
-                # Simple heuristics
-                # Use float() to ensure python types for comparison
-                sma_50 = float(latest['sma_50'])
-                sma_200 = float(latest['sma_200'])
-                trend = "UP" if sma_50 > sma_200 else "DOWN"
-                
-                vol_30d = float(latest['vol_30d'])
-                vol_state = "HIGH" if vol_30d > 0.05 else "LOW" # 5% daily vol threshold
-                
-                rsi_14 = float(latest['rsi_14'])
-                regime = "TRENDING" if abs(rsi_14 - 50) > 10 else "RANGING"
-                
-                price = float(latest['price'])
-                drawdown = float(latest['drawdown'])
-                
-                summary = (
-                    f"Price ${price:.2f}. "
-                    f"Volatility is {vol_state} ({vol_30d:.1%}). "
-                    f"RSI at {rsi_14:.1f} suggests {regime.lower()} behavior."
-                )
-                
-                insights.append(MarketInsight(
-                    asset=asset.symbol,
-                    date=datetime.now(),
-                    trend=trend,
-                    volatility_state=vol_state,
-                    regime=regime,
-                    drawdown_pct=drawdown,
-                    summary=summary
-                ))
+                with STAGE_SECONDS.time(stage="insights", asset=asset.symbol):
+                    df = self._load_features(asset, columns=INSIGHT_COLUMNS, tail=1)
+                    insights.append(make_insight(asset.symbol, df.iloc[-1]))
             except Exception as e:
+                STAGE_FAILURES.inc(stage="insights", asset=asset.symbol)
                 logger.error(f" Insight generation failed for {asset.name}: {e}")
         return insights
 
-    def run_full_pipeline(self, assets: list[Asset], days: int):
+    def _map_assets(self, method: str, assets: list[Asset], *args: object) -> list[TaskOutcome]:
+        """Runs a per-asset method on the configured executor."""
+        if self.executor.backend != ExecutorBackend.PROCESS:
+            return self.executor.map(partial(_call_method, self, method, args), assets)
+
+        # Worker processes only see storage, so everything queued must be durable first
+        if self._context is not None:
+            self._context.flush()
+        outcomes: list[TaskOutcome] = self.executor.map(partial(_run_in_worker, self.root_dir, method, args), assets)
+        for outcome in outcomes:
+            if outcome.ok and outcome.value is not None:
+                # Workers send back the metrics they recorded along with the value
+                outcome.value, recorded = outcome.value
+                REGISTRY.merge(recorded)
+        return outcomes
+
+    def _collect_results(self, assets: list[Asset], stage: str, outcomes: list[TaskOutcome]) -> list[AssetResult]:
+        """Turns executor outcomes into AssetResults, including tasks that crashed outright."""
+        results = []
+        for asset, outcome in zip(assets, outcomes, strict=True):
+            if outcome.ok and isinstance(outcome.value, AssetResult):
+                results.append(outcome.value)
+            else:
+                results.append(
+                    AssetResult(asset.symbol, stage, False, duration_s=outcome.duration_s, error=outcome.error)
+                )
+        return results
+
+    def _record_results(self, results: list[AssetResult]) -> None:
+        for r in results:
+            STAGE_SECONDS.observe(r.duration_s, stage=r.stage, asset=r.asset)
+            if r.success:
+                STAGE_ROWS.inc(r.rows, stage=r.stage, asset=r.asset)
+            else:
+                STAGE_FAILURES.inc(stage=r.stage, asset=r.asset)
+
+    def run_full_pipeline(
+        self,
+        assets: list[Asset],
+        days: int,
+        incremental: bool = False,
+        panel: bool = False,
+        horizons: list[int] | None = None
+    ) -> RunSummary:
+        """
+        Runs all stages, handing each stage's frames to the next in memory while they are
+        persisted in the background. Returns once everything is durable.
+        """
         logger.info("--- Starting Pipeline ---")
-        self.fetch_data(assets, days)
-        self.build_features(assets)
-        preds = self.run_inference(assets)
-        insights = self.generate_insights(assets)
+        summary = RunSummary()
+
+        def timed(stage: str, fn: Callable[[], T]) -> T:
+            start = time.perf_counter()
+            value = fn()
+            summary.timings[stage] = time.perf_counter() - start
+            RUN_STAGE_SECONDS.observe(summary.timings[stage], stage=stage)
+            return value
+
+        self._context = RunContext()
+        try:
+            summary.results += timed("fetch", lambda: self.fetch_data(assets, days, incremental=incremental))
+            summary.results += timed(
+                "features", lambda: self.build_features(assets, incremental=incremental, panel=panel)
+            )
+            if len(assets) > 1:
+                summary.results += timed("cross_asset", lambda: self.build_cross_asset_features(assets))
+            summary.predictions = timed("inference", lambda: self.run_inference(assets, horizons=horizons))
+            summary.insights = timed("insights", lambda: self.generate_insights(assets))
+            timed("persist", self._context.flush)
+        finally:
+            self._context.close()
+            self._context = None
+        bump_generation(self.root_dir)
         
-        md_path = self.reporter.generate_markdown(insights, preds)
-        self.reporter.generate_json(insights, preds)
+        md_path = self.reporter.generate_markdown(summary.insights, summary.predictions)
+        self.reporter.generate_json(summary.insights, summary.predictions)
+        summary.report_path = str(md_path)
         
         logger.info(f"Report generated: {md_path}")
         logger.info("--- Pipeline Complete ---")
+        return summary
+
+    def _publish(self) -> None:
+        """Signals readers that new outputs are stored; deferred to the end of a full run."""
+        if self._context is None:
+            bump_generation(self.root_dir)
+
+
+def _call_method(service: PipelineService, method: str, args: tuple, asset: Asset) -> object:
+    return getattr(service, method)(asset, *args)
+
+
+# One service per worker process, reused across the tasks it runs
+_worker_services: dict[Path, PipelineService] = {}
+
+
+def _run_in_worker(root_dir: Path, method: str, args: tuple, asset: Asset) -> tuple[object, dict]:
+    """Returns the method's value with the metrics the task recorded, for the parent to merge."""
+    service = _worker_services.get(root_dir)
+    if service is None:
+        service = _worker_services[root_dir] = PipelineService(root_dir, workers=1)
+        service.cv_jobs = 1
+    if multiprocessing.parent_process() is None:
+        # Run inline (a single task), so metrics already went to this process's registry
+        return getattr(service, method)(asset, *args), {}
+    REGISTRY.reset()
+    value = getattr(service, method)(asset, *args)
+    return value, REGISTRY.state()
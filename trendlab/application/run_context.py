@@ -0,0 +1,84 @@
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Largest frame kept in memory per asset; bigger ones are re-read from storage
+DEFAULT_MAX_BYTES_PER_ASSET = 512 * 1024 * 1024
+
+
+class RunContext:
+    """
+    Hands stage outputs (raw and feature frames) to the next stage of one pipeline run.
+
+    - Frames are kept in memory and writes go to a background writer, so a stage never
+      waits for its own persistence or re-reads what the previous stage just produced.
+    - At most one frame per asset is held: putting features drops the asset's raw frame,
+      which no later stage needs, and frames over `max_bytes_per_asset` are not kept.
+    - Writes run in submission order on one thread; `wait(asset)` must be called before
+      reading that asset from storage, and `flush()` before the run is reported done.
+    """
+
+    def __init__(self, max_bytes_per_asset: int = DEFAULT_MAX_BYTES_PER_ASSET):
+        self.max_bytes_per_asset = max_bytes_per_asset
+        self._frames: dict[str, tuple[str, pd.DataFrame]] = {}
+        self._pending: dict[str, list[Future]] = {}
+        self._errors: list[str] = []
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trendlab-writer")
+
+    def get(self, kind: str, asset: str) -> pd.DataFrame | None:
+        with self._lock:
+            held = self._frames.get(asset)
+        return held[1] if held is not None and held[0] == kind else None
+
+    def put(self, kind: str, asset: str, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True).sum())
+        with self._lock:
+            if size <= self.max_bytes_per_asset:
+                self._frames[asset] = (kind, df)
+            else:
+                logger.info(f"{kind} frame for {asset} ({size / 2**20:.0f} MiB) exceeds the run budget, not kept")
+                self._frames.pop(asset, None)
+
+    def persist(self, asset: str, write: Callable[[], None]) -> None:
+        """Queues a storage write for `asset` on the background writer."""
+        future = self._writer.submit(write)
+        with self._lock:
+            self._pending.setdefault(asset, []).append(future)
+
+    def wait(self, asset: str) -> None:
+        """Blocks until every queued write of `asset` is durable."""
+        with self._lock:
+            pending = self._pending.pop(asset, [])
+        self._collect(asset, pending)
+
+    def flush(self) -> None:
+        """Waits for all queued writes. Raises if any of them failed."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        for asset, futures in pending.items():
+            self._collect(asset, futures)
+        with self._lock:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise RuntimeError(f"Failed to persist pipeline outputs: {'; '.join(errors)}")
+
+    def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._frames.clear()
+
+    def _collect(self, asset: str, futures: list[Future]) -> None:
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Background write failed for {asset}: {e}")
+                with self._lock:
+                    self._errors.append(f"{asset}: {e}")
@@ -0,0 +1,236 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from trendlab.analytics.compiled import CompiledModel
+from trendlab.analytics.cross_asset import join_cross_asset
+from trendlab.analytics.engine import ModelEngine
+from trendlab.domain.models import MarketInsight, Prediction
+from trendlab.domain.ports import ModelStore, StorageAdapter
+from trendlab.infrastructure.arrow_cache import ArrowFeatureCache
+from trendlab.utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Touched by every pipeline run that publishes new features or models
+GENERATION_MARKER = Path("data") / "generation"
+
+
+def bump_generation(root_dir: Path) -> None:
+    """Signals readers (e.g. API processes) that stored features/models changed."""
+    marker = root_dir / GENERATION_MARKER
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    tmp = marker.with_name(f".{marker.name}.{os.getpid()}.{threading.get_ident()}")
+    tmp.write_text(str(time.time_ns()))
+    os.replace(tmp, marker)
+
+
+def read_generation(root_dir: Path) -> int:
+    try:
+        return os.stat(root_dir / GENERATION_MARKER).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def feature_cache_from_env(root_dir: Path) -> ArrowFeatureCache | None:
+    """The memory-mapped feature cache is opt-in via TRENDLAB_FEATURE_CACHE=on."""
+    if os.getenv("TRENDLAB_FEATURE_CACHE", "off").lower() not in ("1", "on", "true"):
+        return None
+    cache_dir = Path(os.getenv("TRENDLAB_FEATURE_CACHE_DIR", str(root_dir / "data" / "cache" / "features")))
+    return ArrowFeatureCache(cache_dir, partial(read_generation, root_dir))
+
+
+def make_prediction(
+    symbol: str,
+    model: ModelEngine | CompiledModel,
+    latest: Mapping[str, float],
+    metrics: dict[str, float]
+) -> Prediction:
+    """Scores the most recent feature row ("today") to predict the direction `model.horizon` rows ahead."""
+    compiled = model.compile() if isinstance(model, ModelEngine) else model
+    prob_up = compiled.score_row(compiled.vector(latest))
+
+    # Heuristic signal generation
+    signal = "NEUTRAL"
+    if prob_up > 0.55:
+        signal = "BULLISH"
+    elif prob_up < 0.45:
+        signal = "BEARISH"
+
+    confidence = (abs(prob_up - 0.5) * 2)  # Scale 0.5-1.0 to 0-1
+
+    return Prediction(
+        asset=symbol,
+        date=datetime.now(),
+        model_name=model.model_type,
+        horizon_days=model.horizon,
+        probability_up=prob_up,
+        signal=signal,
+        confidence_score=confidence,
+        supporting_metrics=metrics
+    )
+
+
+# The only feature columns make_insight reads
+INSIGHT_COLUMNS = ["price", "sma_50", "sma_200", "vol_30d", "rsi_14", "drawdown"]
+
+
+def make_insight(symbol: str, latest: pd.Series) -> MarketInsight:
+    """Rule-based market read of the most recent feature row."""
+    # Simple heuristics
+    # Use float() to ensure python types for comparison
+    sma_50 = float(latest['sma_50'])
+    sma_200 = float(latest['sma_200'])
+    trend = "UP" if sma_50 > sma_200 else "DOWN"
+
+    vol_30d = float(latest['vol_30d'])
+    vol_state = "HIGH" if vol_30d > 0.05 else "LOW" # 5% daily vol threshold
+
+    rsi_14 = float(latest['rsi_14'])
+    regime = "TRENDING" if abs(rsi_14 - 50) > 10 else "RANGING"
+
+    price = float(latest['price'])
+    drawdown = float(latest['drawdown'])
+
+    summary = (
+        f"Price ${price:.2f}. "
+        f"Volatility is {vol_state} ({vol_30d:.1%}). "
+        f"RSI at {rsi_14:.1f} suggests {regime.lower()} behavior."
+    )
+
+    return MarketInsight(
+        asset=symbol,
+        date=datetime.now(),
+        trend=trend,
+        volatility_state=vol_state,
+        regime=regime,
+        drawdown_pct=drawdown,
+        summary=summary
+    )
+
+
+@dataclass
+class _CachedAsset:
+    latest_row: pd.DataFrame  # one row, target dropped
+    latest: dict[str, float] = field(default_factory=dict)  # the same row, for compiled models
+    models: dict[tuple[str, int], tuple[CompiledModel, dict[str, float]]] = field(default_factory=dict)
+
+
+class ServingCache:
+    """
+    In-process LRU of the latest feature row and fitted models per asset, for read endpoints.
+
+    A hit costs a dict lookup plus one compiled (NumPy) model evaluation. Entries are dropped when a pipeline
+    run bumps the generation marker (checked at most every `check_interval` seconds, so other
+    processes' runs are picked up too) or on an explicit `invalidate()`.
+    """
+
+    def __init__(
+        self,
+        root_dir: Path,
+        storage: StorageAdapter,
+        models: ModelStore,
+        capacity: int = 32,
+        check_interval: float = 1.0
+    ):
+        self.root_dir = root_dir
+        self.storage = storage
+        self.models = models
+        self.capacity = capacity
+        self.check_interval = check_interval
+        self._entries: OrderedDict[str, _CachedAsset] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = read_generation(root_dir)
+        self._checked_at = time.monotonic()
+
+    def prediction(self, symbol: str, model_type: str = "logistic", horizon: int = 1) -> Prediction | None:
+        entry = self._entry(symbol)
+        if entry is None:
+            return None
+        return self._predict(entry, symbol, model_type, horizon)
+
+    def predictions(self, symbol: str, model_type: str = "logistic") -> list[Prediction]:
+        """One prediction per horizon with a stored model, shortest first."""
+        entry = self._entry(symbol)
+        if entry is None:
+            return []
+        predictions = (self._predict(entry, symbol, model_type, h) for h in self.models.horizons(symbol, model_type))
+        return [p for p in predictions if p is not None]
+
+    def _predict(self, entry: _CachedAsset, symbol: str, model_type: str, horizon: int) -> Prediction | None:
+        cached = entry.models.get((model_type, horizon))
+        if cached is None:
+            artifact = self.models.load_latest(symbol, model_type, horizon=horizon)
+            if artifact is None:
+                return None
+            compiled = ModelEngine.from_artifact(artifact).compile()
+            cached = entry.models[(model_type, horizon)] = (compiled, artifact.metrics)
+        model, metrics = cached
+        # e.g. cross-asset columns the model was trained with, dropped because they went stale
+        missing = [c for c in model.feature_cols if c not in entry.latest]
+        if missing:
+            logger.warning(f"Latest features for {symbol} lack {missing} of the {model_type} {horizon}d model")
+            return None
+        return make_prediction(symbol, model, entry.latest, metrics)
+
+    def insight(self, symbol: str) -> MarketInsight | None:
+        entry = self._entry(symbol)
+        if entry is None:
+            return None
+        return make_insight(symbol, entry.latest_row.iloc[0])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, symbol: str) -> _CachedAsset | None:
+        self._check_generation()
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                self._entries.move_to_end(symbol)
+        CACHE_REQUESTS.inc(cache="serving", result="miss" if entry is None else "hit")
+        if entry is not None:
+            return entry
+
+        # Load outside the lock; a concurrent duplicate load is harmless
+        try:
+            df = self.storage.load_features(symbol, tail=1)
+        except FileNotFoundError:
+            return None
+        if df.empty:
+            return None
+        with contextlib.suppress(FileNotFoundError):
+            df = join_cross_asset(df, self.storage.load_cross_asset(symbol, tail=1))
+        latest_row = df.iloc[[-1]].drop(columns=['target_next_day_up'], errors='ignore')
+        if latest_row.isna().any().any():
+            logger.warning(f"Latest features for {symbol} are incomplete, not serving them")
+            return None
+
+        entry = _CachedAsset(latest_row, latest_row.iloc[0].to_dict())
+        with self._lock:
+            self._entries[symbol] = entry
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _check_generation(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        generation = read_generation(self.root_dir)
+        if generation != self._generation:
+            logger.info("New pipeline artifacts published, clearing serving cache")
+            self._generation = generation
+            self.invalidate()
@@ -1,11 +1,18 @@
+import json
 import logging
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
 import typer
 
-from trendlab.application.pipeline import PipelineService
 from trendlab.domain.models import Asset
 from trendlab.utils.logging import setup_logging
+from trendlab.utils.metrics import REGISTRY
+
+# The pipeline pulls in pandas, pyarrow and requests; it is imported once a command needs it,
+# so `--help` and argument errors return immediately
+if TYPE_CHECKING:
+    from trendlab.application.pipeline import PipelineService
 
 app = typer.Typer(
     name="trendlab",
@@ -22,22 +29,59 @@ ASSET_MAP = {
     "dot": Asset("dot", "Polkadot", "polkadot")
 }
 
-def get_service() -> PipelineService:
+WORKERS_HELP = "Parallel per-asset tasks for feature building and inference"
+BACKEND_HELP = "Executor backend for parallel stages: serial, thread, process"
+HORIZONS_HELP = "Rows ahead to predict (days for daily data); repeat for several horizons trained in one pass"
+
+def get_service(workers: int = 1, backend: str = "process") -> "PipelineService":
+    from trendlab.application.pipeline import PipelineService
+
     root = Path.cwd()
-    return PipelineService(root)
+    return PipelineService(root, workers=workers, backend=backend)
 
 @app.callback()
-def main(verbose: bool = False):
+def main(
+    ctx: typer.Context,
+    verbose: bool = False,
+    profile: bool = typer.Option(False, help="Print stage, storage, HTTP and cache metrics when the command ends"),
+    # Typer 0.9 does not understand `Path | None`
+    profile_json: Optional[Path] = typer.Option(None, help="Write the same metrics as JSON"),  # noqa: UP045
+):
     """
     TrendLab: Production-grade ML pipeline for crypto insights.
     """
     level = logging.DEBUG if verbose else logging.INFO
     setup_logging(level)
+    if profile:
+        ctx.call_on_close(print_profile)
+    if profile_json is not None:
+        ctx.call_on_close(lambda: profile_json.write_text(json.dumps(REGISTRY.snapshot(), indent=2)))
+
+def print_profile():
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Profile")
+    table.add_column("Metric")
+    table.add_column("Labels")
+    table.add_column("Count", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("Mean", justify="right")
+    for name, series in REGISTRY.snapshot().items():
+        name = name.removeprefix("trendlab_")
+        for row in series:
+            labels = ", ".join(f"{k}={v}" for k, v in row.items() if k not in ("value", "count", "sum", "mean"))
+            if "value" in row:
+                table.add_row(name, labels, "", f"{row['value']:,.0f}", "")
+            else:
+                table.add_row(name, labels, str(row["count"]), f"{row['sum']:.3f}s", f"{row['mean']:.3f}s")
+    Console(stderr=True).print(table)
 
 @app.command()
 def fetch(
     assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols (btc, eth, sol)"),
-    days: int = typer.Option(365, help="Days of history to fetch")
+    days: int = typer.Option(365, help="Days of history to fetch"),
+    incremental: bool = typer.Option(False, help="Only fetch data missing since the last stored point")
 ):
     """Fetch historical market data from CoinGecko."""
     service = get_service()
@@ -47,41 +91,122 @@ def fetch(
         typer.echo("No valid assets selected.")
         raise typer.Exit(code=1)
         
-    service.fetch_data(target_assets, days)
-    typer.echo(f"Fetched data for: {', '.join(a.symbol for a in target_assets)}")
+    results = service.fetch_data(target_assets, days, incremental=incremental)
+    fetched = [r.asset for r in results if r.success]
+    failed = [r for r in results if not r.success]
+
+    if fetched:
+        typer.echo(f"Fetched data for: {', '.join(fetched)}")
+    for r in failed:
+        typer.echo(f"Failed to fetch {r.asset}: {r.error}", err=True)
+    if failed:
+        raise typer.Exit(code=1)
 
 @app.command()
 def build_features(
-    assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols")
+    assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols"),
+    incremental: bool = typer.Option(False, help="Only compute features for rows added since the last build"),
+    panel: bool = typer.Option(False, help="Compute all assets in one vectorized pass"),
+    cross_asset: bool = typer.Option(False, help="Also compute correlation and beta to BTC, dispersion and breadth"),
+    workers: int = typer.Option(1, help=WORKERS_HELP),
+    backend: str = typer.Option("process", help=BACKEND_HELP)
 ):
     """Compute technical indicators and features."""
-    service = get_service()
+    service = get_service(workers, backend)
     target_assets = [ASSET_MAP[a.lower()] for a in assets if a.lower() in ASSET_MAP]
-    service.build_features(target_assets)
+    results = service.build_features(target_assets, incremental=incremental, panel=panel)
+    if cross_asset:
+        results += service.build_cross_asset_features(target_assets)
+    for r in results:
+        if not r.success:
+            typer.echo(f"Failed to build features for {r.asset}: {r.error}", err=True)
     typer.echo("Feature engineering complete.")
 
 @app.command()
 def train(
     assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols"),
-    model: str = typer.Option("logistic", help="Model type: logistic, boosting")
+    model: str = typer.Option("logistic", help="Model type: logistic, boosting, hist_boosting"),
+    retrain: bool = typer.Option(False, help="Ignore stored models and train from scratch"),
+    horizons: list[int] = typer.Option([1], help=HORIZONS_HELP),
+    workers: int = typer.Option(1, help=WORKERS_HELP),
+    backend: str = typer.Option("process", help=BACKEND_HELP)
 ):
     """Train models and output predictions."""
-    service = get_service()
+    service = get_service(workers, backend)
     target_assets = [ASSET_MAP[a.lower()] for a in assets if a.lower() in ASSET_MAP]
-    preds = service.run_inference(target_assets, model)
+    preds = service.run_inference(target_assets, model, retrain=retrain, horizons=horizons)
     
     for p in preds:
-        typer.echo(f"{p.asset.upper()}: {p.signal} ({p.probability_up:.1%} prob) - Conf: {p.confidence_score:.2f}")
+        typer.echo(
+            f"{p.asset.upper()} +{p.horizon_days}d: {p.signal} ({p.probability_up:.1%} prob) "
+            f"- Conf: {p.confidence_score:.2f}"
+        )
 
 @app.command()
 def run(
     assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols"),
-    days: int = typer.Option(365, help="Days of history to fetch")
+    days: int = typer.Option(365, help="Days of history to fetch"),
+    incremental: bool = typer.Option(False, help="Only fetch and featurize data added since the last run"),
+    panel: bool = typer.Option(False, help="Compute features for all assets in one vectorized pass"),
+    horizons: list[int] = typer.Option([1], help=HORIZONS_HELP),
+    workers: int = typer.Option(1, help=WORKERS_HELP),
+    backend: str = typer.Option("process", help=BACKEND_HELP)
 ):
     """Run the full pipeline end-to-end."""
-    service = get_service()
+    service = get_service(workers, backend)
     target_assets = [ASSET_MAP[a.lower()] for a in assets if a.lower() in ASSET_MAP]
-    service.run_full_pipeline(target_assets, days)
+    service.run_full_pipeline(target_assets, days, incremental=incremental, panel=panel, horizons=horizons)
+
+@app.command()
+def backtest(
+    assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols"),
+    model: str = typer.Option("logistic", help="Model type: logistic, boosting, hist_boosting"),
+    min_train: int = typer.Option(250, help="Rows before the first out-of-sample prediction"),
+    retrain_every: int = typer.Option(90, help="Rows between walk-forward refits"),
+    train_window: int = typer.Option(0, help="Rolling training window in rows (0 = expanding)"),
+    fee_bps: float = typer.Option(10.0, help="Fee per unit of turnover, in basis points"),
+    slippage_bps: float = typer.Option(5.0, help="Slippage per unit of turnover, in basis points"),
+    sizing: str = typer.Option("signal", help="Position sizing: signal, long_only, proportional"),
+    max_position: float = typer.Option(1.0, help="Position at full conviction"),
+    output: Optional[Path] = typer.Option(None, help="Write per-period returns as CSV"),  # noqa: UP045
+    workers: int = typer.Option(1, help=WORKERS_HELP),
+    backend: str = typer.Option("process", help=BACKEND_HELP)
+):
+    """Walk-forward backtest of the model's signals on stored features."""
+    from trendlab.analytics.backtest import BacktestConfig, Sizing
+
+    config = BacktestConfig(
+        min_train=min_train,
+        retrain_every=retrain_every,
+        train_window=train_window or None,
+        fee_bps=fee_bps,
+        slippage_bps=slippage_bps,
+        sizing=Sizing(sizing),
+        max_position=max_position
+    )
+    service = get_service(workers, backend)
+    target_assets = [ASSET_MAP[a.lower()] for a in assets if a.lower() in ASSET_MAP]
+    report = service.run_backtest(target_assets, model, config)
+
+    for name, m in report.metrics.items():
+        typer.echo(
+            f"{name.upper():<10} return {m['total_return']:>8.1%}  annual {m['annual_return']:>8.1%}  "
+            f"sharpe {m['sharpe']:>6.2f}  max DD {m['max_drawdown']:>7.1%}  turnover {m['turnover']:>6.1f}/yr  "
+            f"exposure {m['exposure']:>5.1%}"
+        )
+    if output is not None:
+        report.returns.to_csv(output)
+        typer.echo(f"Returns written to {output}")
+
+@app.command()
+def compact(
+    assets: list[str] = typer.Option(["btc", "eth"], help="List of asset symbols")
+):
+    """Merge the segment files left by incremental writes into one file per month."""
+    service = get_service()
+    for asset in [ASSET_MAP[a.lower()] for a in assets if a.lower() in ASSET_MAP]:
+        merged = service.storage.compact(asset.symbol)
+        typer.echo(f"{asset.symbol.upper()}: merged {merged} files")
 
 if __name__ == "__main__":
     app()
@@ -1,6 +1,13 @@
-from dataclasses import dataclass
-from datetime import datetime
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class AssetClass(str, Enum):
@@ -21,6 +28,114 @@ class MarketDataPoint:
     market_cap: float
     total_volume: float
 
+@dataclass(frozen=True)
+class MarketDataBatch:
+    """
+    Columnar market history: one NumPy array per field, aligned row by row.
+    Timestamps are UTC epoch milliseconds (int64), sorted ascending and unique.
+    """
+    timestamps: np.ndarray
+    price: np.ndarray
+    market_cap: np.ndarray
+    total_volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def empty(cls) -> "MarketDataBatch":
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0, dtype=np.float64) for _ in range(3)))
+
+    @classmethod
+    def from_points(cls, points: Sequence[MarketDataPoint]) -> "MarketDataBatch":
+        """Builds a batch from row objects. Naive datetimes are taken to be UTC."""
+        if not points:
+            return cls.empty()
+        ts = np.array([
+            int((p.timestamp if p.timestamp.tzinfo else p.timestamp.replace(tzinfo=timezone.utc)).timestamp() * 1000)
+            for p in points
+        ], dtype=np.int64)
+        order = np.argsort(ts, kind="stable")
+        return cls(
+            ts[order],
+            np.array([p.price for p in points], dtype=np.float64)[order],
+            np.array([p.market_cap for p in points], dtype=np.float64)[order],
+            np.array([p.total_volume for p in points], dtype=np.float64)[order],
+        )
+
+    @classmethod
+    def from_series(
+        cls,
+        prices: Sequence[Sequence[float]],
+        market_caps: Sequence[Sequence[float]],
+        total_volumes: Sequence[Sequence[float]]
+    ) -> "MarketDataBatch":
+        """
+        Builds a batch from `[timestamp_ms, value]` pairs.
+        Price timestamps define the rows; caps and volumes are joined on exact
+        timestamp matches and are NaN where the provider has no matching point.
+        """
+        price_ts, price_vals = _pairs_to_arrays(prices)
+        # Sort and keep the last value for duplicated timestamps
+        order = np.argsort(price_ts, kind="stable")
+        price_ts, price_vals = price_ts[order], price_vals[order]
+        keep = np.append(price_ts[1:] != price_ts[:-1], True) if len(price_ts) else np.empty(0, dtype=bool)
+        price_ts, price_vals = price_ts[keep], price_vals[keep]
+
+        return cls(
+            price_ts,
+            price_vals,
+            _align_on(price_ts, *_pairs_to_arrays(market_caps)),
+            _align_on(price_ts, *_pairs_to_arrays(total_volumes)),
+        )
+
+    def to_frame(self) -> "pd.DataFrame":
+        """Frame indexed by a UTC DatetimeIndex named "timestamp", as stored and loaded by ParquetStorage."""
+        import pandas as pd
+
+        index = pd.DatetimeIndex(pd.to_datetime(self.timestamps, unit="ms", utc=True), name="timestamp")
+        return pd.DataFrame(
+            {
+                "price": self.price,
+                "market_cap": self.market_cap,
+                "total_volume": self.total_volume
+            },
+            index=index,
+            copy=False
+        )
+
+    def to_points(self) -> list[MarketDataPoint]:
+        return [
+            MarketDataPoint(
+                timestamp=datetime.fromtimestamp(int(ts) / 1000, tz=timezone.utc),
+                price=float(p),
+                market_cap=float(c),
+                total_volume=float(v)
+            )
+            for ts, p, c, v in zip(self.timestamps, self.price, self.market_cap, self.total_volume, strict=True)
+        ]
+
+
+def _pairs_to_arrays(pairs: Sequence[Sequence[float]]) -> tuple[np.ndarray, np.ndarray]:
+    arr = np.asarray(pairs, dtype=np.float64).reshape(-1, 2)
+    return arr[:, 0].astype(np.int64), arr[:, 1]
+
+
+def _align_on(target_ts: np.ndarray, ts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Vectorized left join of (ts, values) onto `target_ts`; unmatched rows become NaN."""
+    out = np.full(len(target_ts), np.nan)
+    if len(ts) == 0 or len(target_ts) == 0:
+        return out
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+    # side="right" - 1 picks the last of any duplicated timestamps
+    pos = np.searchsorted(ts, target_ts, side="right") - 1
+    valid = pos >= 0
+    matched = np.zeros(len(target_ts), dtype=bool)
+    matched[valid] = ts[pos[valid]] == target_ts[valid]
+    out[matched] = values[pos[matched]]
+    return out
+
 @dataclass
 class Prediction:
     asset: str
@@ -41,3 +156,35 @@ class MarketInsight:
     regime: str
     drawdown_pct: float
     summary: str
+
+@dataclass
+class AssetResult:
+    """Outcome of one pipeline stage for one asset."""
+    asset: str
+    stage: str
+    success: bool
+    rows: int = 0
+    duration_s: float = 0.0
+    error: str | None = None
+
+@dataclass
+class RunSummary:
+    """What one end-to-end pipeline run did, per stage and per asset."""
+    results: list[AssetResult] = field(default_factory=list)  # fetch + features stages
+    predictions: list[Prediction] = field(default_factory=list)
+    insights: list[MarketInsight] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)  # seconds per stage
+    report_path: str | None = None
+
+@dataclass
+class ModelArtifact:
+    """A fitted model plus what is needed to decide whether it can be reused."""
+    asset: str
+    model_type: str
+    fingerprint: str  # hash of training data, feature columns and model configuration
+    estimator: Any    # fitted sklearn Pipeline
+    feature_cols: list[str]
+    metrics: dict[str, float]
+    created_at: datetime
+    trained_rows: int = 0
+    horizon: int = 1  # rows ahead the model predicts
@@ -1,30 +1,116 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Protocol
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import TYPE_CHECKING, Protocol
 
-import pandas as pd
+from trendlab.domain.models import Asset, MarketDataBatch, ModelArtifact
 
-from trendlab.domain.models import Asset, MarketDataPoint
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class DataProvider(Protocol):
     """Interface for fetching market data."""
     
-    def fetch_history(self, asset: Asset, days: int) -> list[MarketDataPoint]:
+    def fetch_history(self, asset: Asset, days: int) -> MarketDataBatch:
         ...
 
 class StorageAdapter(Protocol):
     """Interface for persisting data."""
     
-    def save_raw(self, asset: str, data: list[MarketDataPoint]) -> None:
+    def save_raw(self, asset: str, data: MarketDataBatch) -> None:
+        ...
+
+    def append_raw(self, asset: str, data: MarketDataBatch) -> None:
+        """Merges new points into the stored history, replacing any overlap."""
+        ...
+
+    def raw_time_range(self, asset: str) -> tuple[datetime, datetime] | None:
+        """Returns the first and last stored timestamps, or None if nothing is stored."""
         ...
         
-    def load_raw(self, asset: str) -> pd.DataFrame:
+    def load_raw(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        """
+        Loads stored history, optionally narrowed before it is read:
+        only `columns`, rows with start <= timestamp <= end, and of those the last `tail` rows.
+        """
+        ...
+
+    def iter_raw(self, asset: str, columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+        """Yields the stored history in time order, in pieces small enough to stream."""
         ...
 
     def save_features(self, asset: str, df: pd.DataFrame) -> None:
         ...
+
+    def save_features_chunks(self, asset: str, chunks: Iterable[pd.DataFrame]) -> int:
+        """Saves features arriving in time-ordered chunks as one write. Returns rows written."""
+        ...
+
+    def append_features(self, asset: str, df: pd.DataFrame) -> None:
+        """Upserts feature rows, replacing stored rows from the first new timestamp on."""
+        ...
+
+    def save_cross_asset(self, asset: str, df: pd.DataFrame) -> None:
+        """Replaces the stored cross-asset features of `asset`."""
+        ...
+
+    def load_cross_asset(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        """Loads stored cross-asset features, narrowed like `load_raw`."""
+        ...
+
+    def save_feature_state(self, asset: str, state: pd.DataFrame) -> None:
+        ...
+
+    def load_feature_state(self, asset: str) -> pd.DataFrame | None:
+        ...
         
-    def load_features(self, asset: str) -> pd.DataFrame:
+    def load_features(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        """Loads stored features, narrowed like `load_raw`."""
+        ...
+
+    def compact(self, asset: str) -> int:
+        """Merges the files accumulated by appends. Returns the number of files merged."""
+        ...
+
+class ModelStore(Protocol):
+    """Interface for persisting fitted models between runs."""
+
+    def load(self, asset: str, model_type: str, fingerprint: str, horizon: int = 1) -> ModelArtifact | None:
+        """Returns the artifact trained on exactly this data, if any."""
+        ...
+
+    def load_latest(self, asset: str, model_type: str, horizon: int = 1) -> ModelArtifact | None:
+        ...
+
+    def horizons(self, asset: str, model_type: str) -> list[int]:
+        """Horizons with a stored model of this type, ascending."""
+        ...
+
+    def save(self, artifact: ModelArtifact) -> None:
         ...
 
 class MLModel(ABC):
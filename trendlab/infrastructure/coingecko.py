@@ -1,13 +1,16 @@
 import logging
-import time
-from datetime import datetime, timezone
+import os
+from pathlib import Path
 from typing import Any
 
 import requests
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import Retry
 
-from trendlab.domain.models import Asset, MarketDataPoint
+from trendlab.domain.models import Asset, MarketDataBatch
 from trendlab.domain.ports import DataProvider
+from trendlab.infrastructure.http_cache import CacheMode, CachingAdapter, ResponseCache
+from trendlab.infrastructure.rate_limit import TokenBucket, backoff_delay, parse_retry_after
+from trendlab.utils.metrics import HTTP_REQUESTS, HTTP_RETRIES, HTTP_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -18,76 +21,120 @@ class CoinGeckoProvider(DataProvider):
     """
     
     BASE_URL = "https://api.coingecko.com/api/v3"
+    # Public tier budget; shared by all threads using this provider instance
+    REQUESTS_PER_MINUTE = 10
+    MAX_RATE_LIMIT_RETRIES = 5
     
-    def __init__(self, timeout: int = 30):
+    def __init__(
+        self,
+        timeout: int = 30,
+        requests_per_minute: float = REQUESTS_PER_MINUTE,
+        max_retries: int = MAX_RATE_LIMIT_RETRIES,
+        pool_size: int = 16,
+        rate_limiter: TokenBucket | None = None,
+        base_url: str | None = None,
+        cache_dir: Path | None = None,
+        cache_mode: CacheMode | str = CacheMode.OFF,
+        cache_ttl_seconds: float = 3600
+    ):
+        """
+        Args:
+            base_url: Overrides the API root, e.g. to point at a local stand-in server.
+                Defaults to $COINGECKO_BASE_URL, then the public endpoint.
+            cache_dir: Directory of the persistent response cache / recorded fixtures.
+            cache_mode: off, cache, record or replay (see CacheMode).
+        """
         self.timeout = timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.base_url = (base_url or os.getenv("COINGECKO_BASE_URL") or self.BASE_URL).rstrip("/")
+        self.rate_limiter = rate_limiter or TokenBucket.per_minute(requests_per_minute)
+        self.cache_mode = CacheMode(cache_mode)
+        self.cache = None
+        if cache_dir is not None and self.cache_mode != CacheMode.OFF:
+            self.cache = ResponseCache(cache_dir, ttl_seconds=cache_ttl_seconds)
         self.session = self._create_session()
 
     def _create_session(self) -> requests.Session:
         session = requests.Session()
+        # 429s are handled in fetch_history so they go through the shared limiter
         retries = Retry(
             total=5,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=[500, 502, 503, 504],
             allowed_methods=["GET"]
         )
-        session.mount("https://", HTTPAdapter(max_retries=retries))
+        # The adapter serves cache hits without touching the network or the rate limiter
+        adapter = CachingAdapter(
+            cache=self.cache,
+            mode=self.cache_mode,
+            rate_limiter=self.rate_limiter,
+            max_retries=retries,
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
         return session
 
-    def fetch_history(self, asset: Asset, days: int) -> list[MarketDataPoint]:
+    def fetch_history(self, asset: Asset, days: int) -> MarketDataBatch:
         """
         Fetches historical market data (price, market cap, volume).
+        Safe to call from several threads; network requests are paced by the shared rate limiter.
         
         Args:
             asset: Asset entity containing provider_id (e.g. 'bitcoin')
             days: Number of days of history
         """
-        endpoint = f"{self.BASE_URL}/coins/{asset.provider_id}/market_chart"
+        endpoint = f"{self.base_url}/coins/{asset.provider_id}/market_chart"
         params = {
             "vs_currency": "usd",
             "days": days,
             "interval": "daily"
         }
         
-        try:
-            logger.info(f"Fetching {days} days of data for {asset.name}...")
-            response = self.session.get(endpoint, params=params, timeout=self.timeout)  # type: ignore
-            response.raise_for_status()
-            data = response.json()
-            
-            return self._parse_response(data)
-            
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.error("Rate limit hit. Waiting 60s...")
-                time.sleep(60)
-                # Simple recursive retry once for demo purposes, 
-                # in prod use a decorator or robust poller
-                return self.fetch_history(asset, days)
-            logger.error(f"HTTP Error fetching data for {asset.name}: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error fetching data for {asset.name}: {e}")
-            raise
+        logger.info(f"Fetching {days} days of data for {asset.name}...")
+        attempt = 0
+        while True:
+            try:
+                with HTTP_SECONDS.time(endpoint="market_chart"):
+                    response = self.session.get(endpoint, params=params, timeout=self.timeout)  # type: ignore
+                self._record_response(response)
+                response.raise_for_status()
+                return self._parse_response(response.json())
 
-    def _parse_response(self, data: dict[str, Any]) -> list[MarketDataPoint]:
-        prices = data.get("prices", [])
-        market_caps = data.get("market_caps", [])
-        total_volumes = data.get("total_volumes", [])
-        
-        points = []
-        # CoinGecko returns [timestamp_ms, value]
-        # We assume lengths match. In prod, align strictly by timestamp.
-        for i in range(len(prices)):
-            ts_ms = prices[i][0]
-            dt = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
-            
-            point = MarketDataPoint(
-                timestamp=dt,
-                price=float(prices[i][1]),
-                market_cap=float(market_caps[i][1]) if i < len(market_caps) else 0.0,
-                total_volume=float(total_volumes[i][1]) if i < len(total_volumes) else 0.0
-            )
-            points.append(point)
-            
-        return points
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code != 429 or attempt >= self.max_retries:
+                    logger.error(f"HTTP Error fetching data for {asset.name}: {e}")
+                    raise
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                delay = backoff_delay(attempt, retry_after=retry_after)
+                logger.warning(
+                    f"Rate limit hit for {asset.name} (attempt {attempt + 1}/{self.max_retries}). "
+                    f"Backing off {delay:.1f}s"
+                )
+                # Pausing the shared bucket backs off every worker, not just this one
+                self.rate_limiter.pause(delay)
+                HTTP_RETRIES.inc(reason="rate_limit")
+                attempt += 1
+            except Exception as e:
+                if isinstance(e, requests.exceptions.RequestException):
+                    # No response at all, e.g. connection failures or exhausted 5xx retries
+                    HTTP_REQUESTS.inc(endpoint="market_chart", status="error")
+                logger.error(f"Unexpected error fetching data for {asset.name}: {e}")
+                raise
+
+    def _record_response(self, response: requests.Response) -> None:
+        HTTP_REQUESTS.inc(endpoint="market_chart", status=response.status_code)
+        # 5xx retries happen inside urllib3; its retry history is kept on the raw response
+        retries = getattr(response.raw, "retries", None)
+        if retries is not None and retries.history:
+            HTTP_RETRIES.inc(len(retries.history), reason="server_error")
+
+    def _parse_response(self, data: dict[str, Any]) -> MarketDataBatch:
+        # CoinGecko returns [timestamp_ms, value] pairs per series; they are joined on timestamp
+        return MarketDataBatch.from_series(
+            data.get("prices", []),
+            data.get("market_caps", []),
+            data.get("total_volumes", [])
+        )
@@ -0,0 +1,253 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from trendlab.infrastructure.rate_limit import TokenBucket
+from trendlab.utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+CACHE_STATUS_HEADER = "X-TrendLab-Cache"
+
+
+class CacheMode(str, Enum):
+    OFF = "off"          # always go to the network, store nothing
+    CACHE = "cache"      # serve fresh entries, revalidate stale ones
+    RECORD = "record"    # always go to the network and store every response
+    REPLAY = "replay"    # never go to the network; missing entries are errors
+
+
+class ReplayMissError(requests.exceptions.ConnectionError):
+    """Raised in replay mode when no recorded response exists for a request."""
+
+
+class ResponseCache:
+    """
+    Persistent response store keyed by method, endpoint and normalized params.
+    Each entry is a body file plus a JSON metadata file; the metadata mtime is the
+    LRU clock and is bumped on every hit.
+
+    Entry sizes are tracked in memory (seeded by one directory scan), so a write only
+    scans the directory when it pushes the cache over `max_bytes`. Eviction then goes
+    down to `evict_to` of the budget, so the next writes do not scan again right away.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        evict_to: float = 0.9
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.evict_to = evict_to
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._sizes: dict[str, int] | None = None
+        self._total = 0
+
+    @staticmethod
+    def key_for(method: str, url: str) -> str:
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        normalized = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+        return hashlib.sha256(f"{method.upper()} {normalized}".encode()).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        meta_path = self._meta_path(key)
+        body_path = self._body_path(key)
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            logger.warning(f"Dropping unreadable cache entry {key}")
+            self._remove(key)
+            return None
+        meta["body"] = body_path.read_bytes()
+        return meta
+
+    def is_fresh(self, entry: dict[str, Any]) -> bool:
+        return time.time() - float(entry["stored_at"]) < self.ttl_seconds
+
+    def put(self, key: str, response: requests.Response) -> None:
+        meta = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "stored_at": time.time(),
+        }
+        payload = json.dumps(meta).encode()
+        self._atomic_write(self._body_path(key), response.content)
+        self._atomic_write(self._meta_path(key), payload)
+        self._track(key, len(response.content) + len(payload))
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def refresh(self, key: str, entry: dict[str, Any], headers: CaseInsensitiveDict) -> None:
+        """Marks an entry fresh again after a 304, merging any updated validators."""
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        for name in ("ETag", "Last-Modified", "Cache-Control", "Expires"):
+            if name in headers:
+                meta["headers"][name] = headers[name]
+        meta["stored_at"] = time.time()
+        payload = json.dumps(meta).encode()
+        self._atomic_write(self._meta_path(key), payload)
+        self._track(key, len(entry["body"]) + len(payload))
+
+    def touch(self, key: str) -> None:
+        with contextlib.suppress(OSError):
+            os.utime(self._meta_path(key))
+
+    def evict(self) -> None:
+        """
+        Removes least recently used entries once the cache exceeds `max_bytes`, down to
+        `evict_to` of it. Rescans the directory, which also picks up other processes' writes.
+        """
+        entries = self._scan()
+        total = sum(size for _, _, size in entries)
+        self._sizes = {key: size for _, key, size in entries}
+        self._total = total
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * self.evict_to
+        for _, key, size in sorted(entries):
+            self._remove(key)
+            total -= size
+            if total <= target:
+                break
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        """(last used, key, bytes) of every entry on disk."""
+        entries = []
+        for meta_path in self.cache_dir.glob("*.json"):
+            key = meta_path.stem
+            try:
+                meta_stat = meta_path.stat()
+                size = meta_stat.st_size + self._body_path(key).stat().st_size
+            except OSError:
+                continue
+            entries.append((meta_stat.st_mtime, key, size))
+        return entries
+
+    def _track(self, key: str, size: int) -> None:
+        if self._sizes is None:
+            # First write of this instance: seed the index from what is already on disk
+            self._sizes = {k: s for _, k, s in self._scan()}
+            self._total = sum(self._sizes.values())
+        self._total += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+
+    def _remove(self, key: str) -> None:
+        for path in (self._meta_path(key), self._body_path(key)):
+            path.unlink(missing_ok=True)
+        if self._sizes is not None:
+            self._total -= self._sizes.pop(key, 0)
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.body"
+
+    def _atomic_write(self, path: Path, payload: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Transport adapter that answers from a ResponseCache when it can and only
+    spends a rate limit token when a request actually goes to the network.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache | None = None,
+        mode: CacheMode = CacheMode.OFF,
+        rate_limiter: TokenBucket | None = None,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.mode = CacheMode(mode) if cache is not None else CacheMode.OFF
+        self.rate_limiter = rate_limiter
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        if self.mode == CacheMode.OFF or self.cache is None or request.method != "GET":
+            return self._send_network(request, **kwargs)
+
+        key = self.cache.key_for(request.method, request.url or "")
+        entry = self.cache.get(key)
+
+        if self.mode == CacheMode.REPLAY:
+            CACHE_REQUESTS.inc(cache="http", result="miss" if entry is None else "hit")
+            if entry is None:
+                raise ReplayMissError(f"No recorded response for {request.url}", request=request)
+            return self._build_response(request, entry, "REPLAY")
+
+        if self.mode == CacheMode.CACHE and entry is not None:
+            if self.cache.is_fresh(entry):
+                self.cache.touch(key)
+                CACHE_REQUESTS.inc(cache="http", result="hit")
+                return self._build_response(request, entry, "HIT")
+            self._add_validators(request, entry)
+
+        response = self._send_network(request, **kwargs)
+
+        # A revalidated entry still cost a request, so it does not count as a hit
+        CACHE_REQUESTS.inc(cache="http", result="miss")
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(key, entry, response.headers)
+            return self._build_response(request, entry, "REVALIDATED")
+        if response.status_code == 200:
+            self.cache.put(key, response)
+            response.headers[CACHE_STATUS_HEADER] = "MISS"
+        return response
+
+    def _send_network(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return super().send(request, **kwargs)
+
+    def _add_validators(self, request: requests.PreparedRequest, entry: dict[str, Any]) -> None:
+        headers = CaseInsensitiveDict(entry["headers"])
+        if "ETag" in headers:
+            request.headers["If-None-Match"] = headers["ETag"]
+        if "Last-Modified" in headers:
+            request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+    def _build_response(
+        self, request: requests.PreparedRequest, entry: dict[str, Any], status: str
+    ) -> requests.Response:
+        response = requests.Response()
+        response.status_code = int(entry["status_code"])
+        response.reason = entry.get("reason") or ""
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.headers[CACHE_STATUS_HEADER] = status
+        response.encoding = entry.get("encoding")
+        response.url = request.url or entry["url"]
+        response.request = request
+        response._content = entry["body"]
+        return response
@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from trendlab.domain.models import ModelArtifact
+from trendlab.domain.ports import ModelStore
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry(ModelStore):
+    """
+    Local file system model store using joblib.
+
+    Layout: <base_dir>/<asset>/<key>-<fingerprint>.joblib plus a JSON sidecar
+    with the metadata, so lookups and eviction never unpickle a model. The key is the
+    model type, suffixed with `@<h>d` for horizons other than 1.
+    """
+
+    def __init__(self, base_dir: Path, keep_last: int = 5, max_age_days: float | None = 30):
+        self.base_dir = base_dir
+        self.keep_last = keep_last
+        self.max_age = timedelta(days=max_age_days) if max_age_days is not None else None
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def load(self, asset: str, model_type: str, fingerprint: str, horizon: int = 1) -> ModelArtifact | None:
+        path = self._model_path(asset, _key(model_type, horizon), fingerprint)
+        if not path.exists():
+            return None
+        return self._read(path)
+
+    def load_latest(self, asset: str, model_type: str, horizon: int = 1) -> ModelArtifact | None:
+        entries = self._entries(asset, _key(model_type, horizon))
+        if not entries:
+            return None
+        _, meta_path = entries[-1]
+        return self._read(meta_path.with_suffix(".joblib"))
+
+    def horizons(self, asset: str, model_type: str) -> list[int]:
+        """Horizons with at least one stored model, shortest first."""
+        horizons = set()
+        for meta_path in (self.base_dir / asset).glob(f"{model_type}*.json"):
+            key = meta_path.stem.split("-", 1)[0]
+            if key == model_type:
+                horizons.add(1)
+            elif key.startswith(f"{model_type}@") and key.endswith("d") and key[len(model_type) + 1:-1].isdigit():
+                horizons.add(int(key[len(model_type) + 1:-1]))
+        return sorted(horizons)
+
+    def save(self, artifact: ModelArtifact) -> None:
+        path = self._model_path(artifact.asset, _key(artifact.model_type, artifact.horizon), artifact.fingerprint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Model first, sidecar last: a listed sidecar always has a complete model next to it
+        import joblib
+
+        self._atomic_write(path, lambda f: joblib.dump(artifact, f))
+        meta = {
+            "asset": artifact.asset,
+            "model_type": artifact.model_type,
+            "fingerprint": artifact.fingerprint,
+            "feature_cols": artifact.feature_cols,
+            "metrics": artifact.metrics,
+            "created_at": artifact.created_at.isoformat(),
+            "trained_rows": artifact.trained_rows,
+            "horizon": artifact.horizon,
+        }
+        self._atomic_write(path.with_suffix(".json"), lambda f: f.write(json.dumps(meta, indent=2).encode()))
+        logger.info(f"Saved {artifact.model_type} model for {artifact.asset} to {path}")
+        self.evict(artifact.asset)
+
+    def evict(self, asset: str) -> int:
+        """Keeps the newest `keep_last` artifacts per model type and horizon and drops any older than `max_age`."""
+        removed = 0
+        now = datetime.now(timezone.utc)
+        keys = {p.stem.split("-", 1)[0] for p in (self.base_dir / asset).glob("*.json")}
+        for key in keys:
+            entries = self._entries(asset, key)
+            for i, (created_at, meta_path) in enumerate(entries):
+                is_old = self.max_age is not None and now - created_at > self.max_age
+                is_surplus = i < len(entries) - self.keep_last
+                # Never evict the newest artifact, however old it is
+                if (is_old or is_surplus) and i < len(entries) - 1:
+                    meta_path.with_suffix(".joblib").unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} stale model artifacts for {asset}")
+        return removed
+
+    def _entries(self, asset: str, key: str) -> list[tuple[datetime, Path]]:
+        """Sidecars of one asset and model key, oldest first."""
+        entries = []
+        for meta_path in (self.base_dir / asset).glob(f"{key}-*.json"):
+            try:
+                created_at = datetime.fromisoformat(json.loads(meta_path.read_text())["created_at"])
+            except (OSError, ValueError, KeyError):
+                continue
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            entries.append((created_at, meta_path))
+        return sorted(entries)
+
+    def _read(self, path: Path) -> ModelArtifact | None:
+        import joblib
+
+        try:
+            artifact = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable model artifact {path}: {e}")
+            return None
+        return artifact if isinstance(artifact, ModelArtifact) else None
+
+    def _model_path(self, asset: str, key: str, fingerprint: str) -> Path:
+        return self.base_dir / asset / f"{key}-{fingerprint}.joblib"
+
+    def _atomic_write(self, path: Path, write) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def _key(model_type: str, horizon: int) -> str:
+    return model_type if horizon == 1 else f"{model_type}@{horizon}d"
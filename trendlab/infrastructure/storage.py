@@ -1,60 +1,551 @@
 import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
 
-from trendlab.domain.models import MarketDataPoint
+from trendlab.domain.models import MarketDataBatch, MarketDataPoint
 from trendlab.domain.ports import StorageAdapter
+from trendlab.infrastructure.arrow_cache import ArrowFeatureCache
+from trendlab.utils.metrics import STORAGE_BYTES, STORAGE_ROWS, STORAGE_SECONDS
 
 logger = logging.getLogger(__name__)
 
+# Hive-style layout: <kind>/asset=<symbol>/year=<yyyy>/month=<m>/seg-*.parquet
+PARTITIONING = ds.partitioning(pa.schema([("year", pa.int16()), ("month", pa.int8())]), flavor="hive")
+INDEX = "timestamp"
+
+# seg-<seq>-<rank>-<write id>-<replace-from ns | all | none>-<part>of<parts>.parquet
+SEGMENT_NAME = re.compile(r"seg-(\d+)-(\d)-([0-9a-f]+)-(all|none|-?\d+)-(\d+)of(\d+)\.parquet")
+REPLACE_ALL = -(2 ** 63)
+# Appends between automatic compactions, and the row group size compaction writes
+COMPACT_THRESHOLD = 32
+COMPACT_ROW_GROUP = 128 * 1024
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """
+    One immutable file of a dataset. A write publishes one segment per month it touches,
+    all sharing `seq` and `write_id`. `replace_from` hides rows of older writes with
+    timestamp >= replace_from (in every month), which is how upserts work without rewriting.
+    """
+    path: Path
+    year: int
+    month: int
+    seq: int
+    rank: int  # compacted files sort after the writes they merge, which share their seq
+    write_id: str
+    replace_from: int | None
+    parts: int
+
+    @property
+    def order(self) -> tuple[int, int]:
+        return self.seq, self.rank
+
+
 class ParquetStorage(StorageAdapter):
     """
     Local file system storage using Parquet format.
+
+    Raw data and features are append-only datasets partitioned by asset and year/month:
+    - Every write adds small immutable segment files (staged, then published with an atomic
+      rename), so write cost scales with the new rows and readers never see partial files.
+    - Reads merge the visible segments, pushing column projection and time ranges down to
+      pyarrow and skipping months outside the range.
+    - `compact` merges segments into one large file per month; it also runs automatically
+      once an asset accumulates `compact_threshold` writes.
+    Files from the former one-file-per-asset layout are still read and are migrated on the next write.
     """
-    
-    def __init__(self, base_dir: Path):
+
+    def __init__(
+        self,
+        base_dir: Path,
+        compact_threshold: int = COMPACT_THRESHOLD,
+        feature_cache: ArrowFeatureCache | None = None
+    ):
+        """
+        Args:
+            feature_cache: Optional memory-mapped cache that `load_features` serves full
+                frames from; narrowed loads are then sliced in memory.
+        """
         self.base_dir = base_dir
+        self.feature_cache = feature_cache
         self.raw_dir = base_dir / "data" / "raw"
         self.processed_dir = base_dir / "data" / "processed"
-        
+        self.features_dir = self.processed_dir / "features"
+        self.cross_asset_dir = self.processed_dir / "cross_asset"
+        self.compact_threshold = compact_threshold
+
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.processed_dir.mkdir(parents=True, exist_ok=True)
 
-    def save_raw(self, asset: str, data: list[MarketDataPoint]) -> None:
+    def save_raw(self, asset: str, data: MarketDataBatch | list[MarketDataPoint]) -> None:
         if not data:
             logger.warning(f"No data to save for {asset}")
             return
-            
-        records = [
-            {
-                "timestamp": d.timestamp,
-                "price": d.price,
-                "market_cap": d.market_cap,
-                "total_volume": d.total_volume
-            }
-            for d in data
-        ]
-        df = pd.DataFrame(records)
-        df.set_index("timestamp", inplace=True)
-        
-        path = self.raw_dir / f"{asset}.parquet"
-        df.to_parquet(path)
+
+        df = self._batch_to_frame(data)
+        path = self.raw_dir / f"asset={asset}"
+        self._replace(path, df, legacy=self.raw_dir / f"{asset}.parquet")
         logger.info(f"Saved raw data for {asset} to {path}")
 
-    def load_raw(self, asset: str) -> pd.DataFrame:
-        path = self.raw_dir / f"{asset}.parquet"
+    def append_raw(self, asset: str, data: MarketDataBatch | list[MarketDataPoint]) -> None:
+        """
+        Merges a delta into the stored history.
+        Stored rows at or after the first new timestamp are replaced by the delta,
+        so a re-fetched (possibly revised) overlap never produces duplicates.
+        """
+        if not data:
+            logger.warning(f"No new data to append for {asset}")
+            return
+
+        new_df = self._batch_to_frame(data)
+        path = self.raw_dir / f"asset={asset}"
+        self._upsert(path, self.raw_dir / f"{asset}.parquet", new_df)
+        logger.info(f"Appended {len(new_df)} rows for {asset} to {path}")
+
+    def raw_time_range(self, asset: str) -> tuple[datetime, datetime] | None:
+        path = self.raw_dir / f"asset={asset}"
+        legacy = self.raw_dir / f"{asset}.parquet"
         if not path.exists():
+            if not legacy.exists():
+                return None
+            index = pd.read_parquet(legacy, columns=[]).index
+        else:
+            # Only timestamps are read, from the oldest and newest months
+            first = self._read(path, legacy, [], None, None, head=1)
+            last = self._read(path, legacy, [], None, None, tail=1)
+            assert first is not None and last is not None
+            index = first.index.append(last.index)
+        if index.empty:
+            return None
+        return index.min().to_pydatetime(), index.max().to_pydatetime()
+
+    def load_raw(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        df = self._read(
+            self.raw_dir / f"asset={asset}", self.raw_dir / f"{asset}.parquet", columns, start, end, tail=tail
+        )
+        if df is None:
             raise FileNotFoundError(f"No raw data found for {asset}")
-        return pd.read_parquet(path)
+        return df
+
+    def iter_raw(self, asset: str, columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+        """
+        Stored history in time order, one month partition at a time, so callers never
+        hold more than a month of raw rows. Legacy single files are yielded whole.
+        """
+        path = self.raw_dir / f"asset={asset}"
+        if not path.exists():
+            yield self.load_raw(asset, columns)
+            return
+        for year, month in sorted({(s.year, s.month) for s in self._segments(path)}):
+            first = pd.Timestamp(year=year, month=month, day=1, tz="UTC")
+            last = first + pd.offsets.MonthBegin(1) - pd.Timedelta(1, "ns")
+            df = self.load_raw(asset, columns, start=first, end=last)
+            if not df.empty:
+                yield df
 
     def save_features(self, asset: str, df: pd.DataFrame) -> None:
-        path = self.processed_dir / f"{asset}_features.parquet"
-        df.to_parquet(path)
+        path = self.features_dir / f"asset={asset}"
+        self._replace(path, df, legacy=self.processed_dir / f"{asset}_features.parquet")
+        if self.feature_cache is not None:
+            self.feature_cache.invalidate(asset)
         logger.info(f"Saved features for {asset} to {path}")
-        
-    def load_features(self, asset: str) -> pd.DataFrame:
-        path = self.processed_dir / f"{asset}_features.parquet"
-        if not path.exists():
+
+    def save_features_chunks(self, asset: str, chunks: Iterable[pd.DataFrame]) -> int:
+        """
+        Like `save_features` for a frame produced piece by piece (e.g. by `FeatureEngineer.iter_features`):
+        each chunk is staged as it arrives and all of them are published as one write. Returns rows written.
+        """
+        path = self.features_dir / f"asset={asset}"
+        rows = self._replace(path, chunks, legacy=self.processed_dir / f"{asset}_features.parquet")
+        if self.feature_cache is not None:
+            self.feature_cache.invalidate(asset)
+        logger.info(f"Saved {rows} feature rows for {asset} to {path} in chunks")
+        return rows
+
+    def load_features(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        if self.feature_cache is not None:
+            df = self.feature_cache.get(asset, lambda: self._load_features(asset))
+            return self._slice(df, columns, start, end, tail)
+        return self._load_features(asset, columns, start, end, tail)
+
+    def _load_features(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        df = self._read(
+            self.features_dir / f"asset={asset}",
+            self.processed_dir / f"{asset}_features.parquet",
+            columns, start, end, tail=tail
+        )
+        if df is None:
             raise FileNotFoundError(f"No features found for {asset}")
-        return pd.read_parquet(path)
+        return df
+
+    def append_features(self, asset: str, df: pd.DataFrame) -> None:
+        """Upserts feature rows, replacing stored rows from the first new timestamp on."""
+        if df.empty:
+            return
+        path = self.features_dir / f"asset={asset}"
+        self._upsert(path, self.processed_dir / f"{asset}_features.parquet", df)
+        if self.feature_cache is not None:
+            self.feature_cache.invalidate(asset)
+        logger.info(f"Appended {len(df)} feature rows for {asset} to {path}")
+
+    def save_cross_asset(self, asset: str, df: pd.DataFrame) -> None:
+        path = self.cross_asset_dir / f"asset={asset}"
+        self._replace(path, df, legacy=self.processed_dir / f"{asset}_cross_asset.parquet")
+        logger.info(f"Saved cross-asset features for {asset} to {path}")
+
+    def load_cross_asset(
+        self,
+        asset: str,
+        columns: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        tail: int | None = None
+    ) -> pd.DataFrame:
+        df = self._read(
+            self.cross_asset_dir / f"asset={asset}",
+            self.processed_dir / f"{asset}_cross_asset.parquet",
+            columns, start, end, tail=tail
+        )
+        if df is None:
+            raise FileNotFoundError(f"No cross-asset features found for {asset}")
+        return df
+
+    def save_feature_state(self, asset: str, state: pd.DataFrame) -> None:
+        path = self.processed_dir / f"{asset}_state.parquet"
+        fd, tmp = tempfile.mkstemp(dir=self.processed_dir, prefix=".tmp-")
+        os.close(fd)
+        try:
+            state.to_parquet(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def load_feature_state(self, asset: str) -> pd.DataFrame | None:
+        """Returns the raw tail saved with the features, or None if either is missing."""
+        state_path = self.processed_dir / f"{asset}_state.parquet"
+        has_features = (
+            (self.features_dir / f"asset={asset}").exists()
+            or (self.processed_dir / f"{asset}_features.parquet").exists()
+        )
+        if not state_path.exists() or not has_features:
+            return None
+        return pd.read_parquet(state_path)
+
+    def compact(self, asset: str) -> int:
+        """Merges the raw and feature segments of an asset into one file per month. Returns files merged."""
+        merged = 0
+        for path in (self.raw_dir / f"asset={asset}", self.features_dir / f"asset={asset}"):
+            merged += self._compact(path)
+        return merged
+
+    def _replace(self, path: Path, frames: pd.DataFrame | Iterable[pd.DataFrame], legacy: Path) -> int:
+        """Publishes `frames` as the whole dataset, then removes the files it supersedes."""
+        superseded = self._segments(path)
+        rows = self._write_segments(path, frames, replace_from=REPLACE_ALL)
+        self._remove(superseded)
+        legacy.unlink(missing_ok=True)
+        return rows
+
+    def _upsert(self, path: Path, legacy: Path, new_df: pd.DataFrame) -> None:
+        """Appends a segment that hides stored rows from the first new timestamp on; nothing is rewritten."""
+        if not path.exists() and legacy.exists():
+            # Legacy single file: migrate it in the same write
+            existing = pd.read_parquet(legacy)
+            kept = existing[existing.index < self._timestamp(new_df.index.min())]
+            merged = pd.concat([kept, new_df])
+            self._replace(path, merged[~merged.index.duplicated(keep="last")].sort_index(), legacy)
+            return
+
+        first_new = self._timestamp(new_df.index.min())
+        self._write_segments(path, new_df, replace_from=first_new.value)
+        if len({s.write_id for s in self._segments(path)}) > self.compact_threshold:
+            self._compact(path)
+
+    def _compact(self, path: Path) -> int:
+        segments = self._segments(path)
+        months = {(s.year, s.month) for s in segments}
+        if len(segments) <= len(months):
+            return 0
+
+        df = self._read_segments(path, segments, None, None, None)
+        # Same seq as the newest merged write but a higher rank: it supersedes exactly the merged
+        # files, while writes published during compaction (higher seq) still win over it
+        newest = max(s.seq for s in segments)
+        self._write_segments(path, df, replace_from=REPLACE_ALL, seq=newest, rank=1, row_group=COMPACT_ROW_GROUP)
+        self._remove(segments)
+        logger.info(f"Compacted {len(segments)} segments into {len(months)} files in {path}")
+        return len(segments)
+
+    def _read(
+        self,
+        path: Path,
+        legacy: Path,
+        columns: list[str] | None,
+        start: datetime | None,
+        end: datetime | None,
+        tail: int | None = None,
+        head: int | None = None
+    ) -> pd.DataFrame | None:
+        if not path.exists():
+            if not legacy.exists():
+                return None
+            df = self._slice(pd.read_parquet(legacy, columns=columns), None, start, end, None)
+            return self._limit(df, tail, head)
+
+        with STORAGE_SECONDS.time(op="read", kind=path.parent.name):
+            try:
+                return self._read_segments(path, self._segments(path), columns, start, end, tail, head)
+            except FileNotFoundError:
+                # A concurrent compaction removed files after they were listed; the merged file is published
+                return self._read_segments(path, self._segments(path), columns, start, end, tail, head)
+
+    def _read_segments(
+        self,
+        path: Path,
+        segments: list[_Segment],
+        columns: list[str] | None,
+        start: datetime | None,
+        end: datetime | None,
+        tail: int | None = None,
+        head: int | None = None
+    ) -> pd.DataFrame:
+        lower = self._timestamp(start) if start is not None else None
+        upper = self._timestamp(end) if end is not None else None
+
+        # A segment's rows stay visible below the smallest replace_from of any later write
+        visible_until: dict[_Segment, int | None] = {}
+        cutoff: int | None = None
+        for _, group in self._by_write(segments):
+            for segment in group:
+                visible_until[segment] = cutoff
+            replace_from = [s.replace_from for s in group if s.replace_from is not None]
+            if replace_from:
+                cutoff = min(replace_from) if cutoff is None else min(cutoff, *replace_from)
+
+        months = sorted({(s.year, s.month) for s in segments})
+        # Whole months outside the requested range are never opened
+        months = [
+            m for m in months
+            if (lower is None or m >= (lower.year, lower.month)) and (upper is None or m <= (upper.year, upper.month))
+        ]
+        if tail is not None:
+            months.reverse()
+
+        tables: list[pa.Table] = []
+        rows = 0
+        opened = 0
+        for year, month in months:
+            for segment in segments:
+                if (segment.year, segment.month) != (year, month):
+                    continue
+                table = self._read_file(segment, columns, lower, upper, visible_until[segment])
+                tables.append(table)
+                rows += table.num_rows
+                opened += segment.path.stat().st_size
+            # Months are read in order, so only whole months are needed for head/tail
+            limit = tail if tail is not None else head
+            if limit is not None and rows >= limit:
+                break
+
+        asset = path.name.split("=", 1)[1]
+        STORAGE_BYTES.inc(opened, op="read", kind=path.parent.name, asset=asset)
+        STORAGE_ROWS.inc(rows, op="read", kind=path.parent.name, asset=asset)
+
+        if not tables:
+            return pd.DataFrame(columns=columns or [], index=pd.DatetimeIndex([], tz="UTC", name=INDEX))
+        df = pa.concat_tables(tables, promote_options="default").to_pandas().set_index(INDEX).sort_index()
+        return self._limit(df, tail, head)
+
+    def _read_file(
+        self,
+        segment: _Segment,
+        columns: list[str] | None,
+        lower: pd.Timestamp | None,
+        upper: pd.Timestamp | None,
+        visible_until: int | None
+    ) -> pa.Table:
+        dataset = ds.dataset(segment.path, format="parquet")
+        names = [n for n in dataset.schema.names if n != INDEX and not n.startswith("__")]
+        projection = [INDEX, *(columns if columns is not None else names)]
+
+        ts = ds.field(INDEX)
+        bounds = []
+        if lower is not None:
+            bounds.append(ts >= self._scalar(lower.value))
+        if upper is not None:
+            bounds.append(ts <= self._scalar(upper.value))
+        if visible_until is not None:
+            bounds.append(ts < self._scalar(visible_until))
+        expression = None
+        for bound in bounds:
+            expression = bound if expression is None else expression & bound
+        return dataset.to_table(columns=projection, filter=expression)
+
+    def _write_segments(
+        self,
+        path: Path,
+        frames: pd.DataFrame | Iterable[pd.DataFrame],
+        replace_from: int,
+        seq: int | None = None,
+        rank: int = 0,
+        row_group: int | None = None
+    ) -> int:
+        """
+        Stages one file per month (per month and chunk when given several frames),
+        then publishes each with an atomic rename. Returns rows written.
+        """
+        seq = time.time_ns() if seq is None else seq
+        write_id = uuid.uuid4().hex[:12]
+        cut = "all" if replace_from == REPLACE_ALL else str(replace_from)
+        staging = path / f"_staging-{write_id}"
+
+        options = {"max_rows_per_group": row_group, "min_rows_per_group": row_group} if row_group else {}
+        rows = 0
+        elapsed = 0.0
+        try:
+            for chunk, df in enumerate([frames] if isinstance(frames, pd.DataFrame) else frames):
+                frame = df.rename_axis(INDEX).reset_index()
+                timestamps = frame[INDEX].dt
+                frame["year"] = timestamps.year.astype("int16")
+                frame["month"] = timestamps.month.astype("int8")
+                start = time.perf_counter()
+                ds.write_dataset(
+                    pa.Table.from_pandas(frame, preserve_index=False),
+                    staging,
+                    format="parquet",
+                    partitioning=PARTITIONING,
+                    basename_template=f"part-{chunk}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                    use_threads=False,
+                    **options
+                )
+                elapsed += time.perf_counter() - start
+                rows += len(df)
+            files = sorted(staging.rglob("*.parquet"))
+            written = sum(file.stat().st_size for file in files)
+            for part, file in enumerate(files):
+                target = path / file.parent.relative_to(staging)
+                target.mkdir(parents=True, exist_ok=True)
+                name = f"seg-{seq:020d}-{rank}-{write_id}-{cut}-{part}of{len(files)}.parquet"
+                os.replace(file, target / name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        kind, asset = path.parent.name, path.name.split("=", 1)[1]
+        STORAGE_SECONDS.observe(elapsed, op="write", kind=kind)
+        STORAGE_BYTES.inc(written, op="write", kind=kind, asset=asset)
+        STORAGE_ROWS.inc(rows, op="write", kind=kind, asset=asset)
+        return rows
+
+    def _segments(self, path: Path) -> list[_Segment]:
+        """Published segments of a dataset, ignoring writes that are still being published."""
+        segments = []
+        base = set(path.glob("year=*/month=*/part-*.parquet"))
+        for file in path.glob("year=*/month=*/*.parquet"):
+            year = int(file.parent.parent.name.split("=", 1)[1])
+            month = int(file.parent.name.split("=", 1)[1])
+            if file in base:
+                # Plain partition files predate segments and are the oldest write
+                segments.append(_Segment(file, year, month, 0, 0, "base", None, len(base)))
+                continue
+            match = SEGMENT_NAME.fullmatch(file.name)
+            if match is None:
+                continue
+            seq, rank, write_id, cut, _, parts = match.groups()
+            replace_from = REPLACE_ALL if cut == "all" else None if cut == "none" else int(cut)
+            segments.append(_Segment(file, year, month, int(seq), int(rank), write_id, replace_from, int(parts)))
+
+        # A write is published once all of its parts are on disk; counted in one pass
+        found = Counter((s.seq, s.rank, s.write_id) for s in segments)
+        published = [s for s in segments if found[(s.seq, s.rank, s.write_id)] == s.parts]
+        return sorted(published, key=lambda s: (s.order, s.year, s.month))
+
+    def _by_write(self, segments: list[_Segment]) -> list[tuple[tuple[int, int], list[_Segment]]]:
+        """Segments grouped per write, newest write first."""
+        groups: dict[str, list[_Segment]] = {}
+        for segment in segments:
+            groups.setdefault(segment.write_id, []).append(segment)
+        return sorted(((g[0].order, g) for g in groups.values()), key=lambda item: item[0], reverse=True)
+
+    def _remove(self, segments: list[_Segment]) -> None:
+        for segment in segments:
+            segment.path.unlink(missing_ok=True)
+            # Drop emptied month/year directories
+            for directory in (segment.path.parent, segment.path.parent.parent):
+                try:
+                    directory.rmdir()
+                except OSError:
+                    break
+
+    def _slice(
+        self,
+        df: pd.DataFrame,
+        columns: list[str] | None,
+        start: datetime | None,
+        end: datetime | None,
+        tail: int | None
+    ) -> pd.DataFrame:
+        """In-memory equivalent of the narrowed reads, for frames served by the feature cache."""
+        if start is not None or end is not None:
+            df = df.loc[self._timestamp(start) if start else None:self._timestamp(end) if end else None]
+        if columns is not None:
+            df = df[columns]
+        return self._limit(df, tail, None)
+
+    @staticmethod
+    def _limit(df: pd.DataFrame, tail: int | None, head: int | None) -> pd.DataFrame:
+        if tail is not None:
+            return df.iloc[max(0, len(df) - tail):]
+        if head is not None:
+            return df.iloc[:head]
+        return df
+
+    @staticmethod
+    def _scalar(value: int) -> pa.Scalar:
+        return pa.scalar(value, type=pa.timestamp("ns", tz="UTC"))
+
+    @staticmethod
+    def _timestamp(value: datetime) -> pd.Timestamp:
+        """Naive datetimes are taken as UTC, like the rest of the ingestion path."""
+        ts = pd.Timestamp(value)
+        return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+    def _batch_to_frame(self, data: MarketDataBatch | list[MarketDataPoint]) -> pd.DataFrame:
+        batch = data if isinstance(data, MarketDataBatch) else MarketDataBatch.from_points(data)
+        return batch.to_frame()
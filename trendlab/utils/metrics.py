@@ -0,0 +1,255 @@
+import bisect
+import math
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# Seconds; spans a cached read (ms) up to a full training run (minutes)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelValues = tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values, strict=True)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    """Monotonic total per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def state(self) -> dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, state: dict[LabelValues, float]) -> None:
+        with self._lock:
+            for key, value in state.items():
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{self._format_labels(key)} {_number(v)}" for key, v in sorted(self.state().items())]
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [{**dict(zip(self.labelnames, key, strict=True)), "value": v} for key, v in sorted(self.state().items())]
+
+
+class Histogram(_Metric):
+    """Bucketed observations (count, sum and cumulative buckets) per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per key: non-cumulative bucket counts (last one is +Inf), sum
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([], 0.0))
+        return sum(counts)
+
+    def sum(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), ([], 0.0))[1]
+
+    def state(self) -> dict[LabelValues, tuple[list[int], float]]:
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    def merge(self, state: dict[LabelValues, tuple[list[int], float]]) -> None:
+        with self._lock:
+            for key, (counts, total) in state.items():
+                mine, my_total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+                self._values[key] = ([a + b for a, b in zip(mine, counts, strict=True)], my_total + total)
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.state().items()):
+            cumulative = 0
+            for bound, count in zip([*self.buckets, math.inf], counts, strict=True):
+                cumulative += count
+                le = 'le="+Inf"' if bound == math.inf else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{self._format_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        rows = []
+        for key, (counts, total) in sorted(self.state().items()):
+            count = sum(counts)
+            rows.append({
+                **dict(zip(self.labelnames, key, strict=True)),
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else 0.0,
+            })
+        return rows
+
+
+class MetricsRegistry:
+    """
+    Process-local set of metrics, rendered in the Prometheus text format.
+
+    Worker processes record into their own registry; `state()` and `merge()` let the
+    parent fold their numbers into its own.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._all():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, list[dict[str, Any]]]:
+        """Recorded series per metric, for JSON output. Metrics without data are left out."""
+        return {m.name: rows for m in self._all() if (rows := m.snapshot())}
+
+    def state(self) -> dict[str, Any]:
+        return {m.name: m.state() for m in self._all()}
+
+    def merge(self, state: dict[str, Any]) -> None:
+        for name, values in state.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                metric.merge(values)
+
+    def reset(self) -> None:
+        for metric in self._all():
+            with metric._lock:
+                metric._values.clear()
+
+    def _register(self, metric: Counter | Histogram) -> Counter | Histogram:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _all(self) -> list[Counter | Histogram]:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: m.name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = MetricsRegistry()
+
+# Per-asset work in the pipeline stages (fetch, features, inference, insights)
+STAGE_SECONDS = REGISTRY.histogram(
+    "trendlab_stage_duration_seconds", "Time spent on one asset in a pipeline stage", ("stage", "asset")
+)
+STAGE_ROWS = REGISTRY.counter("trendlab_stage_rows_total", "Rows produced per asset and stage", ("stage", "asset"))
+STAGE_FAILURES = REGISTRY.counter(
+    "trendlab_stage_failures_total", "Assets that failed a pipeline stage", ("stage", "asset")
+)
+RUN_STAGE_SECONDS = REGISTRY.histogram(
+    "trendlab_run_stage_duration_seconds", "Wall time of each stage of a full pipeline run", ("stage",)
+)
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "trendlab_http_requests_total", "Market data requests by endpoint and HTTP status", ("endpoint", "status")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "trendlab_http_request_duration_seconds", "Market data request latency, including rate limiter waits",
+    ("endpoint",)
+)
+HTTP_RETRIES = REGISTRY.counter(
+    "trendlab_http_retries_total", "Retried market data requests (rate_limit: 429, server_error: 5xx)", ("reason",)
+)
+
+STORAGE_SECONDS = REGISTRY.histogram(
+    "trendlab_storage_duration_seconds", "Parquet dataset read and write latency", ("op", "kind")
+)
+STORAGE_BYTES = REGISTRY.counter(
+    "trendlab_storage_bytes_total", "Parquet file bytes opened for reading or written", ("op", "kind", "asset")
+)
+STORAGE_ROWS = REGISTRY.counter(
+    "trendlab_storage_rows_total", "Rows read from or written to Parquet datasets", ("op", "kind", "asset")
+)
+
+TRAIN_SECONDS = REGISTRY.histogram(
+    "trendlab_train_duration_seconds", "Model training time, cross-validation included", ("model_type",)
+)
+TRAIN_ROWS = REGISTRY.counter("trendlab_train_rows_total", "Rows models were trained on", ("model_type",))
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "trendlab_cache_requests_total", "Cache lookups by cache (http, features, models, serving) and result",
+    ("cache", "result")
+)